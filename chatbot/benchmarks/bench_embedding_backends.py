@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Speed and agreement of the embedding backends against the current torch model
+
+Embeds catalog chunks (400-word windows, as create_pdf_vector_store makes them)
+and sales questions with the sentence-transformers/torch model as reference,
+then with each candidate backend and thread count, and reports:
+
+- Query latency: p50/p95 of single-question encode calls (the per-chat cost)
+- Ingestion throughput: chunks per second in batches of 32
+- Agreement: mean and minimum cosine similarity with the reference vectors,
+  and how many of each question's top-3 chunks are the same
+
+Usage:
+    python benchmarks/bench_embedding_backends.py
+    python benchmarks/bench_embedding_backends.py --variants onnx,onnx-int8 --threads 1,2,4
+    python benchmarks/bench_embedding_backends.py --min-cosine 0.995 --json bench/embedding.json
+
+Exits with status 1 when a variant's minimum cosine falls below --min-cosine,
+so it can gate a switch of EMBEDDING_BACKEND / EMBEDDING_QUANTIZE.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_pipeline import QUESTIONS, generate_catalog  # noqa: E402
+from embedding_backends import describe, load_embedding_model, onnx_available  # noqa: E402
+
+VARIANTS = {
+    "torch": ("torch", False),
+    "onnx": ("onnx", False),
+    "onnx-int8": ("onnx", True),
+}
+
+EXTRA_QUESTIONS = [
+    "Do you offer an annual discount on enterprise plans?",
+    "Which product helps with inventory forecasting?",
+    "Is there a free trial?",
+    "What integrations does the analytics dashboard support?",
+    "How does pricing scale with the number of users?",
+]
+
+
+def chunk_words(text: str, chunk_size: int = 400, overlap: int = 50):
+    words = text.split()
+    return [" ".join(words[i:i + chunk_size]) for i in range(0, len(words), chunk_size - overlap)]
+
+
+def percentile(values, p: float) -> float:
+    return float(np.percentile(np.asarray(values), p))
+
+
+def top_k(queries: np.ndarray, chunks: np.ndarray, k: int = 3):
+    scores = queries @ chunks.T
+    return [set(row) for row in np.argsort(-scores, axis=1)[:, :k]]
+
+
+def measure(model, questions, chunks, repeats: int) -> dict:
+    model.encode(questions[:2])  # warm up
+    latencies = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        model.encode([questions[i % len(questions)]])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    chunk_vectors = np.asarray(model.encode(chunks, batch_size=32), dtype=np.float32)
+    throughput = len(chunks) / (time.perf_counter() - start)
+    question_vectors = np.asarray(model.encode(questions, batch_size=32), dtype=np.float32)
+    return {
+        "query_p50_ms": round(percentile(latencies, 50), 2),
+        "query_p95_ms": round(percentile(latencies, 95), 2),
+        "chunks_per_s": round(throughput, 1),
+        "chunk_vectors": chunk_vectors,
+        "question_vectors": question_vectors,
+    }
+
+
+def agreement(candidate: dict, reference: dict) -> dict:
+    cand = np.vstack([candidate["chunk_vectors"], candidate["question_vectors"]])
+    ref = np.vstack([reference["chunk_vectors"], reference["question_vectors"]])
+    cosine = np.sum(cand * ref, axis=1) / (np.linalg.norm(cand, axis=1) * np.linalg.norm(ref, axis=1))
+    ref_top = top_k(reference["question_vectors"], reference["chunk_vectors"])
+    cand_top = top_k(candidate["question_vectors"], candidate["chunk_vectors"])
+    overlap = np.mean([len(a & b) / len(a) for a, b in zip(ref_top, cand_top)])
+    return {
+        "cosine_mean": round(float(cosine.mean()), 5),
+        "cosine_min": round(float(cosine.min()), 5),
+        "top3_overlap": round(float(overlap), 3),
+    }
+
+
+def run(args) -> dict:
+    catalog = generate_catalog(args.catalog_size, seed=args.seed)
+    chunks = chunk_words(catalog)
+    questions = QUESTIONS + EXTRA_QUESTIONS
+    print(f"📦 {len(chunks)} chunks, {len(questions)} questions, model {args.model}")
+
+    print("\n🔎 Reference: torch (default threads)")
+    reference = measure(load_embedding_model(args.model, "torch"), questions, chunks, args.repeats)
+    import torch
+    default_torch_threads = torch.get_num_threads()
+
+    variants = [v.strip() for v in args.variants.split(",") if v.strip()]
+    threads = [int(t) for t in args.threads.split(",")]
+    results = []
+    print(f"\n   {'variant':<10} {'threads':>7} {'p50 ms':>8} {'p95 ms':>8} {'chunks/s':>9} "
+          f"{'cos mean':>9} {'cos min':>8} {'top-3':>6}")
+    for variant in variants:
+        backend, quantize = VARIANTS[variant]
+        if backend == "onnx" and not onnx_available:
+            print(f"   {variant:<10} skipped (onnxruntime not installed)")
+            continue
+        for count in threads:
+            torch.set_num_threads(default_torch_threads)  # a previous torch variant may have changed it
+            model = load_embedding_model(args.model, backend, quantize, count)
+            m = measure(model, questions, chunks, args.repeats)
+            a = agreement(m, reference)
+            passed = a["cosine_min"] >= args.min_cosine
+            results.append({
+                "variant": variant, "backend": describe(model), "threads": count,
+                **{k: v for k, v in m.items() if not k.endswith("_vectors")}, **a, "passed": passed,
+            })
+            print(f"   {variant:<10} {count or 'auto':>7} {m['query_p50_ms']:>8.2f} {m['query_p95_ms']:>8.2f} "
+                  f"{m['chunks_per_s']:>9.1f} {a['cosine_mean']:>9.5f} {a['cosine_min']:>8.5f} "
+                  f"{a['top3_overlap']:>6.0%}{'' if passed else '  ❌'}")
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "model": args.model,
+        "min_cosine": args.min_cosine,
+        "reference": {k: v for k, v in reference.items() if not k.endswith("_vectors")},
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare embedding backends with the torch model")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="Model name or local directory")
+    parser.add_argument("--variants", default="torch,onnx,onnx-int8", help=f"Comma-separated: {', '.join(VARIANTS)}")
+    parser.add_argument("--threads", default="0,1,4", help="Comma-separated intra-op thread counts (0 = runtime default)")
+    parser.add_argument("--catalog-size", type=int, default=256 * 1024, help="Bytes of synthetic catalog to embed")
+    parser.add_argument("--repeats", type=int, default=100, help="Single-question encodes per variant")
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = run(args)
+
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps(results, indent=2))
+        print(f"\n✅ Results written to {args.json}")
+
+    failed = [r for r in results["results"] if not r["passed"]]
+    if failed:
+        print(f"\n❌ {len(failed)} variant(s) below cosine {args.min_cosine} - do not switch to them")
+        sys.exit(1)
+    print(f"\n✅ All measured variants agree with the torch model (cosine ≥ {args.min_cosine})")
+
+
+if __name__ == "__main__":
+    main()
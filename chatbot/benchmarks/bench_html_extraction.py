@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark the HTML extraction engines against the original BeautifulSoup implementation
+
+Usage:
+    python benchmarks/bench_html_extraction.py [--iterations 20] [--json results.json]
+
+Runs every installed engine over the saved pages in benchmarks/fixtures/ and reports
+mean time per page, peak traced memory and word overlap with the original output.
+The streaming engines are first checked on pages that are easy to get wrong (no
+declared charset, a <meta> charset, unclosed boilerplate elements); the benchmark
+exits with an error if any of them fails.
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from html_extraction import ENGINES, available_engines  # noqa: E402
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+# (name, page bytes, text that must be extracted, text that must not be)
+CORRECTNESS_CASES = [
+    ("UTF-8 page without a charset",
+     "<html><body><p>Café prices — from €29</p></body></html>".encode("utf-8"), "Café prices — from €29", None),
+    ("<meta charset> Latin-1 page",
+     '<html><head><meta charset="iso-8859-1"></head><body><p>Café — ok</p></body></html>'.encode("cp1252"),
+     "Café — ok", None),
+    ("http-equiv charset",
+     '<meta http-equiv="Content-Type" content="text/html; charset=windows-1252"><p>Café</p>'.encode("cp1252"),
+     "Café", None),
+    ("unclosed <select> inside a <div>",
+     b"<body><div><select><option>Choose a plan</div><p>Pricing after the select</p></body>",
+     "Pricing after the select", "Choose a plan"),
+    ("WebForms page wrapped in one <form>",
+     b'<body><form id="form1"><div><h1>Wolf Widget</h1><p>Price $99 per month</p></div>'
+     b'<button>Buy</button><textarea>Your notes</textarea></form></body>',
+     "Price $99 per month", "Your notes"),
+    ("unclosed <nav> until </body>", b"<body><p>Intro</p><nav><a>Home</a><p>Menu</body>", "Intro", "Menu"),
+]
+
+
+def check_correctness(engines) -> bool:
+    """Run the streaming engines over CORRECTNESS_CASES, whole and split into chunks"""
+    ok = True
+    for name, html, expected, unexpected in CORRECTNESS_CASES:
+        for engine in engines:
+            if engine == "bs4":
+                continue  # the original implementation, kept as the baseline
+            for source in (html, [html[:7], html[7:]]):
+                text = ENGINES[engine](source)
+                if expected not in text or (unexpected and unexpected in text):
+                    print(f"   ❌ {engine}: {name} -> {text!r}")
+                    ok = False
+                    break
+    return ok
+
+
+def time_engine(engine: str, html: bytes, iterations: int) -> dict:
+    """Mean wall time and peak allocation for one engine on one page"""
+    extract = ENGINES[engine]
+
+    extract(html)  # warm-up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        text = extract(html)
+    elapsed = (time.perf_counter() - start) / iterations
+
+    tracemalloc.start()
+    extract(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"mean_ms": elapsed * 1000, "peak_kb": peak / 1024, "chars": len(text), "text": text}
+
+
+def word_overlap(a: str, b: str) -> float:
+    words_a, words_b = set(a.split()), set(b.split())
+    if not words_a or not words_b:
+        return 0.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML text extraction engines")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    engines = available_engines()
+    fixtures = sorted(FIXTURES_DIR.glob("*.html"))
+    if not fixtures:
+        print(f"❌ No fixtures found in {FIXTURES_DIR}")
+        sys.exit(1)
+
+    print(f"🔬 Engines: {', '.join(engines)}  |  iterations: {args.iterations}")
+    if not check_correctness(engines):
+        print("❌ Extraction correctness checks failed")
+        sys.exit(1)
+    print(f"✅ {len(CORRECTNESS_CASES)} correctness checks passed")
+    results = []
+
+    for fixture in fixtures:
+        html = fixture.read_bytes()
+        print(f"\n📄 {fixture.name} ({len(html) / 1024:.0f} KB)")
+        print(f"   {'engine':<8} {'mean ms':>10} {'peak KB':>10} {'chars':>8} {'vs bs4':>8} {'speedup':>8}")
+
+        measured = {engine: time_engine(engine, html, args.iterations) for engine in engines}
+        baseline = measured.get("bs4")
+
+        for engine, m in measured.items():
+            overlap = word_overlap(m["text"], baseline["text"]) if baseline else None
+            speedup = baseline["mean_ms"] / m["mean_ms"] if baseline and m["mean_ms"] else None
+            print(f"   {engine:<8} {m['mean_ms']:>10.2f} {m['peak_kb']:>10.0f} {m['chars']:>8} "
+                  f"{overlap if overlap is not None else float('nan'):>8.2f} "
+                  f"{speedup if speedup is not None else float('nan'):>7.1f}x")
+            results.append({
+                "fixture": fixture.name,
+                "engine": engine,
+                "mean_ms": round(m["mean_ms"], 3),
+                "peak_kb": round(m["peak_kb"], 1),
+                "chars": m["chars"],
+                "word_overlap_vs_bs4": round(overlap, 3) if overlap is not None else None,
+                "speedup_vs_bs4": round(speedup, 2) if speedup is not None else None,
+            })
+
+    if "bs4" not in engines:
+        print("\n⚠️ beautifulsoup4 is not installed - no baseline comparison available")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+        print(f"\n✅ Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
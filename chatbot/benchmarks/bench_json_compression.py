@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Serialized size and encode time of representative /api/chat payloads
+
+Builds chat responses of roughly 200, 800 and 2,000 tokens from the text in
+wolf_ai_catalog.txt (plus a 20-line /api/chat/batch body) and compares:
+
+- JSON encoders: stdlib json as used by FastAPI's JSONResponse vs orjson
+- Content codings: identity vs gzip (levels 1/6/9) vs brotli (qualities 4/5/11)
+
+Usage:
+    python benchmarks/bench_json_compression.py
+    python benchmarks/bench_json_compression.py --repeats 500 --json bench/encoding.json
+
+orjson and brotli rows are skipped when those packages are not installed.
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+
+from http_encoding import brotli_available, brotli_compress, gzip_compress, orjson_available  # noqa: E402
+
+if orjson_available:
+    import orjson
+
+CATALOG_TEMPLATE = APP_DIR / "wolf_ai_catalog.txt"
+TOKEN_SIZES = [200, 800, 2000]
+
+
+def response_text(tokens: int, rng: random.Random) -> str:
+    """Markdown-ish sales answer of about `tokens` tokens (4 characters each)"""
+    lines = [l.strip() for l in CATALOG_TEMPLATE.read_text(encoding="utf-8").splitlines() if l.strip()]
+    parts = ["Great question! Here's how our products can help your business:\n"]
+    length = len(parts[0])
+    while length < tokens * 4:
+        line = rng.choice(lines)
+        line = f"- **{line}**" if rng.random() < 0.2 else line
+        parts.append(line)
+        length += len(line) + 1
+    parts.append("\nWould you like a tailored quote or a demo for your team? 🚀")
+    return "\n".join(parts)
+
+
+def chat_payload(tokens: int, rng: random.Random) -> dict:
+    """Same shape as the /api/chat response"""
+    return {
+        "success": True,
+        "response": response_text(tokens, rng),
+        "session_id": "3f1c2b7e-8a4d-4c1e-9b2f-6d0e5a7c9b11",
+        "source_type": "pdf_rag",
+        "loaded_sources": {"pdf": True, "website": True, "text": False},
+        "route": "standard",
+        "model": "llama-3.1-8b-instant",
+        "timestamp": datetime(2025, 1, 1, 12, 0, 0).isoformat(),
+    }
+
+
+def payloads(seed: int) -> dict:
+    rng = random.Random(seed)
+    cases = {f"chat {tokens} tokens": chat_payload(tokens, rng) for tokens in TOKEN_SIZES}
+    cases["batch 20 x 200 tokens"] = [
+        {"index": i, "question": f"Question {i}?", **chat_payload(200, rng)} for i in range(20)
+    ]
+    return cases
+
+
+def timed(func, repeats: int):
+    """(result, mean microseconds per call)"""
+    result = func()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return result, (time.perf_counter() - start) / repeats * 1e6
+
+
+def run(args) -> dict:
+    encoders = {
+        # What starlette's JSONResponse.render does
+        "json": lambda value: json.dumps(value, ensure_ascii=False, allow_nan=False,
+                                         indent=None, separators=(",", ":")).encode("utf-8"),
+    }
+    if orjson_available:
+        encoders["orjson"] = lambda value: orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+    codings = {"identity": None}
+    for level in (1, 6, 9):
+        codings[f"gzip-{level}"] = lambda body, level=level: gzip_compress(body, level)
+    if brotli_available:
+        for quality in (4, 5, 11):
+            codings[f"br-{quality}"] = lambda body, quality=quality: brotli_compress(body, quality)
+
+    results = []
+    for name, value in payloads(args.seed).items():
+        print(f"\n📨 {name}")
+        print(f"   {'encoder':<8} {'encode µs':>10} | {'coding':<9} {'bytes':>8} {'ratio':>6} {'compress µs':>12}")
+        for encoder, encode in encoders.items():
+            body, encode_us = timed(lambda: encode(value), args.repeats)
+            for coding, compress in codings.items():
+                if compress is None:
+                    data, compress_us = body, 0.0
+                else:
+                    data, compress_us = timed(lambda: compress(body), max(1, args.repeats // 10))
+                results.append({
+                    "payload": name, "encoder": encoder, "coding": coding,
+                    "json_bytes": len(body), "bytes": len(data),
+                    "encode_us": round(encode_us, 2), "compress_us": round(compress_us, 2),
+                })
+                print(f"   {encoder:<8} {encode_us:>10.1f} | {coding:<9} {len(data):>8,} "
+                      f"{len(data) / len(body):>6.0%} {compress_us:>12.1f}")
+
+    if not orjson_available:
+        print("\n⚠️  orjson not installed - only the stdlib encoder was measured")
+    if not brotli_available:
+        print("⚠️  brotli not installed - brotli rows were skipped")
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON encoders and compression on chat payloads")
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = run(args)
+
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps(results, indent=2))
+        print(f"\n✅ Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
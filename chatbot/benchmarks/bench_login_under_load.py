@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark login throughput while chat traffic shares the event loop
+
+Usage:
+    python benchmarks/bench_login_under_load.py [--logins 40] [--chats 200] [--workers 2]
+
+Runs the same werkzeug hash check the /api/login handler uses, once inline on the
+event loop (the old behaviour) and once on a bounded worker pool (the current
+behaviour), while simulated chat requests keep awaiting short I/O. Reports login
+throughput and how long chat requests were stalled.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+PASSWORD = "correct horse battery staple"
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def simulated_chat(io_wait: float) -> float:
+    """A chat request that only awaits I/O; its latency above io_wait is event-loop stall"""
+    start = time.perf_counter()
+    await asyncio.sleep(io_wait)
+    return time.perf_counter() - start - io_wait
+
+
+async def run_scenario(mode: str, logins: int, chats: int, workers: int, io_wait: float) -> dict:
+    password_hash = generate_password_hash(PASSWORD)
+    executor = ThreadPoolExecutor(max_workers=workers) if mode == "pool" else None
+    loop = asyncio.get_running_loop()
+
+    async def login():
+        if executor:
+            ok = await loop.run_in_executor(executor, check_password_hash, password_hash, PASSWORD)
+        else:
+            ok = check_password_hash(password_hash, PASSWORD)
+        assert ok
+
+    async def chat_load():
+        stalls = []
+        for _ in range(chats):
+            stalls.append(await simulated_chat(io_wait))
+        return stalls
+
+    start = time.perf_counter()
+    chat_task = asyncio.create_task(chat_load())
+    await asyncio.gather(*(login() for _ in range(logins)))
+    login_elapsed = time.perf_counter() - start
+    stalls = await chat_task
+
+    if executor:
+        executor.shutdown()
+
+    return {
+        "logins_per_sec": logins / login_elapsed,
+        "chat_stall_p50_ms": percentile(stalls, 50) * 1000,
+        "chat_stall_p95_ms": percentile(stalls, 95) * 1000,
+        "chat_stall_max_ms": max(stalls) * 1000,
+        "chat_stall_mean_ms": statistics.mean(stalls) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login throughput while chat is under load")
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--io-wait", type=float, default=0.005, help="Simulated chat I/O wait in seconds")
+    args = parser.parse_args()
+
+    print(f"🔐 {args.logins} concurrent logins, {args.chats} sequential chats, {args.workers} hash workers")
+    print(f"   {'mode':<8} {'logins/s':>10} {'stall p50':>10} {'stall p95':>10} {'stall max':>10}")
+
+    for mode in ("inline", "pool"):
+        r = asyncio.run(run_scenario(mode, args.logins, args.chats, args.workers, args.io_wait))
+        print(f"   {mode:<8} {r['logins_per_sec']:>10.1f} {r['chat_stall_p50_ms']:>9.1f}ms "
+              f"{r['chat_stall_p95_ms']:>9.1f}ms {r['chat_stall_max_ms']:>9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the CPU-side retrieval and prompt-building pipeline
+
+Generates synthetic catalogs (10 KB to 50 MB by default) from the product
+templates in wolf_ai_catalog.txt and times chunk_text, extract_business_insights,
+analyze_question_complexity, find_relevant_content and create_pdf_vector_store
+on each size. Records mean/min wall time and peak Python heap per call and
+writes the results as JSON so runs from different commits can be compared.
+
+Usage:
+    python benchmarks/bench_pipeline.py --json results/HEAD.json
+    python benchmarks/bench_pipeline.py --sizes 10KB,1MB --repeats 3
+    python benchmarks/bench_pipeline.py --json new.json --compare old.json
+
+create_pdf_vector_store is only run up to --max-embed-size (default 1MB) and is
+skipped when the embedding model is unavailable.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+
+CATALOG_TEMPLATE = APP_DIR / "wolf_ai_catalog.txt"
+DEFAULT_SIZES = "10KB,100KB,1MB,10MB,50MB"
+
+QUESTIONS = [
+    "What is the price of the Strategic Planning Assistant?",
+    "Compare the ROI of Financial Analytics Pro against the Market Intelligence Dashboard for a mid-market retailer",
+    "How can your products improve our operational efficiency and workflow productivity?",
+]
+
+PREFIXES = ["", "Smart", "Cloud", "Pro", "Quantum", "Insight", "Edge", "Prime", "Vector", "Atlas"]
+EDITIONS = ["", "Lite", "Plus", "Business", "Enterprise", "2025", "for Retail", "for Healthcare", "for SaaS"]
+INDUSTRIES = ["retail", "healthcare", "manufacturing", "financial services", "logistics", "education", "SaaS"]
+
+
+def parse_size(text: str) -> int:
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*(B|KB|MB|GB)?\s*", text.upper())
+    if not match:
+        raise argparse.ArgumentTypeError(f"Invalid size: {text}")
+    value, unit = float(match.group(1)), match.group(2) or "B"
+    return int(value * {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}[unit])
+
+
+def format_size(size: int) -> str:
+    for unit, factor in (("MB", 1024 ** 2), ("KB", 1024)):
+        if size >= factor:
+            return f"{size / factor:g}{unit}"
+    return f"{size}B"
+
+
+def load_templates():
+    """Split the reference catalog into product blocks and collect reusable lines"""
+    blocks = [b.strip().splitlines() for b in CATALOG_TEMPLATE.read_text(encoding="utf-8").split("\n\n") if b.strip()]
+    products = [b for b in blocks if len(b) > 3 and any("Subscription" in l or "Pricing" in l for l in b[:3])]
+    features = sorted({l for b in products for l in b if l.startswith("- ")})
+    attributes = sorted({l for b in products for l in b[3:] if ":" in l and not l.endswith(":")})
+    return products, features, attributes
+
+
+def generate_catalog(size: int, seed: int = 42) -> str:
+    """Synthetic catalog of roughly `size` bytes built from the reference product templates"""
+    rng = random.Random(seed)
+    products, features, attributes = load_templates()
+    parts = ["WOLF AI BUSINESS INTELLIGENCE SUITE\n\nPRODUCT CATALOG AND PRICING GUIDE\n"]
+    total = len(parts[0])
+    index = 0
+
+    while total < size:
+        template = rng.choice(products)
+        name = " ".join(p for p in (rng.choice(PREFIXES), template[0], rng.choice(EDITIONS)) if p)
+        lines = [
+            f"{name} #{index}",
+            f"Monthly Subscription: ${rng.randint(49, 4999):,}",
+            f"{template[2]} for {rng.choice(INDUSTRIES)} teams",
+            "Key Features:",
+            *rng.sample(features, k=min(len(features), rng.randint(4, 7))),
+            *rng.sample(attributes, k=min(len(attributes), 2)),
+        ]
+        block = "\n".join(lines) + "\n"
+        parts.append(block)
+        total += len(block) + 1
+        index += 1
+
+    return "\n".join(parts)[:size]
+
+
+def measure(func, repeats: int) -> dict:
+    """Mean and min wall time over `repeats` calls, plus peak traced heap of one extra call"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "mean_s": sum(timings) / len(timings),
+        "min_s": min(timings),
+        "peak_kb": peak / 1024,
+        "repeats": repeats,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def run(args) -> dict:
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    import fastapi_app_fixed as app
+
+    sizes = [parse_size(s) for s in args.sizes.split(",")]
+    max_embed = parse_size(args.max_embed_size)
+    results = []
+
+    def record(function: str, size: int, m: dict, **extra):
+        entry = {"function": function, "size_bytes": size, "size": format_size(size), **m, **extra}
+        results.append(entry)
+        print(f"   {function:<28} {m['mean_s'] * 1000:>12.2f} {m['min_s'] * 1000:>12.2f} {m['peak_kb']:>12.0f}")
+
+    for size in sizes:
+        catalog = generate_catalog(size, seed=args.seed)
+        print(f"\n📦 Catalog {format_size(size)} ({len(catalog.split()):,} words)")
+        print(f"   {'function':<28} {'mean ms':>12} {'min ms':>12} {'peak KB':>12}")
+        repeats = args.repeats if size <= 1024 ** 2 else max(1, args.repeats // 3)
+
+        record("chunk_text", size, measure(lambda: app.chunk_text(catalog, chunk_size=400, overlap=50), repeats))
+        record("extract_business_insights", size, measure(lambda: app.extract_business_insights(catalog), repeats))
+        record("analyze_question_complexity", size,
+               measure(lambda: [app.analyze_question_complexity(q) for q in QUESTIONS], repeats * 10))
+
+        embedded = False
+        if app.rag_initialized and size <= max_embed:
+            record("create_pdf_vector_store", size,
+                   measure(lambda: app.create_pdf_vector_store(catalog, "synthetic.pdf"), 1))
+            embedded = True
+        else:
+            reason = "embedding model unavailable" if not app.rag_initialized else f"above --max-embed-size {max_embed}"
+            print(f"   {'create_pdf_vector_store':<28} skipped ({reason})")
+
+        app.active_kb().sources['pdf'] = {'content': catalog, 'filename': 'synthetic.pdf', 'loaded': True}
+        record("find_relevant_content", size,
+               measure(lambda: [app.find_relevant_content(q) for q in QUESTIONS], repeats),
+               retrieval="rag" if embedded else "keyword")
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "rag_initialized": app.rag_initialized,
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline_path: str):
+    baseline = json.loads(Path(baseline_path).read_text())
+    previous = {(r["function"], r["size_bytes"]): r for r in baseline["results"]}
+    print(f"\n🔁 Compared with {baseline.get('commit', '?')} ({baseline_path})")
+    print(f"   {'function':<28} {'size':>8} {'time Δ':>10} {'peak Δ':>10}")
+    for r in current["results"]:
+        old = previous.get((r["function"], r["size_bytes"]))
+        if not old:
+            continue
+        time_delta = (r["mean_s"] / old["mean_s"] - 1) * 100 if old["mean_s"] else 0.0
+        peak_delta = (r["peak_kb"] / old["peak_kb"] - 1) * 100 if old["peak_kb"] else 0.0
+        flag = "  ⚠️" if time_delta > 10 or peak_delta > 10 else ""
+        print(f"   {r['function']:<28} {r['size']:>8} {time_delta:>+9.1f}% {peak_delta:>+9.1f}%{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the retrieval and prompt-building pipeline")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated catalog sizes")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--max-embed-size", default="1MB", help="Largest catalog to embed")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--compare", help="Baseline results JSON to diff against")
+    args = parser.parse_args()
+
+    results = run(args)
+
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps(results, indent=2))
+        print(f"\n✅ Results written to {args.json}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Wolf AI - versioned catalog snapshots
+
+A snapshot is a knowledge base built offline by ingest_catalog.py. Each version is
+written once to <root>/<version>/, and <root>/LATEST names the newest complete one:
+
+    manifest.json             format, version, embedding model, documents per source
+    content.json              source text and the precomputed business insights
+    <source>_embeddings.npy   float32 chunk vectors (chunks x dimension)
+    <source>_text.bin         chunk text, UTF-8, back to back
+    <source>_offsets.npy      byte offset of each chunk in <source>_text.bin (chunks + 1)
+    <source>_chunks.json      chunk ids and metadata
+
+The server maps the arrays read-only (np.load with mmap_mode="r"), so startup neither
+embeds nor copies anything, and all worker processes share one copy in the page cache.
+Knowledge bases start from the snapshot until a tenant loads sources of its own.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+log = logging.getLogger("wolfai.kb")
+
+FORMAT_VERSION = 1
+LATEST_FILE = "LATEST"
+
+
+class SnapshotIndex:
+    """Read-only vector index over a snapshot's memory-mapped chunks, queried like a Chroma collection"""
+
+    read_only = True
+
+    def __init__(self, name: str, directory: Path, source: str):
+        self.name = name
+        self.embeddings = np.load(directory / f"{source}_embeddings.npy", mmap_mode="r")
+        self.offsets = np.load(directory / f"{source}_offsets.npy", mmap_mode="r")
+        self.text = np.memmap(directory / f"{source}_text.bin", dtype=np.uint8, mode="r")
+        chunks = json.loads((directory / f"{source}_chunks.json").read_text(encoding="utf-8"))
+        self.ids: List[str] = chunks["ids"]
+        self.metadatas: List[dict] = chunks["metadatas"]
+        self.squared_norms = np.einsum("ij,ij->i", self.embeddings, self.embeddings)
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def document(self, row: int) -> str:
+        return self.text[self.offsets[row]:self.offsets[row + 1]].tobytes().decode("utf-8")
+
+    def query(self, query_embeddings, n_results: int = 10, include=("documents", "metadatas", "distances")) -> dict:
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        # Squared L2 distances, as Chroma's default space reports them
+        distances = self.squared_norms[None, :] + np.einsum("ij,ij->i", queries, queries)[:, None] \
+            - 2 * (queries @ self.embeddings.T)
+        k = min(n_results, self.count())
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for row in distances:
+            top = np.argpartition(row, k - 1)[:k] if k < len(row) else np.arange(len(row))
+            top = top[np.argsort(row[top])]
+            result["ids"].append([self.ids[i] for i in top])
+            result["documents"].append([self.document(i) for i in top])
+            result["metadatas"].append([self.metadatas[i] for i in top])
+            result["distances"].append([float(row[i]) for i in top])
+        return {key: value if key == "ids" or key in include else None for key, value in result.items()}
+
+    def get(self, where: Optional[dict] = None, include=("documents", "metadatas")) -> dict:
+        rows = [i for i, metadata in enumerate(self.metadatas)
+                if not where or all(metadata.get(k) == v for k, v in where.items())]
+        return {
+            "ids": [self.ids[i] for i in rows],
+            "documents": [self.document(i) for i in rows] if "documents" in include else None,
+            "metadatas": [self.metadatas[i] for i in rows] if "metadatas" in include else None,
+            "embeddings": np.asarray(self.embeddings[rows]) if "embeddings" in include else None,
+        }
+
+
+class CatalogSnapshot:
+    """A loaded snapshot: source text, insights and a read-only index per source, shared by all knowledge bases"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.manifest = json.loads((self.directory / "manifest.json").read_text(encoding="utf-8"))
+        if self.manifest.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format {self.manifest.get('format')!r} in {self.directory}")
+        self.version: str = self.manifest["version"]
+        content = json.loads((self.directory / "content.json").read_text(encoding="utf-8"))
+        self.sources: Dict[str, dict] = content["sources"]
+        self.insights: Dict[str, dict] = content["insights"]
+        self.indexes: Dict[str, SnapshotIndex] = {
+            source: SnapshotIndex(f"snapshot_{source}_{self.version}", self.directory, source)
+            for source in self.manifest["indexed"]
+        }
+
+    def describe(self) -> dict:
+        return {
+            "version": self.version,
+            "chunks": {source: index.count() for source, index in self.indexes.items()},
+            "embedding_model": self.manifest["embedding"]["model"],
+        }
+
+
+def resolve_snapshot_dir(path) -> Path:
+    """A snapshot version directory, or the newest complete version under a snapshot root"""
+    path = Path(path)
+    if (path / "manifest.json").exists():
+        return path
+    latest = path / LATEST_FILE
+    if latest.exists():
+        return path / latest.read_text(encoding="utf-8").strip()
+    raise FileNotFoundError(f"No snapshot found at {path}")
+
+
+def load_snapshot(path, embedding_model: Optional[str] = None, embedding_dim: Optional[int] = None) -> CatalogSnapshot:
+    """Map a snapshot, refusing one embedded with a different model than the server's"""
+    snapshot = CatalogSnapshot(resolve_snapshot_dir(path))
+    embedding = snapshot.manifest["embedding"]
+    if embedding_model and embedding["model"] != embedding_model:
+        raise ValueError(f"Snapshot {snapshot.version} was embedded with {embedding['model']}, "
+                         f"the server uses {embedding_model}")
+    if embedding_dim and embedding["dimension"] != embedding_dim:
+        raise ValueError(f"Snapshot {snapshot.version} has {embedding['dimension']}-dimensional vectors, "
+                         f"the server's model produces {embedding_dim}")
+    return snapshot
+
+
+def write_snapshot(root, sources: Dict[str, dict], insights: Dict[str, dict], indexes: Dict[str, dict],
+                   documents: Dict[str, list], embedding: dict, keep: int = 3) -> Path:
+    """Write a new snapshot version under root, point LATEST at it and prune old versions
+
+    indexes maps each source to its "ids", "documents", "metadatas" and "embeddings".
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256(json.dumps(embedding, sort_keys=True).encode("utf-8"))
+    for source in sorted(indexes):
+        for document in indexes[source]["documents"]:
+            digest.update(document.encode("utf-8"))
+    version = f"{time.strftime('%Y%m%dT%H%M%S')}-{digest.hexdigest()[:8]}"
+
+    staging = root / f".{version}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir()
+
+    indexed = []
+    for source, index in indexes.items():
+        if not index["ids"]:
+            continue
+        np.save(staging / f"{source}_embeddings.npy", np.ascontiguousarray(index["embeddings"], dtype=np.float32))
+        encoded = [document.encode("utf-8") for document in index["documents"]]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(chunk) for chunk in encoded])
+        np.save(staging / f"{source}_offsets.npy", offsets)
+        (staging / f"{source}_text.bin").write_bytes(b"".join(encoded))
+        (staging / f"{source}_chunks.json").write_text(json.dumps({
+            "ids": index["ids"], "metadatas": index["metadatas"]
+        }), encoding="utf-8")
+        indexed.append(source)
+
+    (staging / "content.json").write_text(json.dumps({"sources": sources, "insights": insights}), encoding="utf-8")
+    # Written last: a version directory with a manifest is complete
+    (staging / "manifest.json").write_text(json.dumps({
+        "format": FORMAT_VERSION,
+        "version": version,
+        "created_at": time.time(),
+        "embedding": embedding,
+        "indexed": indexed,
+        "chunks": {source: len(indexes[source]["ids"]) for source in indexed},
+        "documents": documents,
+    }, indent=2), encoding="utf-8")
+
+    target = root / version
+    if target.exists():
+        # Same content and model within the same second: keep the existing copy
+        shutil.rmtree(staging, ignore_errors=True)
+    else:
+        os.replace(staging, target)
+    latest = root / (LATEST_FILE + ".tmp")
+    latest.write_text(version, encoding="utf-8")
+    os.replace(latest, root / LATEST_FILE)
+    prune_snapshots(root, keep)
+    return target
+
+
+def prune_snapshots(root: Path, keep: int) -> List[str]:
+    """Remove all but the newest `keep` versions (never the one LATEST names)"""
+    latest = (root / LATEST_FILE).read_text(encoding="utf-8").strip()
+    versions = sorted(p.name for p in root.iterdir()
+                      if p.is_dir() and not p.name.startswith(".") and (p / "manifest.json").exists())
+    removed = []
+    for name in versions[:-max(keep, 1)]:
+        if name == latest:
+            continue
+        # Servers still mapping an old version keep their pages (POSIX); elsewhere the files stay
+        shutil.rmtree(root / name, ignore_errors=True)
+        removed.append(name)
+    return removed
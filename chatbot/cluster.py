@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Wolf AI - prefork cluster mode for the FastAPI backend
+
+- The supervisor binds the listening socket once and runs SERVER_WORKERS uvicorn
+  worker processes on it, so requests are spread over every core
+- A worker that dies is replaced. A rolling restart (SIGHUP, or
+  `python server_manager.py restart`) replaces one worker at a time: the new worker
+  must be accepting connections before the old one is drained, so capacity never
+  drops below SERVER_WORKERS during a deploy
+- The supervisor records its own and its workers' PIDs in .server_cluster.json;
+  server_manager.py and run_server.py use it for stop, restart and status
+
+Usage:
+    python cluster.py
+    python cluster.py --workers 4 --port 8000 --loop uvloop --http httptools
+"""
+
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+import uvicorn
+
+APP_DIR = Path(__file__).resolve().parent
+STATE_FILE = APP_DIR / ".server_cluster.json"
+CONTROL_FILE = APP_DIR / ".server_cluster.ctl"
+WORKER_STARTUP_TIMEOUT_SECONDS = 180  # loading the embedding model dominates startup
+
+
+def resolve_workers(value: str) -> int:
+    """SERVER_WORKERS: a number, or "auto" for one worker per CPU"""
+    if value.strip().lower() == "auto":
+        return os.cpu_count() or 1
+    return max(1, int(value))
+
+
+def resolve_loop(name: str) -> str:
+    if name == "uvloop" and importlib.util.find_spec("uvloop") is None:
+        print("⚠️  uvloop not installed (or not supported on this platform) - using asyncio")
+        return "asyncio"
+    return name
+
+
+def resolve_http(name: str) -> str:
+    if name == "httptools" and importlib.util.find_spec("httptools") is None:
+        print("⚠️  httptools not installed - using h11")
+        return "h11"
+    return name
+
+
+def describe(settings: dict) -> str:
+    """Event loop and HTTP parser uvicorn will actually use"""
+    loop, http = settings["loop"], settings["http"]
+    if loop == "auto":
+        loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    if http == "auto":
+        http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    return f"{loop} + {http}"
+
+
+def server_settings() -> dict:
+    """Server settings from the environment (.env is loaded by the caller)"""
+    return {
+        "host": os.getenv("SERVER_HOST", "127.0.0.1"),
+        "port": int(os.getenv("SERVER_PORT", "8000")),
+        "workers": resolve_workers(os.getenv("SERVER_WORKERS", "1")),
+        "loop": resolve_loop(os.getenv("SERVER_LOOP", "auto")),
+        "http": resolve_http(os.getenv("SERVER_HTTP", "auto")),
+        "backlog": int(os.getenv("SERVER_BACKLOG", "2048")),
+        "limit_concurrency": int(os.getenv("SERVER_LIMIT_CONCURRENCY", "0")) or None,
+        "timeout_keep_alive": int(os.getenv("SERVER_KEEP_ALIVE_SECONDS", "30")),
+        "timeout_graceful_shutdown": int(os.getenv("SERVER_DRAIN_SECONDS", "30")),
+    }
+
+
+def uvicorn_config(settings: dict, **overrides) -> uvicorn.Config:
+    options = {
+        "host": settings["host"],
+        "port": settings["port"],
+        "loop": settings["loop"],
+        "http": settings["http"],
+        "backlog": settings["backlog"],
+        "limit_concurrency": settings["limit_concurrency"],
+        "timeout_keep_alive": settings["timeout_keep_alive"],
+        "timeout_graceful_shutdown": settings["timeout_graceful_shutdown"],
+        "reload": False,
+        "access_log": True,
+        "log_level": "info",
+        "lifespan": "on",
+    }
+    options.update(overrides)
+    return uvicorn.Config("fastapi_app_fixed:app", **options)
+
+
+def cluster_state() -> Optional[dict]:
+    """Contents of the supervisor's state file, if there is one (callers check the PID is alive)"""
+    try:
+        return json.loads(STATE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def request_control(command: str) -> None:
+    """Ask a running supervisor to "restart" (rolling) or "stop" """
+    CONTROL_FILE.write_text(command, encoding="utf-8")
+
+
+class _WorkerServer(uvicorn.Server):
+    def __init__(self, config: uvicorn.Config, ready):
+        super().__init__(config)
+        self.ready = ready
+
+    async def startup(self, sockets=None) -> None:
+        await super().startup(sockets=sockets)
+        if self.started:
+            self.ready.set()
+
+
+def _run_worker(settings: dict, sockets: list, ready, stop) -> None:
+    """Worker process: serve on the supervisor's socket until asked to drain"""
+    os.chdir(APP_DIR)
+    sys.path.insert(0, str(APP_DIR))
+    server = _WorkerServer(uvicorn_config(settings), ready)
+    parent = os.getppid()
+
+    def watch():
+        # Drain when the supervisor says so, or when it has gone away
+        while not stop.wait(1.0):
+            if os.getppid() != parent:
+                break
+        server.should_exit = True
+
+    threading.Thread(target=watch, daemon=True).start()
+    server.run(sockets=sockets)
+
+
+class Worker:
+    def __init__(self, process, ready, stop, generation: int):
+        self.process = process
+        self.ready = ready
+        self.stop = stop
+        self.generation = generation
+        self.started_at = time.time()
+
+    def wait_ready(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.ready.wait(0.2):
+                return True
+            if not self.process.is_alive():
+                return False
+        return False
+
+    def drain(self, timeout: float) -> None:
+        """Stop accepting, let in-flight requests finish, then make sure it is gone"""
+        self.stop.set()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+
+class ClusterSupervisor:
+    def __init__(self, settings: dict):
+        self.settings = settings
+        self.context = multiprocessing.get_context("spawn")
+        self.workers: List[Worker] = []
+        self.generation = 1
+        self.sockets = []
+        self.should_exit = threading.Event()
+        self.restart_requested = threading.Event()
+        self.started_at = time.time()
+
+    def spawn(self) -> Worker:
+        ready, stop = self.context.Event(), self.context.Event()
+        process = self.context.Process(target=_run_worker, args=(self.settings, self.sockets, ready, stop),
+                                       name=f"wolfai-worker-{self.generation}")
+        process.start()
+        worker = Worker(process, ready, stop, self.generation)
+        self.workers.append(worker)
+        return worker
+
+    def retire(self, worker: Worker) -> None:
+        worker.drain(self.settings["timeout_graceful_shutdown"] + 5)
+        if worker in self.workers:
+            self.workers.remove(worker)
+
+    def write_state(self) -> None:
+        state = {
+            "supervisor_pid": os.getpid(),
+            "host": self.settings["host"],
+            "port": self.settings["port"],
+            "server": describe(self.settings),
+            "generation": self.generation,
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(),
+            "workers": [{
+                "pid": w.process.pid,
+                "generation": w.generation,
+                "started_at": datetime.fromtimestamp(w.started_at).isoformat(),
+            } for w in self.workers],
+        }
+        staging = STATE_FILE.with_suffix(".tmp")
+        staging.write_text(json.dumps(state, indent=2), encoding="utf-8")
+        os.replace(staging, STATE_FILE)
+
+    def rolling_restart(self) -> None:
+        """Replace workers one at a time, each only after its replacement is serving"""
+        self.generation += 1
+        print(f"🔄 Rolling restart to generation {self.generation}...", flush=True)
+        for old in [w for w in self.workers if w.generation < self.generation]:
+            if self.should_exit.is_set():
+                return
+            new = self.spawn()
+            if not new.wait_ready(WORKER_STARTUP_TIMEOUT_SECONDS):
+                print("❌ Replacement worker failed to start - keeping the remaining old workers", flush=True)
+                self.retire(new)
+                self.write_state()
+                return
+            self.write_state()
+            print(f"   Worker {new.process.pid} ready, draining {old.process.pid}", flush=True)
+            self.retire(old)
+            self.write_state()
+        print(f"✅ Rolling restart complete ({len(self.workers)} workers)", flush=True)
+
+    def check_control(self) -> None:
+        try:
+            command = CONTROL_FILE.read_text(encoding="utf-8").strip()
+            CONTROL_FILE.unlink()
+        except OSError:
+            return
+        if command == "restart":
+            self.restart_requested.set()
+        elif command == "stop":
+            self.should_exit.set()
+
+    def replace_dead_workers(self) -> None:
+        for worker in [w for w in self.workers if not w.process.is_alive()]:
+            print(f"⚠️  Worker {worker.process.pid} exited with code {worker.process.exitcode} - replacing it", flush=True)
+            self.workers.remove(worker)
+            self.spawn()
+            self.write_state()
+
+    def handle_signal(self, sig, frame) -> None:
+        self.should_exit.set()
+
+    def handle_reload(self, sig, frame) -> None:
+        self.restart_requested.set()
+
+    def run(self) -> None:
+        config = uvicorn_config(self.settings)
+        self.sockets = [config.bind_socket()]
+
+        # Workers keep per-process state; with several of them, knowledge base and chat
+        # session changes are written through to disk so every worker picks them up
+        os.environ["SERVER_WORKERS"] = str(self.settings["workers"])
+        if self.settings["workers"] > 1:
+            os.environ.setdefault("KNOWLEDGE_BASE_WRITE_THROUGH", "true")
+            os.environ.setdefault("CONVERSATION_WRITE_THROUGH", "true")
+
+        signal.signal(signal.SIGINT, self.handle_signal)
+        signal.signal(signal.SIGTERM, self.handle_signal)
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self.handle_reload)
+        try:
+            CONTROL_FILE.unlink()
+        except OSError:
+            pass
+
+        print(f"🐺 Wolf AI cluster: {self.settings['workers']} workers on "
+              f"http://{self.settings['host']}:{self.settings['port']} ({describe(self.settings)})", flush=True)
+        for _ in range(self.settings["workers"]):
+            self.spawn()
+        self.write_state()
+        for worker in list(self.workers):
+            worker.wait_ready(WORKER_STARTUP_TIMEOUT_SECONDS)
+        print(f"✅ {sum(1 for w in self.workers if w.ready.is_set())} workers ready "
+              f"(supervisor PID {os.getpid()})", flush=True)
+
+        try:
+            while not self.should_exit.wait(0.5):
+                self.check_control()
+                if self.restart_requested.is_set():
+                    self.restart_requested.clear()
+                    self.rolling_restart()
+                self.replace_dead_workers()
+        finally:
+            print("🛑 Draining workers...", flush=True)
+            for worker in self.workers:
+                worker.stop.set()
+            for worker in list(self.workers):
+                self.retire(worker)
+            for sock in self.sockets:
+                sock.close()
+            for path in (STATE_FILE, CONTROL_FILE):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            print("✅ Cluster stopped", flush=True)
+
+
+def main():
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(APP_DIR / ".env")
+    except ImportError:
+        pass
+
+    parser = argparse.ArgumentParser(description="Run the Wolf AI backend as a prefork cluster")
+    parser.add_argument("--workers", help='Worker processes, or "auto" for one per CPU (SERVER_WORKERS)')
+    parser.add_argument("--host", help="SERVER_HOST")
+    parser.add_argument("--port", type=int, help="SERVER_PORT")
+    parser.add_argument("--loop", choices=["auto", "asyncio", "uvloop"], help="SERVER_LOOP")
+    parser.add_argument("--http", choices=["auto", "h11", "httptools"], help="SERVER_HTTP")
+    parser.add_argument("--backlog", type=int, help="SERVER_BACKLOG")
+    parser.add_argument("--limit-concurrency", type=int, help="SERVER_LIMIT_CONCURRENCY, per worker (0 = no limit)")
+    args = parser.parse_args()
+
+    settings = server_settings()
+    if args.workers:
+        settings["workers"] = resolve_workers(args.workers)
+    for name in ("host", "port", "backlog"):
+        if getattr(args, name) is not None:
+            settings[name] = getattr(args, name)
+    if args.loop:
+        settings["loop"] = resolve_loop(args.loop)
+    if args.http:
+        settings["http"] = resolve_http(args.http)
+    if args.limit_concurrency is not None:
+        settings["limit_concurrency"] = args.limit_concurrency or None
+
+    os.chdir(APP_DIR)
+    ClusterSupervisor(settings).run()
+
+
+if __name__ == "__main__":
+    main()
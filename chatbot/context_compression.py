@@ -0,0 +1,185 @@
+"""
+Wolf AI - extractive compression of retrieved context
+
+Retrieved chunks are 400-word windows, and most of their sentences have nothing to do
+with the question. ContextCompressor splits the chunks into sentences (catalog bullets
+and "Label: value" fields count as sentences), scores each by cosine similarity with the
+question's embedding, and keeps the best ones that fit a token budget, in their original
+order. A kept sentence brings along the product heading it belongs to, so the model
+still knows which product a price or feature is for. Sentence vectors are cached, so
+chunks that keep being retrieved are only embedded once; the question's vector is
+normally the one retrieval already computed, and questions are never cached.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+HEADING_MAX_WORDS = 10
+LABEL_MAX_WORDS = 4
+# A "Label: value" line such as "Monthly Subscription: $299" or "Target Market: CFOs"
+FIELD_LINE = re.compile(r"^[A-Z][\w&/()'-]*(?: [\w&/()'-]+){0,3}:\s*\S")
+BULLETS = {"-", "•", "*", "–"}
+
+
+def find_headings(content: str) -> FrozenSet[str]:
+    """Product headings of a source: short title lines directly followed by a "Label: value" field"""
+    lines = [" ".join(line.split()) for line in content.splitlines()]
+    headings = set()
+    for line, following in zip(lines, lines[1:]):
+        if (line and (line[0].isupper() or line[0].isdigit()) and ":" not in line
+                and line[0] not in BULLETS and not line.endswith(".")
+                and len(line.split()) <= HEADING_MAX_WORDS and FIELD_LINE.match(following)):
+            headings.add(line)
+    return frozenset(headings)
+
+
+def _normalized(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+def _capitalized(word: str) -> bool:
+    return word[:1].isupper() or word[:1].isdigit() or word in ("&", "/")
+
+
+class ContextCompressor:
+    """Keeps the sentences of retrieved chunks that are most similar to the question"""
+
+    def __init__(self, encode: Callable[[List[str]], np.ndarray], count_tokens: Callable[[str], int],
+                 cache_size: int = 20000):
+        self.encode = encode
+        self.count_tokens = count_tokens
+        self.cache_size = cache_size
+        self._vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._headings: "OrderedDict[int, Tuple[str, Dict[str, List[Tuple[str, ...]]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def headings_for(self, content: str) -> Dict[str, List[Tuple[str, ...]]]:
+        """Headings of a source's content by first word, longest first (cached per content object)"""
+        with self._lock:
+            cached = self._headings.get(id(content))
+            if cached is not None and cached[0] is content:
+                self._headings.move_to_end(id(content))
+                return cached[1]
+        by_first_word: Dict[str, List[Tuple[str, ...]]] = {}
+        for heading in find_headings(content):
+            words = tuple(heading.split())
+            by_first_word.setdefault(words[0], []).append(words)
+        for candidates in by_first_word.values():
+            candidates.sort(key=len, reverse=True)
+        with self._lock:
+            # Holding the content keeps its id from being reused while the entry exists
+            self._headings[id(content)] = (content, by_first_word)
+            while len(self._headings) > 32:
+                self._headings.popitem(last=False)
+        return by_first_word
+
+    def split_units(self, chunk: str, headings: Dict[str, List[Tuple[str, ...]]]) -> List[Tuple[str, bool]]:
+        """(text, is_heading) sentences of a chunk; chunks are whitespace-joined, so boundaries are
+        found from sentence ends, bullets, "Label:" fields and the source's known headings"""
+        words = chunk.split()
+        starts = {0}
+        heading_spans = {}
+        i = 0
+        while i < len(words):
+            for candidate in headings.get(words[i], ()):
+                if tuple(words[i:i + len(candidate)]) == candidate:
+                    heading_spans[i] = i + len(candidate)
+                    starts.update((i, i + len(candidate)))
+                    i += len(candidate) - 1
+                    break
+            i += 1
+
+        for i, word in enumerate(words):
+            if i and words[i - 1][-1:] in ".!?" and _capitalized(word):
+                starts.add(i)
+            if word in BULLETS:
+                starts.add(i)
+            if word.endswith(":") and _capitalized(word):
+                # The label runs back over capitalized words, but not across another boundary
+                start = i
+                while (start > 0 and i - start < LABEL_MAX_WORDS - 1 and _capitalized(words[start - 1])
+                       and start not in starts and not words[start - 1].endswith((".", ":", "!", "?"))):
+                    start -= 1
+                starts.add(start)
+
+        bounds = sorted(s for s in starts if s < len(words)) + [len(words)]
+        return [(" ".join(words[a:b]), a in heading_spans and heading_spans[a] == b)
+                for a, b in zip(bounds, bounds[1:]) if a < b]
+
+    def vectors(self, texts: Sequence[str], uncached: Sequence[str] = ()) -> Tuple[np.ndarray, np.ndarray]:
+        """Unit-length embeddings of texts (cached) and of uncached (one-off texts such as a
+        question, never cached), computing everything missing in a single model call"""
+        with self._lock:
+            found = {text: self._vectors[text] for text in texts if text in self._vectors}
+            for text in found:
+                self._vectors.move_to_end(text)
+        missing = [text for text in dict.fromkeys(texts) if text not in found]
+        computed = np.zeros((0, 0), dtype=np.float32)
+        if missing or uncached:
+            computed = _normalized(np.asarray(self.encode(missing + list(uncached)), dtype=np.float32))
+        if missing:
+            found.update(zip(missing, computed[:len(missing)]))
+            with self._lock:
+                self._vectors.update(zip(missing, computed[:len(missing)]))
+                while len(self._vectors) > self.cache_size:
+                    self._vectors.popitem(last=False)
+        return np.vstack([found[text] for text in texts]), computed[len(missing):]
+
+    def compress(self, query: str, chunks: List[str], budget_tokens: int, source_content: str = "",
+                 query_vector: Optional[Sequence[float]] = None) -> str:
+        """The chunks' sentences most similar to query, within budget_tokens, in their original order
+
+        query_vector is the question's embedding when the caller already has it (from retrieval).
+        """
+        joined = "\n\n".join(chunks)
+        if self.count_tokens(joined) <= budget_tokens:
+            return joined
+
+        headings = self.headings_for(source_content) if source_content else {}
+        units = []  # (chunk, position, text, is_heading, heading unit index)
+        for c, chunk in enumerate(chunks):
+            current_heading: Optional[int] = None
+            for position, (text, is_heading) in enumerate(self.split_units(chunk, headings)):
+                units.append((c, position, text, is_heading, current_heading))
+                if is_heading:
+                    current_heading = len(units) - 1
+        candidates = [i for i, unit in enumerate(units) if not unit[3]]
+        if not candidates:
+            return joined
+
+        texts = [units[i][2] for i in candidates]
+        if query_vector is None:
+            vectors, (query_vector,) = self.vectors(texts, uncached=[query])
+        else:
+            vectors, _ = self.vectors(texts)
+            query_vector = _normalized(np.asarray(query_vector, dtype=np.float32)[None, :])[0]
+        scores = vectors @ query_vector
+
+        selected = set()
+        used = 0
+        for rank, k in enumerate(np.argsort(-scores)):
+            i = candidates[k]
+            heading = units[i][4]
+            cost = self.count_tokens(units[i][2])
+            if heading is not None and heading not in selected:
+                cost += self.count_tokens(units[heading][2])
+            if used + cost > budget_tokens and rank > 0:
+                continue
+            selected.add(i)
+            if heading is not None:
+                selected.add(heading)
+            used += cost
+
+        parts: List[List[str]] = [[] for _ in chunks]
+        previous = {}
+        for i in sorted(selected):
+            c, position, text = units[i][:3]
+            if parts[c] and previous[c] != position - 1:
+                parts[c].append("...")
+            parts[c].append(text)
+            previous[c] = position
+        return "\n\n".join(" ".join(part) for part in parts if part)
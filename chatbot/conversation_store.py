@@ -0,0 +1,142 @@
+"""
+Wolf AI - chat session state
+
+A session is keyed by (tenant, session_id) and holds the verbatim recent messages,
+the running summary of older turns and the question analytics used to shape the
+prompt. In a single process everything stays in memory. With several server
+processes (cluster mode) a turn may land on any worker, so sessions are written
+through to a shared directory after every change, one JSON file per session, and
+a worker reloads a session that another process has rewritten since it last read it:
+
+    <directory>/<tenant key>/<session key>.json
+
+Two turns of the same session answered at the same moment by different workers
+are not merged; the later write wins, as with two browser tabs racing each other.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+log = logging.getLogger("wolfai.chat")
+
+SessionKey = Tuple[str, str]
+
+
+def _hashed(value: str) -> str:
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()[:16]
+
+
+def empty_session() -> dict:
+    return {"messages": [], "summary": "", "analytics": {"questions": [], "complexity_scores": []}}
+
+
+class ConversationStore:
+    """Chat sessions in memory, optionally written through to a directory shared by all workers"""
+
+    def __init__(self, directory: Optional[Path] = None):
+        self.directory = Path(directory) if directory else None
+        self._sessions: Dict[SessionKey, dict] = {}
+        self._stamps: Dict[SessionKey, Optional[tuple]] = {}  # on-disk file each session was read from
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _path(self, key: SessionKey) -> Path:
+        return self.directory / _hashed(key[0]) / f"{_hashed(key[1])}.json"
+
+    def _stamp(self, key: SessionKey) -> Optional[tuple]:
+        try:
+            stat = self._path(key).stat()
+        except OSError:
+            return None
+        # Every write replaces the file, so the inode changes even within one mtime tick
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def get(self, key: SessionKey) -> Optional[dict]:
+        """A session, reloaded first if another process has changed or removed it"""
+        if self.directory is None:
+            return self._sessions.get(key)
+        stamp = self._stamp(key)
+        with self._lock:
+            if key in self._stamps and self._stamps[key] == stamp:
+                return self._sessions.get(key)
+        session = None
+        if stamp is not None:
+            try:
+                session = json.loads(self._path(key).read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                # Written between the stat and the read; the next access picks it up
+                log.warning("Could not read chat session %s: %s", key[1], e)
+                return self._sessions.get(key)
+        with self._lock:
+            self._stamps[key] = stamp
+            if session is None:
+                self._sessions.pop(key, None)
+            else:
+                self._sessions[key] = session
+        return session
+
+    def session(self, key: SessionKey) -> dict:
+        """A session, created empty if it does not exist yet"""
+        session = self.get(key)
+        if session is None:
+            with self._lock:
+                session = self._sessions.setdefault(key, empty_session())
+                self._stamps.setdefault(key, None)  # not on disk until its first save
+        return session
+
+    def save(self, key: SessionKey) -> None:
+        """Write a changed session through to the shared directory"""
+        if self.directory is None:
+            return
+        session = self._sessions.get(key)
+        if session is None:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            staging = path.with_name(f".{path.stem}.{uuid.uuid4().hex[:8]}.tmp")
+            staging.write_text(json.dumps(session), encoding="utf-8")
+            os.replace(staging, path)
+        except OSError as e:
+            log.warning("Could not write chat session %s: %s", key[1], e)
+            return
+        with self._lock:
+            self._stamps[key] = self._stamp(key)
+
+    def pop(self, key: SessionKey) -> None:
+        with self._lock:
+            self._sessions.pop(key, None)
+            self._stamps.pop(key, None)
+        if self.directory is not None:
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+
+    def clear_tenant(self, tenant: str) -> None:
+        """Forget every session of one tenant, in this process and on disk"""
+        with self._lock:
+            for key in [key for key in self._sessions if key[0] == tenant]:
+                del self._sessions[key]
+                self._stamps.pop(key, None)
+        if self.directory is not None:
+            shutil.rmtree(self.directory / _hashed(tenant), ignore_errors=True)
+
+    def count(self, tenant: str) -> int:
+        """Sessions of a tenant (across all workers when shared)"""
+        if self.directory is not None:
+            try:
+                return sum(1 for path in (self.directory / _hashed(tenant)).glob("*.json"))
+            except OSError:
+                return 0
+        with self._lock:
+            return sum(1 for key in self._sessions if key[0] == tenant)
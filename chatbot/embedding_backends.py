@@ -0,0 +1,177 @@
+"""
+Wolf AI - embedding model backends
+
+Both backends expose the SentenceTransformer interface the RAG pipeline uses
+(`encode(texts, batch_size=...)` returning a float32 array, and
+`get_sentence_embedding_dimension()`):
+
+- "torch": sentence-transformers on PyTorch (the original backend)
+- "onnx":  the model's published ONNX export run by onnxruntime with graph
+           optimizations, a fixed intra-op thread pool and optionally the int8
+           quantized weights; the same tokenizer, mean pooling and L2
+           normalization as the sentence-transformers pipeline. Does not import
+           torch, which saves a few hundred MB per worker
+
+"auto" picks onnx when onnxruntime is installed and falls back to torch.
+Check a switch with benchmarks/bench_embedding_backends.py, which reports speed
+and the cosine agreement of each backend with the torch model.
+"""
+
+import json
+import logging
+import os
+import platform
+from pathlib import Path
+from typing import List, Optional, Union
+
+import numpy as np
+
+try:
+    import onnxruntime
+    from tokenizers import Tokenizer
+    onnx_available = True
+except ImportError:
+    onnx_available = False
+
+log = logging.getLogger("wolfai.rag")
+
+BACKENDS = ("torch", "onnx")
+
+
+def resolve_backend(name: str) -> str:
+    name = (name or "auto").lower()
+    if name == "auto":
+        return "onnx" if onnx_available else "torch"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend {name!r} (expected auto, torch or onnx)")
+    if name == "onnx" and not onnx_available:
+        log.warning("onnxruntime not installed; using the torch embedding backend")
+        return "torch"
+    return name
+
+
+def repo_id(model_name: str) -> str:
+    """'all-MiniLM-L6-v2' -> 'sentence-transformers/all-MiniLM-L6-v2' (as sentence-transformers resolves it)"""
+    if "/" in model_name or os.path.isdir(model_name):
+        return model_name
+    return f"sentence-transformers/{model_name}"
+
+
+def quantized_onnx_file() -> str:
+    """The model repo's int8 export that matches this CPU"""
+    machine = platform.machine().lower()
+    if machine in ("arm64", "aarch64"):
+        return "onnx/model_qint8_arm64.onnx"
+    try:
+        flags = Path("/proc/cpuinfo").read_text()
+    except OSError:
+        flags = ""
+    if "avx512_vnni" in flags:
+        return "onnx/model_qint8_avx512_vnni.onnx"
+    if "avx512f" in flags:
+        return "onnx/model_qint8_avx512.onnx"
+    return "onnx/model_quint8_avx2.onnx"
+
+
+def model_file(model_name: str, filename: str) -> str:
+    """Path of a file from a local model directory or the Hugging Face cache (downloading it if needed)"""
+    if os.path.isdir(model_name):
+        path = Path(model_name) / filename
+        if not path.exists():
+            raise FileNotFoundError(f"{path} not found")
+        return str(path)
+    from huggingface_hub import hf_hub_download
+    return hf_hub_download(repo_id(model_name), filename)
+
+
+class OnnxSentenceEncoder:
+    """Sentence embeddings from an ONNX transformer export, pooled like sentence-transformers"""
+
+    def __init__(self, model_name: str, quantize: bool = False, threads: int = 0,
+                 onnx_file: Optional[str] = None, max_seq_length: Optional[int] = None):
+        self.model_name = model_name
+        self.onnx_file = onnx_file or (quantized_onnx_file() if quantize else "onnx/model.onnx")
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(
+            model_file(model_name, self.onnx_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(model_file(model_name, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_seq_length or self._max_seq_length())
+        self.tokenizer.no_padding()
+        self.dimension = self.session.get_outputs()[0].shape[-1]
+
+    def _max_seq_length(self) -> int:
+        """Truncation length sentence-transformers uses for this model"""
+        for filename, key in (("sentence_bert_config.json", "max_seq_length"),
+                              ("tokenizer_config.json", "model_max_length")):
+            try:
+                with open(model_file(self.model_name, filename), encoding="utf-8") as f:
+                    length = json.load(f).get(key)
+            except Exception:
+                continue
+            if isinstance(length, int) and 0 < length <= 8192:
+                return length
+        return 256
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        length = max(len(e.ids) for e in encodings)
+        input_ids = np.zeros((len(texts), length), dtype=np.int64)
+        attention_mask = np.zeros((len(texts), length), dtype=np.int64)
+        for row, encoding in enumerate(encodings):
+            input_ids[row, :len(encoding.ids)] = encoding.ids
+            attention_mask[row, :len(encoding.ids)] = 1
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        token_embeddings = self.session.run(None, feeds)[0]
+        # Mean pooling over real tokens, then L2 normalization (the model's Pooling + Normalize modules)
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        # Batch texts of similar length together so little time is spent on padding
+        order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            embeddings[batch] = self._embed_batch([texts[i] for i in batch])
+        return embeddings[0] if single else embeddings
+
+
+def load_embedding_model(model_name: str, backend: str = "torch", quantize: bool = False, threads: int = 0):
+    """Embedding model for the RAG pipeline on the chosen backend"""
+    backend = resolve_backend(backend)
+    if backend == "onnx":
+        return OnnxSentenceEncoder(model_name, quantize=quantize, threads=threads)
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+    if threads > 0:
+        torch.set_num_threads(threads)
+    if quantize:
+        log.warning("int8 quantization is only available on the onnx embedding backend")
+    return SentenceTransformer(model_name)
+
+
+def describe(model) -> str:
+    if isinstance(model, OnnxSentenceEncoder):
+        return f"onnx ({model.onnx_file})"
+    return "torch"
@@ -1,37 +1,119 @@
 # fastapi_app.py
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends, status
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 from fastapi.security import HTTPBearer
-from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, EmailStr
-from groq import Groq
 import os
-import PyPDF2
 import requests
 from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
-import re
+from catalog_processing import chunk_text, extract_business_insights, load_pdf_from_file
+from catalog_snapshot import load_snapshot
+from context_compression import ContextCompressor
+from conversation_store import ConversationStore
+from html_extraction import extract_text, resolve_engine
+from knowledge_base import KnowledgeBase, KnowledgeBaseStore
+from http_encoding import CompressionMiddleware, FastJSONResponse, json_dumps
+from llm_pool import LLMClientPool, build_endpoints, classify_error
+from metrics import REGISTRY, CONTENT_TYPE_LATEST, counter, gauge, histogram
+from scheduler import FairScheduler, SlotTimeout, parse_weights
+from static_assets import StaticAssetCache
+from structured_logging import configure_logging, new_request_id, request_id_var
 import time
 from pathlib import Path
-from pymongo import MongoClient
+from urllib.parse import urldefrag, urljoin, urlparse
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pymongo.errors import DuplicateKeyError
 from werkzeug.security import generate_password_hash, check_password_hash
 import secrets
 import jwt
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 import uuid
+import asyncio
+import hashlib
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import io
+import logging
+import wave
 from dotenv import load_dotenv
 
+# Optional audio decoding (needs ffmpeg) for splitting compressed recordings
+try:
+    from pydub import AudioSegment
+    from pydub.silence import detect_silence
+    pydub_available = True
+except ImportError:
+    pydub_available = False
+
 # RAG imports
-from sentence_transformers import SentenceTransformer
+from embedding_backends import describe as describe_embedding_backend, load_embedding_model
 import chromadb
 import numpy as np
 from chromadb.config import Settings
 
 # Load environment variables
 load_dotenv()
+
+# Structured logging: JSON lines written by a background thread
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # json | text
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")      # e.g. "wolfai.rag=DEBUG,wolfai.chat=WARNING"
+log_listener = configure_logging(LOG_LEVEL, LOG_FORMAT, LOG_LEVELS)
+
+app_log = logging.getLogger("wolfai.app")
+http_log = logging.getLogger("wolfai.http")
+auth_log = logging.getLogger("wolfai.auth")
+db_log = logging.getLogger("wolfai.db")
+rag_log = logging.getLogger("wolfai.rag")
+ingest_log = logging.getLogger("wolfai.ingest")
+chat_log = logging.getLogger("wolfai.chat")
+speech_log = logging.getLogger("wolfai.speech")
+
 # FastAPI app instance
-app = FastAPI(title="Wolf AI Chatbot API", version="1.0.0")
+# Responses are serialized with orjson when it is installed
+app = FastAPI(title="Wolf AI Chatbot API", version="1.0.0", default_response_class=FastJSONResponse)
+
+@app.middleware("http")
+async def server_timing(request, call_next):
+    """Opt-in per-stage timing breakdown for the expensive endpoints"""
+    if not SERVER_TIMING_ENABLED or request.url.path not in SERVER_TIMING_PATHS:
+        return await call_next(request)
+
+    debug = request.headers.get("X-Debug-Timing") == "1" or request.query_params.get("debug") == "timing"
+    timings = RequestTimings(debug=debug)
+    token = request_timings_var.set(timings)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        request_timings_var.reset(token)
+    response.headers["Server-Timing"] = timings.header(time.perf_counter() - start)
+    return response
+
+@app.middleware("http")
+async def request_context(request, call_next):
+    """Tag every log line with a request ID and log the request's duration"""
+    request_id = request.headers.get("X-Request-ID") or new_request_id()
+    token = request_id_var.set(request_id)
+    deadline_token = request_deadline_var.set(time.monotonic() + request_timeout(request))
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        if http_log.isEnabledFor(logging.INFO):
+            http_log.info("%s %s", request.method, request.url.path, extra={
+                "status": response.status_code,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1)
+            })
+        return response
+    finally:
+        request_deadline_var.reset(deadline_token)
+        request_id_var.reset(token)
 
 # CORS middleware
 app.add_middleware(
@@ -46,8 +128,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Request-ID"],
 )
 
+# Complete /api/ responses at least this large are gzip/brotli compressed when the
+# client accepts it (0 disables); streamed NDJSON responses are never buffered
+API_COMPRESSION_MIN_BYTES = int(os.getenv("API_COMPRESSION_MIN_BYTES", "1024"))
+API_GZIP_LEVEL = int(os.getenv("API_GZIP_LEVEL", "6"))
+API_BROTLI_QUALITY = int(os.getenv("API_BROTLI_QUALITY", "5"))
+if API_COMPRESSION_MIN_BYTES > 0:
+    app.add_middleware(CompressionMiddleware, path_prefix="/api/", minimum_size=API_COMPRESSION_MIN_BYTES,
+                       gzip_level=API_GZIP_LEVEL, brotli_quality=API_BROTLI_QUALITY)
+
 security = HTTPBearer()
 JWT_SECRET = os.getenv("JWT_SECRET", secrets.token_hex(32))  # use env if set, fallback to random
 JWT_ALGORITHM = "HS256"
@@ -55,99 +147,681 @@ JWT_EXPIRATION_HOURS = 24
 
 # MongoDB Configuration
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
-client_mongo = MongoClient(MONGO_URI)
-db = client_mongo.wolfai_chatbot
-users_collection = db.users
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "5"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "10000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000"))
+
+# Password hashing is deliberately slow, so it runs on a small dedicated pool
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
 
 # Groq Configuration
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_CHAT_MODEL = os.getenv("GROQ_CHAT_MODEL", "llama-3.1-8b-instant").strip()
 GROQ_WHISPER_MODEL = os.getenv("GROQ_WHISPER_MODEL", "whisper-large-v3-turbo").strip()
 
-# Initialize Groq client
-client = Groq(api_key=GROQ_API_KEY)
-
-# Global variables (same as Flask)
-knowledge_sources = {
-    'pdf': {'content': '', 'filename': '', 'loaded': False},
-    'website': {'content': '', 'url': '', 'loaded': False}
+# Async LLM traffic goes through a pool of endpoints: one per key in GROQ_API_KEYS
+# (default: GROQ_API_KEY) plus optional "kind|base_url|api_key" entries separated by
+# ';' in LLM_EXTRA_ENDPOINTS, where kind is groq or openai (OpenAI-compatible servers)
+GROQ_API_KEYS = [k.strip() for k in os.getenv("GROQ_API_KEYS", GROQ_API_KEY or "").split(",") if k.strip()]
+LLM_EXTRA_ENDPOINTS = os.getenv("LLM_EXTRA_ENDPOINTS", "")
+LLM_CIRCUIT_FAILURES = int(os.getenv("LLM_CIRCUIT_FAILURES", "5"))  # consecutive failures that open the circuit
+LLM_CIRCUIT_OPEN_SECONDS = float(os.getenv("LLM_CIRCUIT_OPEN_SECONDS", "30"))  # wait before probing again
+LLM_PROBE_INTERVAL_SECONDS = float(os.getenv("LLM_PROBE_INTERVAL_SECONDS", "5"))
+
+# Model routing: questions are routed to simple / standard / complex by
+# analyze_question_complexity, and each route lists its models in fallback order,
+# e.g. "simple=llama-3.1-8b-instant;complex=llama-3.3-70b-versatile,llama-3.1-8b-instant".
+# Routes that are not listed use GROQ_CHAT_MODEL.
+GROQ_MODEL_ROUTES = os.getenv("GROQ_MODEL_ROUTES", "")
+GROQ_MODEL_TIMEOUT_SECONDS = float(os.getenv("GROQ_MODEL_TIMEOUT_SECONDS", "30"))  # slower counts as a failure
+GROQ_MODEL_COOLDOWN_SECONDS = float(os.getenv("GROQ_MODEL_COOLDOWN_SECONDS", "20"))  # skip a rate-limited or slow model
+ROUTE_SIMPLE_MAX_SCORE = int(os.getenv("ROUTE_SIMPLE_MAX_SCORE", "2"))
+
+# Speech-to-text configuration
+STT_CHUNK_SECONDS = int(os.getenv("STT_CHUNK_SECONDS", "60"))  # recordings longer than this are split
+STT_MAX_PARALLEL = int(os.getenv("STT_MAX_PARALLEL", "4"))
+STT_PROMPT = "This is a customer service conversation about products and sales."
+
+# Conversation memory: once a session's stored history passes the trigger, older
+# turns are folded into a running summary in the background (0 disables summarization)
+CONVERSATION_SUMMARY_TRIGGER_TOKENS = int(os.getenv("CONVERSATION_SUMMARY_TRIGGER_TOKENS", "1500"))
+CONVERSATION_HISTORY_TOKENS = int(os.getenv("CONVERSATION_HISTORY_TOKENS", "1200"))  # verbatim history per prompt
+CONVERSATION_KEEP_MESSAGES = int(os.getenv("CONVERSATION_KEEP_MESSAGES", "4"))  # never summarized
+CONVERSATION_SUMMARY_MAX_TOKENS = int(os.getenv("CONVERSATION_SUMMARY_MAX_TOKENS", "300"))
+CONVERSATION_MAX_MESSAGES = 40  # safety cap if summarization keeps failing
+GROQ_SUMMARY_MODEL = os.getenv("GROQ_SUMMARY_MODEL", GROQ_CHAT_MODEL).strip()
+
+# HTML extraction engine: auto | lxml | stream | bs4 (original BeautifulSoup path)
+HTML_EXTRACTOR = resolve_engine(os.getenv("HTML_EXTRACTOR", "auto"))
+
+# Batch chat (/api/chat/batch) limits
+BATCH_CHAT_MAX_QUESTIONS = int(os.getenv("BATCH_CHAT_MAX_QUESTIONS", "500"))
+BATCH_CHAT_CONCURRENCY = int(os.getenv("BATCH_CHAT_CONCURRENCY", "4"))
+BATCH_CHAT_MAX_CONCURRENCY = int(os.getenv("BATCH_CHAT_MAX_CONCURRENCY", "16"))
+# Batch deadlines: each question gets BATCH_CHAT_ITEM_SECONDS once it starts, and the whole
+# batch its rounds of `concurrency` questions times that, at most BATCH_CHAT_MAX_SECONDS
+BATCH_CHAT_ITEM_SECONDS = float(os.getenv("BATCH_CHAT_ITEM_SECONDS", "30"))
+BATCH_CHAT_MAX_SECONDS = float(os.getenv("BATCH_CHAT_MAX_SECONDS", "900"))
+
+# Website refresh configuration (0 disables the scheduled refresh)
+WEBSITE_REFRESH_INTERVAL_MINUTES = int(os.getenv("WEBSITE_REFRESH_INTERVAL_MINUTES", "0"))
+# Pages tracked per website: the loaded page plus same-site pages it links to (1 = that page only)
+WEBSITE_MAX_PAGES = int(os.getenv("WEBSITE_MAX_PAGES", "10"))
+WEBSITE_REQUEST_HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+                   'AppleWebKit/537.36 (KHTML, like Gecko) '
+                   'Chrome/124.0.0.0 Safari/537.36')
 }
-conversations = {}
+
+# ================================
+# Metrics (served from /metrics in Prometheus text format)
+# ================================
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+STAGE_LATENCY = histogram(
+    "wolfai_stage_duration_seconds",
+    "Latency of request pipeline stages",
+    ["stage"]
+)
+LLM_LATENCY = histogram(
+    "wolfai_llm_duration_seconds",
+    "Groq chat completion latency (first_token is only measured for streamed answers)",
+    ["phase"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+)
+LLM_REQUESTS = counter("wolfai_llm_requests_total", "Groq chat completions by outcome", ["outcome"])
+LLM_RETRIES = counter("wolfai_llm_retries_total", "Groq chat retries after transient errors")
+LLM_ROUTE_LATENCY = histogram(
+    "wolfai_llm_route_duration_seconds",
+    "Successful Groq chat completion latency per route and model",
+    ["route", "model"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+)
+LLM_TOKENS = counter("wolfai_llm_tokens_total", "Tokens reported by Groq per route and model", ["route", "model", "kind"])
+LLM_ENDPOINT_REQUESTS = counter(
+    "wolfai_llm_endpoint_requests_total",
+    "LLM calls per pooled endpoint by outcome",
+    ["endpoint", "outcome"]
+)
+LLM_FALLBACKS = counter(
+    "wolfai_llm_fallbacks_total",
+    "Chat requests cascaded away from a model",
+    ["route", "model", "reason"]
+)
+INGESTED_CHUNKS = counter("wolfai_ingested_chunks_total", "Chunks embedded into the vector store", ["source"])
+INGESTION_LATENCY = histogram(
+    "wolfai_ingestion_duration_seconds",
+    "Time to embed and index a document",
+    ["source"],
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+)
+INGESTION_THROUGHPUT = gauge(
+    "wolfai_ingestion_chunks_per_second",
+    "Embedding throughput of the most recent ingestion",
+    ["source"]
+)
+MONGO_QUERY_LATENCY = histogram("wolfai_mongo_query_duration_seconds", "MongoDB command latency")
+MONGO_POOL_WAIT = histogram("wolfai_mongo_pool_wait_seconds", "Time spent waiting for a MongoDB connection")
+CONVERSATION_SUMMARIES = counter(
+    "wolfai_conversation_summaries_total",
+    "Background conversation summarizations by outcome",
+    ["outcome"]
+)
+PROMPT_HISTORY_TOKENS = histogram(
+    "wolfai_prompt_history_tokens",
+    "Estimated tokens of conversation memory (summary plus recent turns) sent per chat turn",
+    buckets=(50, 100, 250, 500, 750, 1000, 1500, 2000, 4000, 8000)
+)
+PROMPT_TOKENS = histogram(
+    "wolfai_prompt_tokens",
+    "Estimated prompt tokens per chat turn, before and after retrieved context compression",
+    ["stage"],
+    buckets=(250, 500, 1000, 1500, 2000, 3000, 4000, 6000, 8000, 16000)
+)
+
+# ================================
+# Per-request timing breakdown (Server-Timing header)
+# ================================
+
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() == "true"
+SERVER_TIMING_PATHS = {"/api/chat", "/api/load_pdf", "/api/load_website", "/api/speech-to-text"}
+
+class RequestTimings:
+    """Stage durations collected while one request is handled"""
+
+    def __init__(self, debug: bool = False):
+        self.debug = debug
+        self.stages: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def header(self, total: float) -> str:
+        parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.stages.items()]
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+    def as_dict(self) -> dict:
+        return {stage: round(seconds * 1000, 1) for stage, seconds in self.stages.items()}
+
+request_timings_var: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Feed a stage duration to the latency histogram and, if opted in, the current request's breakdown"""
+    STAGE_LATENCY.observe(seconds, stage=stage)
+    timings = request_timings_var.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+@contextmanager
+def time_stage(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+def with_timing_debug(payload: dict) -> dict:
+    """Add the stage breakdown to a JSON body when the client asked for it"""
+    timings = request_timings_var.get()
+    if timings is not None and timings.debug:
+        payload["debug"] = {"timings_ms": timings.as_dict()}
+    return payload
+
+# ================================
+# Request deadlines and client disconnects
+# ================================
+
+# Chat work is abandoned once the caller can no longer use the answer: the default
+# matches the frontend's 30 s axios timeout, and clients may send X-Request-Timeout
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "30"))
+REQUEST_DEADLINE_MAX_SECONDS = float(os.getenv("REQUEST_DEADLINE_MAX_SECONDS", "120"))
+
+BATCH_CHAT_ITEMS = counter("wolfai_batch_chat_items_total", "Questions answered through /api/chat/batch", ["outcome"])
+REQUESTS_ABANDONED = counter(
+    "wolfai_requests_abandoned_total",
+    "Chat requests abandoned before an answer was produced",
+    ["reason"]
+)
+
+request_deadline_var: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+class DeadlineExceeded(Exception):
+    """The request's deadline passed before its answer was ready"""
+
+class ClientDisconnected(Exception):
+    """The HTTP client went away while its answer was being produced"""
+
+def request_timeout(request) -> float:
+    try:
+        seconds = float(request.headers.get("X-Request-Timeout", REQUEST_DEADLINE_SECONDS))
+    except ValueError:
+        seconds = REQUEST_DEADLINE_SECONDS
+    return min(max(seconds, 0.1), REQUEST_DEADLINE_MAX_SECONDS)
+
+def deadline_remaining() -> Optional[float]:
+    deadline = request_deadline_var.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+def check_deadline(stage: str) -> None:
+    remaining = deadline_remaining()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded before {stage}")
+
+def llm_timeout() -> float:
+    """Per-call Groq timeout, never running past the request's deadline"""
+    remaining = deadline_remaining()
+    return GROQ_MODEL_TIMEOUT_SECONDS if remaining is None else max(0.1, min(GROQ_MODEL_TIMEOUT_SECONDS, remaining))
+
+class DisconnectWatcher:
+    """ASGI middleware that flags client disconnects while a handler is still working
+
+    Once the request body has been read, a background receive() waits for
+    http.disconnect and sets scope["wolfai.disconnected"]. (Request.is_disconnected()
+    cannot see the disconnect through the @app.middleware("http") layers.)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        disconnected = asyncio.Event()
+        scope["wolfai.disconnected"] = disconnected
+        body_read = False
+        watcher = None
+
+        async def watch():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        async def receive_until_disconnect():
+            nonlocal body_read, watcher
+            if body_read:
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                disconnected.set()
+            elif not message.get("more_body", False):
+                body_read = True
+                watcher = asyncio.create_task(watch())
+            return message
+
+        try:
+            await self.app(scope, receive_until_disconnect, send)
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+
+app.add_middleware(DisconnectWatcher)
+
+async def run_until_deadline(request: Request, coro):
+    """Await coro, cancelling it (and any upstream calls) at the deadline or when the client disconnects"""
+    task = asyncio.ensure_future(coro)
+    disconnected = request.scope.get("wolfai.disconnected")
+    waiter = asyncio.ensure_future(disconnected.wait()) if disconnected is not None else None
+    try:
+        done, _ = await asyncio.wait({t for t in (task, waiter) if t is not None},
+                                     timeout=deadline_remaining(), return_when=asyncio.FIRST_COMPLETED)
+        if task in done:
+            try:
+                return task.result()
+            except DeadlineExceeded:
+                # Raised inside the pipeline, e.g. rather than starting a retry
+                REQUESTS_ABANDONED.inc(reason="deadline")
+                raise
+        if waiter is not None and waiter in done:
+            REQUESTS_ABANDONED.inc(reason="disconnect")
+            raise ClientDisconnected(request.url.path)
+        REQUESTS_ABANDONED.inc(reason="deadline")
+        raise DeadlineExceeded(f"Deadline exceeded on {request.url.path}")
+    finally:
+        if waiter is not None:
+            waiter.cancel()
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+            chat_log.info("Cancelled %s before completion", request.url.path)
+
+def record_ingestion(source: str, chunk_count: int, seconds: float) -> None:
+    record_stage("embedding", seconds)
+    INGESTED_CHUNKS.inc(chunk_count, source=source)
+    INGESTION_LATENCY.observe(seconds, source=source)
+    if seconds > 0:
+        INGESTION_THROUGHPUT.set(chunk_count / seconds, source=source)
+
+# Global variables (same as Flask); knowledge sources live in per-tenant knowledge bases.
+# Chat sessions (recent messages, rolling summary of older turns and question analytics)
+# are keyed by (tenant, session_id), so tenants never share a "default" session. Workers of
+# a cluster share them through CONVERSATION_DIR (cluster.py sets CONVERSATION_WRITE_THROUGH),
+# so consecutive turns of a session may land on any worker
+CONVERSATION_DIR = Path(os.getenv("CONVERSATION_DIR", "conversations"))
+CONVERSATION_WRITE_THROUGH = os.getenv("CONVERSATION_WRITE_THROUGH", "false").lower() == "true"
+conversation_store = ConversationStore(CONVERSATION_DIR if CONVERSATION_WRITE_THROUGH else None)
+
+# In-flight summarization task per session (per process)
+summary_tasks = {}
+
 server_start_time = datetime.now()
 
-# Enhanced conversation storage with business context
-conversation_analytics = {}
+# ================================
+# Fair-share scheduling of embedding, vector search and LLM calls
+# ================================
+
+# Each stage has a fixed number of slots shared by all users. Waiting work is queued per
+# (user, priority) and served in weighted fair order, so one user's big upload or burst of
+# chats can't starve everyone else, and interactive chat outranks ingestion and batch jobs
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+SCHEDULER_SLOTS = parse_weights(os.getenv("SCHEDULER_SLOTS", ""), {"embedding": 2, "vector_search": 4, "llm": 8})
+SCHEDULER_WEIGHTS = parse_weights(os.getenv("SCHEDULER_WEIGHTS", ""), {"interactive": 8, "ingestion": 2, "batch": 1})
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))  # document chunks embedded per scheduled slot
+
+SCHEDULER_WAIT = histogram(
+    "wolfai_scheduler_wait_seconds",
+    "Time spent queued for a pipeline stage slot",
+    ["stage", "priority"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+scheduler = FairScheduler(
+    {stage: int(slots) for stage, slots in SCHEDULER_SLOTS.items()} if SCHEDULER_ENABLED else {},
+    SCHEDULER_WEIGHTS,
+    on_wait=lambda stage, priority, seconds: SCHEDULER_WAIT.observe(seconds, stage=stage, priority=priority)
+)
+gauge("wolfai_scheduler_queue_depth", "Work queued for a pipeline stage slot", ["stage", "priority"],
+      callback=scheduler.queue_depths)
+gauge("wolfai_scheduler_slots_in_use", "Busy slots per pipeline stage", ["stage"], callback=scheduler.slots_in_use)
+
+# Whose work is running: (user_id, priority). Endpoints set it from the JWT; it follows
+# the request into worker threads and tasks. Scheduled background work runs as "system".
+work_owner_var: ContextVar[Tuple[str, str]] = ContextVar("work_owner", default=("system", "ingestion"))
+
+def schedule_as(current_user: dict, priority: str) -> None:
+    work_owner_var.set((str(current_user.get("user_id") or "anonymous"), priority))
+
+@contextmanager
+def stage_slot(stage: str, cost: float = 1.0):
+    """Hold a slot of a scheduled stage from a worker thread, giving up at the request deadline"""
+    user, priority = work_owner_var.get()
+    # Uploads and website loads have never been bound by the chat deadline
+    timeout = None if priority == "ingestion" else deadline_remaining()
+    try:
+        with scheduler.slot_blocking(stage, user, priority, cost, timeout=timeout) as slot:
+            yield slot
+    except SlotTimeout:
+        raise DeadlineExceeded(f"Deadline exceeded waiting for {stage}")
+
+def llm_slot():
+    """async with llm_slot(): one LLM call for the current work owner"""
+    user, priority = work_owner_var.get()
+    return scheduler.slot("llm", user, priority)
+
+# ================================
+# User data access (async MongoDB)
+# ================================
+
+class LatencyStats:
+    """Running latency summary with a bounded window of recent samples for percentiles"""
+
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self.lock:
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+            self.samples.append(seconds)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            ordered = sorted(self.samples)
+            count, total, peak = self.count, self.total, self.max
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0
+        return {
+            "count": count,
+            "avg_ms": round(total / count * 1000, 2) if count else 0.0,
+            "p95_ms": round(p95 * 1000, 2),
+            "max_ms": round(peak * 1000, 2)
+        }
+
+class MongoMetricsListener(monitoring.CommandListener, monitoring.ConnectionPoolListener):
+    """Collects query latency and connection-pool wait time from driver events"""
+
+    def __init__(self):
+        self.query_latency = LatencyStats()
+        self.pool_wait = LatencyStats()
+        self.failed_queries = 0
+        self.pool_checkout_failures = 0
+        self._checkout_started = threading.local()
+
+    # Command events
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.query_latency.observe(event.duration_micros / 1_000_000)
+        MONGO_QUERY_LATENCY.observe(event.duration_micros / 1_000_000)
+
+    def failed(self, event):
+        self.failed_queries += 1
+        self.query_latency.observe(event.duration_micros / 1_000_000)
+        MONGO_QUERY_LATENCY.observe(event.duration_micros / 1_000_000)
+
+    # Connection pool events (checkout start and finish happen on the same thread)
+    def connection_check_out_started(self, event):
+        self._checkout_started.value = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        started = getattr(self._checkout_started, "value", None)
+        if started is not None:
+            waited = time.perf_counter() - started
+            self.pool_wait.observe(waited)
+            MONGO_POOL_WAIT.observe(waited)
+
+    def connection_check_out_failed(self, event):
+        self.pool_checkout_failures += 1
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_created(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): pass
+    def connection_checked_in(self, event): pass
+
+    def snapshot(self) -> dict:
+        return {
+            "query_latency": self.query_latency.snapshot(),
+            "pool_wait": self.pool_wait.snapshot(),
+            "failed_queries": self.failed_queries,
+            "pool_checkout_failures": self.pool_checkout_failures
+        }
+
+mongo_metrics = MongoMetricsListener()
+client_mongo = AsyncIOMotorClient(
+    MONGO_URI,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+    waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    event_listeners=[mongo_metrics]
+)
+db = client_mongo.wolfai_chatbot
+users_collection = db.users
+# Signup relies on the unique email index to reject duplicates, so until it has been
+# created (e.g. Mongo was down at startup) every insert tries to create it first
+email_index_ready = False
+
+async def ensure_email_index() -> None:
+    global email_index_ready
+    if email_index_ready:
+        return
+    try:
+        await users_collection.create_index("email", unique=True, name="email_unique")
+    except DuplicateKeyError as e:
+        # Not a signup conflict: existing users already share an email
+        raise RuntimeError(f"Cannot build the unique email index: {e}") from e
+    email_index_ready = True
+
+async def connect_user_store() -> None:
+    """Open the pool, verify the server answers and make sure the email index exists"""
+    start = time.perf_counter()
+    await client_mongo.admin.command("ping")
+    await ensure_email_index()
+    db_log.info("MongoDB connected", extra={
+        "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+        "pool_min": MONGO_MIN_POOL_SIZE,
+        "pool_max": MONGO_MAX_POOL_SIZE
+    })
+
+async def find_user_by_email(email: str) -> Optional[dict]:
+    return await users_collection.find_one({"email": email})
+
+async def insert_user(user: dict) -> str:
+    """Insert a user and return its id; raises DuplicateKeyError if the email is taken"""
+    await ensure_email_index()
+    result = await users_collection.insert_one(user)
+    return str(result.inserted_id)
 
 # ================================
 # RAG (Retrieval-Augmented Generation) System
 # ================================
 
+# Embedding backend: torch (sentence-transformers) or onnx (onnxruntime, optionally int8);
+# compare them with benchmarks/bench_embedding_backends.py before switching
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_QUANTIZE = os.getenv("EMBEDDING_QUANTIZE", "none").lower() == "int8"
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))  # 0 = runtime default
+
 # Initialize RAG components
 try:
     # Initialize embedding model (lightweight model for faster processing)
-    embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+    embedding_model = load_embedding_model(EMBEDDING_MODEL, EMBEDDING_BACKEND, EMBEDDING_QUANTIZE, EMBEDDING_THREADS)
     
-    # Initialize ChromaDB client
+    # Initialize ChromaDB client (collections are created per tenant knowledge base)
     chroma_client = chromadb.Client()
-    
-    # Create or get collections for each source type
-    pdf_collection = None
-    website_collection = None
     rag_initialized = True
-    print("[OK] RAG system initialized successfully")
+    rag_log.info("RAG system initialized", extra={"embedding_backend": describe_embedding_backend(embedding_model)})
 except Exception as e:
-    print(f"[WARN] RAG initialization failed: {e}")
+    rag_log.warning("RAG initialization failed: %s", e)
     embedding_model = None
     chroma_client = None
-    pdf_collection = None
-    website_collection = None
     rag_initialized = False
 
-def chunk_text(text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
-    """Split text into overlapping chunks for better RAG performance"""
-    if not text or len(text.strip()) == 0:
-        return []
-    
-    words = text.split()
-    chunks = []
-    
-    for i in range(0, len(words), chunk_size - overlap):
-        chunk = ' '.join(words[i:i + chunk_size])
-        if len(chunk.strip()) > 50:  # Only include substantial chunks
-            chunks.append(chunk.strip())
-    
-    return chunks
+# Each tenant (JWT tenant_id, else user_id) has its own sources and collections. Idle
+# tenants are written to KNOWLEDGE_BASE_DIR, least recently used first, once the resident
+# ones pass the memory budget, and are reloaded on their next request.
+KNOWLEDGE_BASE_DIR = Path(os.getenv("KNOWLEDGE_BASE_DIR", "knowledge_bases"))
+KNOWLEDGE_BASE_MEMORY_MB = float(os.getenv("KNOWLEDGE_BASE_MEMORY_MB", "512"))
+# Set by cluster.py when several workers share KNOWLEDGE_BASE_DIR
+KNOWLEDGE_BASE_WRITE_THROUGH = os.getenv("KNOWLEDGE_BASE_WRITE_THROUGH", "false").lower() == "true"
+# Catalog snapshot built by ingest_catalog.py (a snapshot root or one version): mapped
+# read-only at startup, it is every knowledge base's starting point
+KNOWLEDGE_BASE_SNAPSHOT = os.getenv("KNOWLEDGE_BASE_SNAPSHOT", "")
+
+catalog_snapshot = None
+if KNOWLEDGE_BASE_SNAPSHOT:
+    try:
+        catalog_snapshot = load_snapshot(
+            KNOWLEDGE_BASE_SNAPSHOT,
+            embedding_model=EMBEDDING_MODEL,
+            embedding_dim=embedding_model.get_sentence_embedding_dimension() if rag_initialized else None
+        )
+        rag_log.info("Catalog snapshot mapped", extra=catalog_snapshot.describe())
+    except Exception as e:
+        rag_log.error("Could not load catalog snapshot %s: %s", KNOWLEDGE_BASE_SNAPSHOT, e)
+
+# Extractive compression of retrieved chunks: only the sentences closest to the question
+# (with their product headings) are kept, up to CONTEXT_COMPRESSION_TOKENS per source
+CONTEXT_COMPRESSION_ENABLED = os.getenv("CONTEXT_COMPRESSION_ENABLED", "false").lower() == "true"
+CONTEXT_COMPRESSION_TOKENS = int(os.getenv("CONTEXT_COMPRESSION_TOKENS", "400"))
+CONTEXT_COMPRESSION_CACHE_SIZE = int(os.getenv("CONTEXT_COMPRESSION_CACHE_SIZE", "20000"))
+
+def embed_sentences(sentences: List[str]) -> np.ndarray:
+    with stage_slot("embedding", cost=len(sentences)):
+        return embedding_model.encode(sentences, batch_size=64)
+
+context_compressor = ContextCompressor(
+    embed_sentences, lambda text: estimate_tokens(text), cache_size=CONTEXT_COMPRESSION_CACHE_SIZE
+)
+
+KNOWLEDGE_BASE_ACCESSES = counter(
+    "wolfai_knowledge_base_accesses_total",
+    "Knowledge base lookups: hit (resident), load (from disk), reload (changed by another worker), new or error",
+    ["outcome"]
+)
+KNOWLEDGE_BASE_LOAD_LATENCY = histogram(
+    "wolfai_knowledge_base_load_seconds",
+    "Time to make a tenant's knowledge base resident",
+    ["outcome"],
+    buckets=(0.0001, 0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+KNOWLEDGE_BASE_EVICTIONS = counter("wolfai_knowledge_base_evictions_total", "Idle knowledge bases written to disk and dropped")
+
+def record_knowledge_base_access(outcome: str, seconds: float) -> None:
+    KNOWLEDGE_BASE_ACCESSES.inc(outcome=outcome)
+    KNOWLEDGE_BASE_LOAD_LATENCY.observe(seconds, outcome=outcome)
+
+knowledge_bases = KnowledgeBaseStore(
+    KNOWLEDGE_BASE_DIR,
+    int(KNOWLEDGE_BASE_MEMORY_MB * 1024 * 1024),
+    chroma_client,
+    embedding_model.get_sentence_embedding_dimension() if rag_initialized else 384,
+    on_access=record_knowledge_base_access,
+    on_evict=KNOWLEDGE_BASE_EVICTIONS.inc,
+    write_through=KNOWLEDGE_BASE_WRITE_THROUGH,
+    catalog_snapshot=catalog_snapshot
+)
+gauge("wolfai_knowledge_bases_resident", "Tenant knowledge bases held in memory",
+      callback=lambda: len(knowledge_bases.resident()))
+gauge("wolfai_knowledge_base_resident_bytes", "Estimated memory of resident knowledge bases",
+      callback=knowledge_bases.resident_bytes)
+gauge("wolfai_knowledge_base_budget_bytes", "Memory budget for resident knowledge bases",
+      callback=lambda: knowledge_bases.budget_bytes)
+
+# The knowledge base of the current request (set by the tenant_knowledge_base dependency);
+# scripts, benchmarks and anything outside a request use a shared default one
+current_kb_var: ContextVar[Optional[KnowledgeBase]] = ContextVar("knowledge_base", default=None)
+default_kb = knowledge_bases.acquire("__default__")
+
+def active_kb() -> KnowledgeBase:
+    kb = current_kb_var.get()
+    return kb if kb is not None else default_kb
+
+def conversation_key(session_id: str) -> Tuple[str, str]:
+    """Key of a chat session within the current tenant"""
+    return (active_kb().tenant, session_id)
+
+def vector_index_sizes() -> dict:
+    """Chunk counts per source across resident knowledge bases, read at scrape time"""
+    sizes = {}
+    for kb in knowledge_bases.resident():
+        for name in kb.collections:
+            with kb.reading(name) as collection:
+                if collection is not None:
+                    sizes[name] = sizes.get(name, 0) + collection.count()
+    return sizes
+
+gauge("wolfai_sessions", "Chat sessions held in memory", callback=lambda: len(conversation_store))
+gauge("wolfai_index_chunks", "Chunks in each vector index", ["collection"], callback=vector_index_sizes)
+
+def embed_chunks(chunks: List[str]) -> List[List[float]]:
+    """Embed document chunks a batch at a time, each batch taking its turn on the embedding stage"""
+    embeddings = []
+    for start in range(0, len(chunks), EMBED_BATCH_SIZE):
+        batch = chunks[start:start + EMBED_BATCH_SIZE]
+        with stage_slot("embedding", cost=len(batch)):
+            embeddings.extend(embedding_model.encode(batch).tolist())
+    return embeddings
 
 def create_pdf_vector_store(pdf_content: str, filename: str) -> bool:
     """Create vector store for PDF content using RAG"""
-    global pdf_collection
+    kb = active_kb()
     
     if not rag_initialized or not pdf_content:
         return False
     
+    pdf_collection = None
     try:
-        # Clear existing collection if it exists
-        try:
-            chroma_client.delete_collection(name="pdf_documents")
-        except Exception:
-            pass
-        
-        # Create new collection
-        pdf_collection = chroma_client.create_collection(
-            name="pdf_documents",
-            metadata={"description": "PDF document embeddings for RAG retrieval"}
-        )
-        
         # Split PDF content into chunks
         chunks = chunk_text(pdf_content, chunk_size=400, overlap=50)
         
         if not chunks:
+            kb.swap_collection("pdf", None)
             return False
         
-        print(f"[PDF] Processing PDF: {filename} -> {len(chunks)} chunks")
+        # Build the new index next to the live one, which keeps serving queries until the swap
+        pdf_collection = kb.shadow_collection(
+            "pdf",
+            metadata={"description": "PDF document embeddings for RAG retrieval"}
+        )
+        
+        ingest_log.info("Processing PDF %s", filename, extra={"chunks": len(chunks)})
         
         # Generate embeddings for chunks
-        embeddings = embedding_model.encode(chunks).tolist()
+        ingest_start = time.perf_counter()
+        embeddings = embed_chunks(chunks)
         
         # Create IDs for chunks
         ids = [f"chunk_{i}_{filename}" for i in range(len(chunks))]
@@ -167,29 +841,68 @@ def create_pdf_vector_store(pdf_content: str, filename: str) -> bool:
             metadatas=metadatas,
             ids=ids
         )
+        record_ingestion("pdf", len(chunks), time.perf_counter() - ingest_start)
+        kb.swap_collection("pdf", pdf_collection)
+        kb.mark_changed()
         
-        print(f"[OK] PDF vector store created: {len(chunks)} chunks indexed")
+        ingest_log.info("PDF vector store created", extra={"chunks": len(chunks)})
         return True
         
-    except Exception as e:
-        print(f"[ERROR] Error creating PDF vector store: {e}")
+    except Exception:
+        ingest_log.exception("Error creating PDF vector store")
+        # The previous index stays live; only the partial one is dropped
+        kb.discard_collection(pdf_collection)
         return False
 
+# Query vectors computed ahead of time for a whole batch of questions (see /api/chat/batch)
+precomputed_query_embeddings_var: ContextVar[Optional[dict]] = ContextVar("precomputed_query_embeddings", default=None)
+
+def embed_queries(queries: List[str]) -> dict:
+    """Embed many questions in one model call: query -> vector"""
+    if not rag_initialized or not queries:
+        return {}
+    unique = list(dict.fromkeys(queries))
+    vectors = {}
+    for start in range(0, len(unique), 64):
+        batch = unique[start:start + 64]
+        with stage_slot("embedding", cost=len(batch)):
+            vectors.update(zip(batch, embedding_model.encode(batch, batch_size=64).tolist()))
+    return vectors
+
+def embed_query(query: str) -> List[List[float]]:
+    """One-row query embedding, taken from the current batch or turn when it was already computed"""
+    precomputed = precomputed_query_embeddings_var.get()
+    if precomputed and query in precomputed:
+        return [precomputed[query]]
+    with stage_slot("embedding"), time_stage("query_embedding"):
+        vectors = embedding_model.encode([query]).tolist()
+    if precomputed is not None:
+        # Later stages of the same turn (context compression) reuse it
+        precomputed[query] = vectors[0]
+    return vectors
+
 def rag_search_pdf(query: str, n_results: int = 3) -> List[str]:
     """Perform semantic search on PDF content using RAG"""
-    if not rag_initialized or not pdf_collection:
+    kb = active_kb()
+    if not rag_initialized:
         return []
     
     try:
-        # Generate embedding for the query
-        query_embedding = embedding_model.encode([query]).tolist()
-        
-        # Search for similar content
-        results = pdf_collection.query(
-            query_embeddings=query_embedding,
-            n_results=n_results,
-            include=["documents", "metadatas", "distances"]
-        )
+        # The lease keeps this index alive if a re-ingestion swaps it out meanwhile
+        with kb.reading("pdf") as pdf_collection:
+            if pdf_collection is None:
+                return []
+
+            # Generate embedding for the query
+            query_embedding = embed_query(query)
+            
+            # Search for similar content
+            with stage_slot("vector_search"), time_stage("vector_search"):
+                results = pdf_collection.query(
+                    query_embeddings=query_embedding,
+                    n_results=n_results,
+                    include=["documents", "metadatas", "distances"]
+                )
         
         # Return the most relevant chunks
         if results['documents'] and len(results['documents']) > 0:
@@ -197,51 +910,56 @@ def rag_search_pdf(query: str, n_results: int = 3) -> List[str]:
         
         return []
         
+    except DeadlineExceeded:
+        raise
     except Exception as e:
-        print(f"[ERROR] RAG search error: {e}")
+        rag_log.error("PDF RAG search error: %s", e)
         return []
 
-def create_website_vector_store(website_content: str, url: str) -> bool:
-    """Create vector store for website content using RAG"""
-    global website_collection
+def website_page_chunks(url: str, content: str):
+    """Chunks of one website page with their ids and metadata, keyed by the page URL"""
+    chunks = chunk_text(content, chunk_size=400, overlap=50)
+    ids = [f"chunk_{i}_{url.replace('/', '_').replace(':', '')}" for i in range(len(chunks))]
+    metadatas = [{
+        "source": "website",
+        "url": url,
+        "chunk_index": i,
+        "content_preview": chunk[:100] + "..." if len(chunk) > 100 else chunk
+    } for i, chunk in enumerate(chunks)]
+    return chunks, ids, metadatas
+
+def create_website_vector_store(pages: Dict[str, str]) -> bool:
+    """Create vector store for website content using RAG, one set of chunks per page URL"""
+    kb = active_kb()
     
-    if not rag_initialized or not website_content:
+    if not rag_initialized or not any(pages.values()):
         return False
     
+    website_collection = None
     try:
-        # Clear existing website collection if it exists
-        try:
-            chroma_client.delete_collection(name="website_documents")
-        except Exception:
-            pass
-        
-        # Create new collection for website content
-        website_collection = chroma_client.create_collection(
-            name="website_documents",
-            metadata={"description": "Website content embeddings for RAG retrieval"}
-        )
-        
-        # Split website content into chunks
-        chunks = chunk_text(website_content, chunk_size=400, overlap=50)
+        # Split each page into chunks tagged with its URL, so a refresh can replace one page
+        chunks, ids, metadatas = [], [], []
+        for url, content in pages.items():
+            page_chunks, page_ids, page_metadatas = website_page_chunks(url, content)
+            chunks += page_chunks
+            ids += page_ids
+            metadatas += page_metadatas
         
         if not chunks:
+            kb.swap_collection("website", None)
             return False
         
-        print(f"[WEBSITE] Processing website: {url} -> {len(chunks)} chunks")
-        
-        # Generate embeddings for chunks
-        embeddings = embedding_model.encode(chunks).tolist()
+        # Build the new index next to the live one, which keeps serving queries until the swap
+        website_collection = kb.shadow_collection(
+            "website",
+            metadata={"description": "Website content embeddings for RAG retrieval"}
+        )
         
-        # Create IDs for chunks
-        ids = [f"chunk_{i}_{url.replace('/', '_').replace(':', '')}" for i in range(len(chunks))]
+        ingest_log.info("Processing website %s", next(iter(pages)), extra={"pages": len(pages), "chunks": len(chunks)})
         
-        # Prepare metadata for chunks
-        metadatas = [{
-            "source": "website",
-            "url": url,
-            "chunk_index": i,
-            "content_preview": chunk[:100] + "..." if len(chunk) > 100 else chunk
-        } for i, chunk in enumerate(chunks)]
+        # Generate embeddings for chunks
+        ingest_start = time.perf_counter()
+        embeddings = embed_chunks(chunks)
         
         # Add to vector store
         website_collection.add(
@@ -250,29 +968,169 @@ def create_website_vector_store(website_content: str, url: str) -> bool:
             metadatas=metadatas,
             ids=ids
         )
+        record_ingestion("website", len(chunks), time.perf_counter() - ingest_start)
+        kb.swap_collection("website", website_collection)
+        kb.mark_changed()
         
-        print(f"[OK] Website vector store created: {len(chunks)} chunks indexed")
+        ingest_log.info("Website vector store created", extra={"chunks": len(chunks)})
         return True
         
-    except Exception as e:
-        print(f"[ERROR] Error creating website vector store: {e}")
+    except Exception:
+        ingest_log.exception("Error creating website vector store")
+        kb.discard_collection(website_collection)
         return False
 
+def update_website_page_vectors(url: str, content: str) -> int:
+    """Replace the indexed chunks of a single website page, leaving other pages untouched"""
+    kb = active_kb()
+
+    if not rag_initialized:
+        return 0
+
+    chunks, ids, metadatas = website_page_chunks(url, content)
+    if not chunks:
+        remove_website_page_vectors(url)
+        return 0
+
+    ingest_start = time.perf_counter()
+    embeddings = embed_chunks(chunks)
+
+    # The lock keeps a full reload from swapping the index out mid-update, and the lease
+    # keeps the collection from being dropped while it is written to
+    with kb.lock, kb.reading("website") as website_collection:
+        if website_collection is None:
+            website_collection = kb.shadow_collection(
+                "website",
+                metadata={"description": "Website content embeddings for RAG retrieval"}
+            )
+            website_collection.add(embeddings=embeddings, documents=chunks, metadatas=metadatas, ids=ids)
+            kb.swap_collection("website", website_collection)
+        else:
+            # Overwrite the page's chunks in place, then drop any left over from a longer old
+            # version, so queries never find the page missing from the index
+            stale = set(website_collection.get(where={"url": url}, include=[])["ids"]) - set(ids)
+            website_collection.upsert(
+                embeddings=embeddings,
+                documents=chunks,
+                metadatas=metadatas,
+                ids=ids
+            )
+            if stale:
+                website_collection.delete(ids=list(stale))
+    record_ingestion("website", len(chunks), time.perf_counter() - ingest_start)
+    kb.mark_changed()
+    return len(chunks)
+
+def remove_website_page_vectors(url: str) -> None:
+    """Drop the indexed chunks of a page that no longer exists"""
+    with active_kb().reading("website") as website_collection:
+        if rag_initialized and website_collection:
+            website_collection.delete(where={"url": url})
+
+def record_website_page(url: str, page: dict) -> None:
+    """Remember a page's validators and content hash for the next refresh"""
+    active_kb().website_pages[url] = {
+        'etag': page.get('etag'),
+        'last_modified': page.get('last_modified'),
+        'content_hash': hashlib.sha256(page['content'].encode('utf-8')).hexdigest(),
+        'content': page['content'],
+        'fetched_at': datetime.now().isoformat()
+    }
+
+def refresh_website_pages(urls: Optional[List[str]] = None) -> dict:
+    """Re-check tracked pages with conditional GETs and re-embed only what changed"""
+    summary = {'unchanged': [], 'updated': [], 'removed': [], 'failed': []}
+    kb = active_kb()
+    website_pages = kb.website_pages
+
+    with kb.lock:
+        targets = urls or list(website_pages.keys())
+
+        for url in targets:
+            previous = website_pages.get(url, {})
+            try:
+                page = scrape_website_page(url, previous.get('etag'), previous.get('last_modified'))
+            except Exception as e:
+                ingest_log.warning("Website refresh failed for %s: %s", url, e)
+                summary['failed'].append(url)
+                continue
+
+            if page['status'] == 304:
+                summary['unchanged'].append(url)
+                continue
+
+            if page['content'] is None:
+                # Page disappeared (404/410) - drop it from the index
+                remove_website_page_vectors(url)
+                website_pages.pop(url, None)
+                summary['removed'].append(url)
+                continue
+
+            content_hash = hashlib.sha256(page['content'].encode('utf-8')).hexdigest()
+            if content_hash == previous.get('content_hash'):
+                # Server ignored the validators but content is identical - keep the embeddings
+                website_pages[url].update({'etag': page['etag'], 'last_modified': page['last_modified']})
+                summary['unchanged'].append(url)
+                continue
+
+            try:
+                update_website_page_vectors(url, page['content'])
+            except Exception:
+                ingest_log.exception("Error re-indexing website page %s", url)
+                summary['failed'].append(url)
+                continue
+
+            record_website_page(url, page)
+            summary['updated'].append(url)
+
+        if summary['updated'] or summary['removed']:
+            contents = [p['content'] for p in website_pages.values()]
+            kb.sources['website']['content'] = "\n\n".join(contents)
+            kb.sources['website']['loaded'] = bool(contents)
+            kb.mark_changed()
+
+    ingest_log.info("Website refresh complete", extra={k: len(v) for k, v in summary.items()})
+    return summary
+
+async def website_refresh_loop():
+    """Periodically refresh the tracked website pages of resident knowledge bases in a worker thread"""
+    while True:
+        await asyncio.sleep(WEBSITE_REFRESH_INTERVAL_MINUTES * 60)
+        for kb in knowledge_bases.resident():
+            if not kb.website_pages:
+                continue
+            kb = await asyncio.to_thread(knowledge_bases.acquire, kb.tenant)
+            token = current_kb_var.set(kb)
+            try:
+                await asyncio.to_thread(refresh_website_pages)
+            except Exception as e:
+                ingest_log.warning("Scheduled website refresh failed: %s", e)
+            finally:
+                current_kb_var.reset(token)
+                await asyncio.to_thread(knowledge_bases.release, kb)
+
 def rag_search_website(query: str, n_results: int = 3) -> List[str]:
     """Perform semantic search on website content using RAG"""
-    if not rag_initialized or not website_collection:
+    kb = active_kb()
+    if not rag_initialized:
         return []
     
     try:
-        # Generate embedding for the query
-        query_embedding = embedding_model.encode([query]).tolist()
-        
-        # Search for similar content
-        results = website_collection.query(
-            query_embeddings=query_embedding,
-            n_results=n_results,
-            include=["documents", "metadatas", "distances"]
-        )
+        # The lease keeps this index alive if a re-ingestion swaps it out meanwhile
+        with kb.reading("website") as website_collection:
+            if website_collection is None:
+                return []
+
+            # Generate embedding for the query
+            query_embedding = embed_query(query)
+            
+            # Search for similar content
+            with stage_slot("vector_search"), time_stage("vector_search"):
+                results = website_collection.query(
+                    query_embeddings=query_embedding,
+                    n_results=n_results,
+                    include=["documents", "metadatas", "distances"]
+                )
         
         # Return the most relevant chunks
         if results['documents'] and len(results['documents']) > 0:
@@ -280,8 +1138,10 @@ def rag_search_website(query: str, n_results: int = 3) -> List[str]:
         
         return []
         
+    except DeadlineExceeded:
+        raise
     except Exception as e:
-        print(f"[ERROR] Website RAG search error: {e}")
+        rag_log.error("Website RAG search error: %s", e)
         return []
 
 def analyze_question_complexity(user_message: str) -> dict:
@@ -320,6 +1180,110 @@ def analyze_question_complexity(user_message: str) -> dict:
         'requires_analysis': any(t in question_types for t in ['strategic', 'analytical', 'predictive'])
     }
 
+# ================================
+# Speech-to-text
+# ================================
+
+def _split_with_pydub(content: bytes, filename: str) -> List[Tuple[str, bytes]]:
+    """Decode any format and cut it at pauses close to each window boundary"""
+    audio = AudioSegment.from_file(io.BytesIO(content), format=Path(filename).suffix.lstrip('.') or None)
+    window_ms = STT_CHUNK_SECONDS * 1000
+    if len(audio) <= window_ms * 1.2:
+        return [(filename, content)]
+
+    audio = audio.set_channels(1).set_frame_rate(16000)
+    search_ms = min(10000, window_ms // 3)
+    pieces = []
+    start = 0
+    while start < len(audio):
+        end = min(start + window_ms, len(audio))
+        if end < len(audio):
+            # Prefer the last pause in the tail of the window so words are not cut in half
+            tail = audio[end - search_ms:end]
+            silences = detect_silence(tail, min_silence_len=300, silence_thresh=audio.dBFS - 16)
+            if silences:
+                silence_start, silence_end = silences[-1]
+                end = end - search_ms + (silence_start + silence_end) // 2
+
+        buffer = io.BytesIO()
+        audio[start:end].export(buffer, format="wav")
+        pieces.append((f"part_{len(pieces)}.wav", buffer.getvalue()))
+        start = end
+
+    return pieces
+
+def _split_wav(content: bytes, filename: str) -> List[Tuple[str, bytes]]:
+    """Split PCM WAV with the stdlib, nudging cuts to the quietest 20ms frame"""
+    with wave.open(io.BytesIO(content), 'rb') as wav:
+        params = wav.getparams()
+        frames = wav.readframes(params.nframes)
+
+    rate = params.framerate
+    if params.nframes <= STT_CHUNK_SECONDS * rate * 1.2:
+        return [(filename, content)]
+
+    frame_bytes = params.sampwidth * params.nchannels
+    window = STT_CHUNK_SECONDS * rate
+    search = min(5 * rate, window // 3)
+    step = rate // 50  # 20ms
+
+    samples = None
+    if params.sampwidth == 2:
+        samples = np.frombuffer(frames, dtype=np.int16).reshape(-1, params.nchannels).mean(axis=1)
+
+    pieces = []
+    start = 0
+    while start < params.nframes:
+        end = min(start + window, params.nframes)
+        if end < params.nframes and samples is not None:
+            tail = samples[end - search:end]
+            usable = len(tail) // step * step
+            energy = np.sqrt((tail[:usable].reshape(-1, step) ** 2).mean(axis=1))
+            end = end - search + int(energy.argmin()) * step + step // 2
+
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as out:
+            out.setparams(params)
+            out.writeframes(frames[start * frame_bytes:end * frame_bytes])
+        pieces.append((f"part_{len(pieces)}.wav", buffer.getvalue()))
+        start = end
+
+    return pieces
+
+def split_audio_for_transcription(content: bytes, filename: str) -> List[Tuple[str, bytes]]:
+    """Split long recordings into pieces of about STT_CHUNK_SECONDS; short ones pass through untouched"""
+    try:
+        if pydub_available:
+            return _split_with_pydub(content, filename)
+        if filename.lower().endswith('.wav'):
+            return _split_wav(content, filename)
+    except Exception as e:
+        speech_log.warning("Could not split audio, transcribing as one piece: %s", e)
+    return [(filename, content)]
+
+async def transcribe_audio_piece(filename: str, content: bytes, semaphore: asyncio.Semaphore) -> str:
+    async with semaphore, llm_slot():
+        transcription = await llm_pool.request(
+            "audio.transcriptions",
+            GROQ_WHISPER_MODEL,
+            file=(filename, content),
+            prompt=STT_PROMPT,
+            response_format="json",
+            language="en"
+        )
+    return (getattr(transcription, "text", "") or "").strip()
+
+async def transcribe_audio(content: bytes, filename: str) -> str:
+    """Transcribe an in-memory recording, fanning long ones out over concurrent Whisper calls"""
+    with time_stage("audio_split"):
+        pieces = await asyncio.to_thread(split_audio_for_transcription, content, filename)
+    semaphore = asyncio.Semaphore(STT_MAX_PARALLEL)
+    with time_stage("transcription"):
+        texts = await asyncio.gather(*(transcribe_audio_piece(name, data, semaphore) for name, data in pieces))
+    if len(pieces) > 1:
+        speech_log.info("Transcribed audio pieces concurrently", extra={"pieces": len(pieces)})
+    return " ".join(text for text in texts if text)
+
 # Pydantic models
 class LoginRequest(BaseModel):
     email: EmailStr
@@ -337,6 +1301,14 @@ class ChatRequest(BaseModel):
 class WebsiteRequest(BaseModel):
     url: str
 
+class WebsiteRefreshRequest(BaseModel):
+    urls: Optional[List[str]] = None
+
+class BatchChatRequest(BaseModel):
+    questions: List[str]
+    session_ids: Optional[List[str]] = None  # omitted: every question is answered in a fresh session
+    concurrency: Optional[int] = None
+
 class ClearSourceRequest(BaseModel):
     source_type: str = "all"
 
@@ -362,81 +1334,122 @@ def verify_jwt_token(token: str) -> dict:
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+async def hash_password(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, generate_password_hash, password)
+
+async def verify_password(password_hash: str, password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, check_password_hash, password_hash, password)
+
 # Authentication dependency
 async def get_current_user(token: str = Depends(security)):
     return verify_jwt_token(token.credentials)
 
-# Helper functions (same as Flask)
-def load_pdf_from_file(file_path: str) -> str:
+async def tenant_knowledge_base(current_user: dict = Depends(get_current_user)):
+    """Pin the caller's tenant knowledge base for the request (and any response stream)"""
+    tenant = str(current_user.get("tenant_id") or current_user.get("user_id") or "anonymous")
+    kb = await asyncio.to_thread(knowledge_bases.acquire, tenant)
+    current_kb_var.set(kb)
     try:
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                page_text = page.extract_text() or ""
-                text += page_text + "\n"
-        return text.strip()
-    except Exception as pdf_error:
-        # If PDF parsing fails, try to read as text file (for testing)
-        try:
-            with open(file_path, 'r', encoding='utf-8') as text_file:
-                content = text_file.read()
-                if len(content.strip()) > 0:
-                    print(f"[WARN] PDF parsing failed, treating as text file: {str(pdf_error)[:100]}")
-                    return content.strip()
-        except Exception as text_error:
-            print(f"[ERROR] Both PDF and text parsing failed: {str(text_error)}")
-        
-        return f"Error reading PDF: {str(pdf_error)}"
+        yield kb
+    finally:
+        await asyncio.to_thread(knowledge_bases.release, kb)
+
+def scrape_website_page(url: str, etag: Optional[str] = None, last_modified: Optional[str] = None,
+                        links: Optional[List[str]] = None) -> dict:
+    """Fetch a page, sending conditional headers when validators are known (and collecting its links)"""
+    headers = dict(WEBSITE_REQUEST_HEADERS)
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+
+    # Stream the body so extraction can stop reading once it has enough text
+    with requests.get(url, headers=headers, timeout=15, stream=True) as response:
+        if response.status_code == 304:
+            return {'status': 304, 'content': None, 'etag': etag, 'last_modified': last_modified}
+        if response.status_code in (404, 410):
+            return {'status': response.status_code, 'content': None, 'etag': None, 'last_modified': None}
 
-def scrape_website_content(url: str) -> str:
-    try:
-        headers = {
-            'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-                           'AppleWebKit/537.36 (KHTML, like Gecko) '
-                           'Chrome/124.0.0.0 Safari/537.36')
-        }
-        response = requests.get(url, headers=headers, timeout=15)
         response.raise_for_status()
+        charset = response.encoding if 'charset' in response.headers.get('Content-Type', '').lower() else None
+        content = extract_text(
+            response.iter_content(chunk_size=65536),
+            engine=HTML_EXTRACTOR,
+            max_chars=15000,
+            encoding=charset,
+            links=links
+        )
 
-        soup = BeautifulSoup(response.content, 'html.parser')
+        return {
+            'status': response.status_code,
+            'content': content,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+
+# Linked files that are not pages worth indexing as website text
+NON_PAGE_EXTENSIONS = ('.pdf', '.zip', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.mp4', '.mp3', '.css', '.js', '.xml')
+
+def site_links(base_url: str, hrefs: List[str], limit: int) -> List[str]:
+    """Distinct same-site page URLs among a page's links, in document order"""
+    if limit <= 0:
+        return []
+    host = urlparse(base_url).netloc.lower()
+    found = []
+    for href in hrefs:
+        link = urldefrag(urljoin(base_url, href.strip())).url
+        parsed = urlparse(link)
+        if (parsed.scheme not in ('http', 'https') or parsed.netloc.lower() != host
+                or parsed.path.lower().endswith(NON_PAGE_EXTENSIONS)):
+            continue
+        if link != base_url and link not in found:
+            found.append(link)
+            if len(found) >= limit:
+                break
+    return found
 
-        for tag in soup(["script", "style", "noscript"]):
-            tag.decompose()
+def scrape_linked_page(url: str) -> Optional[dict]:
+    """A linked page of the website, or None when it cannot be fetched or has no text"""
+    try:
+        page = scrape_website_page(url)
+    except Exception as e:
+        ingest_log.info("Skipping linked page %s: %s", url, e)
+        return None
+    return page if page['content'] else None
 
-        text = soup.get_text(separator=" ")
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text[:15000]
+def scrape_website_content(url: str) -> str:
+    try:
+        page = scrape_website_page(url)
+        if page['content'] is None:
+            return f"Error scraping website: HTTP {page['status']}"
+        return page['content']
     except Exception as e:
         return f"Error scraping website: {str(e)}"
 
-def extract_business_insights(content: str) -> dict:
-    """Extract key business insights from loaded content"""
-    insights = {
-        'products': [],
-        'pricing': [],
-        'features': [],
-        'benefits': [],
-        'target_markets': [],
-        'competitive_advantages': [],
-        'company_info': []
-    }
-    
-    # Business-focused keyword extraction
-    business_patterns = {
-        'products': r'(?i)(product|service|solution|offering|item)s?\s+[^\n]{0,100}',
-        'pricing': r'(?i)(price|cost|fee|rate|\$|USD|pricing|budget|investment)\s+[^\n]{0,100}',
-        'features': r'(?i)(feature|capability|function|includes|offers|provides)\s+[^\n]{0,100}',
-        'benefits': r'(?i)(benefit|advantage|value|helps|improves|increases|reduces)\s+[^\n]{0,100}',
-        'target_markets': r'(?i)(market|customer|client|industry|sector|audience)\s+[^\n]{0,100}',
-        'competitive_advantages': r'(?i)(unique|competitive|advantage|better|superior|leading)\s+[^\n]{0,100}'
-    }
-    
-    for category, pattern in business_patterns.items():
-        matches = re.findall(pattern, content)
-        insights[category] = matches[:10]  # Limit to top 10 matches per category
-    
-    return insights
+# Tokens of retrieved chunks and of what was kept of them, for the current chat turn
+context_tokens_var: ContextVar[Optional[Dict[str, int]]] = ContextVar("context_tokens", default=None)
+
+def compress_context(user_message: str, chunks: List[str], source_content: str) -> str:
+    """Retrieved chunks for the prompt, reduced to the sentences closest to the question when enabled"""
+    joined = "\n\n".join(chunks)
+    content = joined
+    if CONTEXT_COMPRESSION_ENABLED:
+        try:
+            with time_stage("context_compression"):
+                # The question was embedded for the vector search just before
+                query_vector = (precomputed_query_embeddings_var.get() or {}).get(user_message)
+                content = context_compressor.compress(
+                    user_message, chunks, CONTEXT_COMPRESSION_TOKENS, source_content, query_vector=query_vector
+                )
+        except Exception as e:
+            rag_log.warning("Context compression failed, using the full chunks: %s", e)
+    counts = context_tokens_var.get()
+    if counts is not None:
+        counts["retrieved"] += estimate_tokens(joined)
+        counts["sent"] += estimate_tokens(content)
+    return content
 
 def find_relevant_content(user_message: str, max_context_tokens: int = 1500):
     """Enhanced content finder with RAG and business intelligence"""
@@ -445,42 +1458,43 @@ def find_relevant_content(user_message: str, max_context_tokens: int = 1500):
     loaded_sources = []
     business_insights = {}
     retrieval_method = "none"
+    kb = active_kb()
 
-    for source_type, source_data in knowledge_sources.items():
+    for source_type, source_data in kb.sources.items():
         if source_data['loaded'] and source_data['content']:
             loaded_sources.append(source_type)
             
-            if source_type == 'pdf' and rag_initialized and pdf_collection:
+            if source_type == 'pdf' and rag_initialized and kb.has_index('pdf'):
                 # Use RAG for PDF content - semantic search
-                print(f"[RAG] Using RAG semantic search for PDF content...")
+                rag_log.debug("Using RAG semantic search for PDF content")
                 rag_chunks = rag_search_pdf(user_message, n_results=5)
                 
                 if rag_chunks:
-                    # Join the most relevant chunks
-                    rag_content = "\n\n".join(rag_chunks[:3])  # Top 3 most relevant chunks
+                    # Join the top 3 most relevant chunks (compressed to the sentences that matter when enabled)
+                    rag_content = compress_context(user_message, rag_chunks[:3], source_data['content'])
                     combined_content += f"\n\n=== {source_type.upper()} SOURCE (RAG) ===\n{rag_content}"
                     retrieval_method = "rag"
-                    print(f"[OK] PDF RAG found {len(rag_chunks)} relevant chunks")
+                    rag_log.debug("PDF RAG found %d relevant chunks", len(rag_chunks))
                 else:
                     # Fallback to traditional keyword search for PDF
-                    print("[FALLBACK] PDF RAG found no results, falling back to keyword search...")
+                    rag_log.info("PDF RAG found no results, falling back to keyword search")
                     content = source_data['content']
                     combined_content += f"\n\n=== {source_type.upper()} SOURCE (KEYWORD) ===\n{content}"
                     retrieval_method = "keyword_fallback"
-            elif source_type == 'website' and rag_initialized and website_collection:
+            elif source_type == 'website' and rag_initialized and kb.has_index('website'):
                 # Use RAG for website content - semantic search
-                print(f"[RAG] Using RAG semantic search for website content...")
+                rag_log.debug("Using RAG semantic search for website content")
                 rag_chunks = rag_search_website(user_message, n_results=5)
                 
                 if rag_chunks:
-                    # Join the most relevant chunks
-                    rag_content = "\n\n".join(rag_chunks[:3])  # Top 3 most relevant chunks
+                    # Join the top 3 most relevant chunks (compressed to the sentences that matter when enabled)
+                    rag_content = compress_context(user_message, rag_chunks[:3], source_data['content'])
                     combined_content += f"\n\n=== {source_type.upper()} SOURCE (RAG) ===\n{rag_content}"
                     retrieval_method = "rag"
-                    print(f"[OK] Website RAG found {len(rag_chunks)} relevant chunks")
+                    rag_log.debug("Website RAG found %d relevant chunks", len(rag_chunks))
                 else:
                     # Fallback to traditional keyword search for website
-                    print("[FALLBACK] Website RAG found no results, falling back to keyword search...")
+                    rag_log.info("Website RAG found no results, falling back to keyword search")
                     content = source_data['content']
                     combined_content += f"\n\n=== {source_type.upper()} SOURCE (KEYWORD) ===\n{content}"
                     retrieval_method = "keyword_fallback" if retrieval_method == "none" else retrieval_method
@@ -490,8 +1504,10 @@ def find_relevant_content(user_message: str, max_context_tokens: int = 1500):
                 combined_content += f"\n\n=== {source_type.upper()} SOURCE ===\n{content}"
                 retrieval_method = "keyword" if retrieval_method == "none" else retrieval_method
             
-            # Extract business insights (works for both RAG and traditional content)
-            insights = extract_business_insights(source_data['content'])
+            # Extract business insights (works for both RAG and traditional content); cached
+            # per content, and precomputed for snapshot sources
+            with time_stage("insight_extraction"):
+                insights = kb.business_insights(source_type, extract_business_insights)
             business_insights[source_type] = insights
 
     if not combined_content:
@@ -574,11 +1590,543 @@ def filter_technical_content(response: str) -> str:
         )
     return response
 
+# ================================
+# LLM endpoint pool and model routing
+# ================================
+
+llm_pool = LLMClientPool(
+    build_endpoints(GROQ_API_KEYS, LLM_EXTRA_ENDPOINTS, LLM_CIRCUIT_FAILURES, LLM_CIRCUIT_OPEN_SECONDS),
+    rate_limit_seconds=GROQ_MODEL_COOLDOWN_SECONDS,
+    on_result=lambda endpoint, outcome, seconds: LLM_ENDPOINT_REQUESTS.inc(endpoint=endpoint, outcome=outcome)
+)
+app_log.info("LLM pool: %s", ", ".join(e.name for e in llm_pool.endpoints))
+
+def llm_endpoint_stats(field: str) -> dict:
+    return {name: stats[field] for name, stats in llm_pool.snapshot().items() if stats[field] is not None}
+
+gauge("wolfai_llm_endpoint_circuit_open", "1 while an endpoint's circuit breaker is open", ["endpoint"],
+      callback=lambda: {name: int(s["circuit"] == "open") for name, s in llm_pool.snapshot().items()})
+gauge("wolfai_llm_endpoint_in_flight", "LLM calls in flight per endpoint", ["endpoint"],
+      callback=lambda: llm_endpoint_stats("in_flight"))
+gauge("wolfai_llm_endpoint_latency_ms", "Smoothed LLM response latency per endpoint", ["endpoint"],
+      callback=lambda: llm_endpoint_stats("latency_ms"))
+
+CHAT_ROUTES = ("simple", "standard", "complex")
+
+def parse_model_routes(spec: str) -> Dict[str, List[str]]:
+    """Parse "route=model[,fallback...];..." into per-route model cascades"""
+    routes = {route: [GROQ_CHAT_MODEL] for route in CHAT_ROUTES}
+    for item in spec.split(";"):
+        if "=" not in item:
+            continue
+        route, models = item.split("=", 1)
+        route = route.strip()
+        models = [m.strip() for m in models.split(",") if m.strip()]
+        if route not in routes:
+            app_log.warning("Ignoring unknown model route %r", route)
+        elif models:
+            routes[route] = list(dict.fromkeys(models))
+    return routes
+
+MODEL_ROUTES = parse_model_routes(GROQ_MODEL_ROUTES)
+
+# model -> time.monotonic() until which it is skipped after timing out
+# (rate limits are tracked per endpoint by the pool)
+model_cooldowns = {}
+
+def route_for_question(question_analysis: dict) -> str:
+    if question_analysis['is_complex'] or question_analysis['requires_analysis']:
+        return "complex"
+    if question_analysis['complexity_score'] <= ROUTE_SIMPLE_MAX_SCORE:
+        return "simple"
+    return "standard"
+
+def models_for_route(route: str) -> List[str]:
+    """The route's cascade with models that are cooling down or out of quota everywhere moved to the back"""
+    now = time.monotonic()
+    models = MODEL_ROUTES[route]
+    ready = [m for m in models if model_cooldowns.get(m, 0) <= now and llm_pool.available(m)]
+    return ready + [m for m in models if m not in ready]
+
+def cool_down_model(model: str) -> None:
+    model_cooldowns[model] = time.monotonic() + GROQ_MODEL_COOLDOWN_SECONDS
+
+def record_token_usage(route: str, model: str, usage) -> None:
+    if usage is None:
+        return
+    LLM_TOKENS.inc(usage.prompt_tokens or 0, route=route, model=model, kind="prompt")
+    LLM_TOKENS.inc(usage.completion_tokens or 0, route=route, model=model, kind="completion")
+
+# ================================
+# Chat pipeline (shared by /api/chat and /api/voice-chat)
+# ================================
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)"""
+    return len(text) // 4 + 1
+
+def select_history(key: Tuple[str, str]) -> list:
+    """Most recent messages that fit the history token budget, oldest first"""
+    selected = []
+    budget = CONVERSATION_HISTORY_TOKENS
+    session = conversation_store.get(key)
+    for message in reversed(session["messages"] if session else []):
+        tokens = estimate_tokens(message["content"])
+        if tokens > budget:
+            if not selected:
+                # A single oversized answer still gives the model its immediate context
+                selected.append({"role": message["role"], "content": message["content"][:budget * 4] + " ..."})
+            break
+        selected.append(message)
+        budget -= tokens
+    return list(reversed(selected))
+
+async def summarize_conversation(key: Tuple[str, str]) -> None:
+    """Fold everything but the most recent messages into the session's running summary"""
+    # Runs in its own task, so this only demotes the background summary, not the chat
+    work_owner_var.set((work_owner_var.get()[0], "batch"))
+    start = time.perf_counter()
+    session = conversation_store.get(key)
+    older = session["messages"][:-CONVERSATION_KEEP_MESSAGES] if session else []
+    try:
+        if not older:
+            return
+        previous = session["summary"]
+        transcript = "\n".join(f"{m['role'].upper()}: {m['content']}" for m in older)
+        async with llm_slot():
+            completion = await llm_pool.request(
+                "chat.completions",
+                GROQ_SUMMARY_MODEL,
+                messages=[
+                    {"role": "system", "content": (
+                        "You maintain the memory of a sales consultation. Merge the existing summary and the new "
+                        "turns into one concise summary. Keep the customer's company, needs, budget, products and "
+                        "prices discussed, objections and agreed next steps. Use terse bullet points."
+                    )},
+                    {"role": "user", "content": f"EXISTING SUMMARY:\n{previous or '(none)'}\n\nNEW TURNS:\n{transcript}"}
+                ],
+                temperature=0.2,
+                max_tokens=CONVERSATION_SUMMARY_MAX_TOKENS
+            )
+        summary = completion.choices[0].message.content.strip()
+
+        # Drop exactly the summarized turns - newer ones may have arrived meanwhile,
+        # and the session may have been cleared (here or by another worker)
+        session = conversation_store.get(key)
+        if session is None or session["messages"][:len(older)] != older:
+            CONVERSATION_SUMMARIES.inc(outcome="discarded")
+            return
+        session["summary"] = summary
+        session["messages"] = session["messages"][len(older):]
+        conversation_store.save(key)
+        CONVERSATION_SUMMARIES.inc(outcome="success")
+        chat_log.info("Summarized conversation", extra={
+            "session_id": key[1],
+            "messages": len(older),
+            "summary_tokens": estimate_tokens(summary),
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1)
+        })
+    except Exception as e:
+        CONVERSATION_SUMMARIES.inc(outcome="error")
+        chat_log.warning("Conversation summarization failed for %s: %s", key[1], e)
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage="summarization")
+        summary_tasks.pop(key, None)
+
+def prepare_chat_turn(user_message: str, session_id: str) -> dict:
+    """Run retrieval, question analysis and prompt assembly for one chat turn"""
+    # Check if we have loaded content, but don't require it
+    has_loaded_content = any(source['loaded'] for source in active_kb().sources.values())
+    key = conversation_key(session_id)
+
+    context_tokens = {"retrieved": 0, "sent": 0}
+    token = context_tokens_var.set(context_tokens)
+    # Batches precompute their questions' embeddings; a single turn keeps the one it computes
+    embeddings_token = (precomputed_query_embeddings_var.set({})
+                        if precomputed_query_embeddings_var.get() is None else None)
+    try:
+        with time_stage("retrieval"):
+            relevant_content, source_type, loaded_sources, business_insights = find_relevant_content(user_message)
+    finally:
+        context_tokens_var.reset(token)
+        if embeddings_token is not None:
+            precomputed_query_embeddings_var.reset(embeddings_token)
+    check_deadline("prompt_assembly")
+    assembly_start = time.perf_counter()
+    
+    # Analyze question complexity
+    question_analysis = analyze_question_complexity(user_message)
+
+    session = conversation_store.session(key)
+    analytics = session['analytics']
+    
+    # Store question analytics (saved with the turn)
+    analytics['questions'].append({
+        'message': user_message,
+        'analysis': question_analysis,
+        'timestamp': datetime.now().isoformat()
+    })
+    analytics['complexity_scores'].append(question_analysis['complexity_score'])
+
+    # Enhanced system message with business intelligence capabilities
+    insights_summary = ""
+    if business_insights:
+        insights_summary = "\n\nBUSINESS INSIGHTS EXTRACTED:\n"
+        for source, insights in business_insights.items():
+            for category, items in insights.items():
+                if items:
+                    insights_summary += f"- {category.title()}: {', '.join(items[:3])}\n"
+    
+    # Simplified conversation context to save tokens
+    context_summary = ""
+    if len(analytics['questions']) > 1:
+        recent_types = []
+        for q in analytics['questions'][-2:]:
+            recent_types.extend(q['analysis']['question_types'])
+        if recent_types:
+            unique_types = list(set(recent_types))[:3]  # Convert set to list before slicing
+            context_summary = f"\nPrevious topics: {', '.join(unique_types)}\n"
+
+    conversation_summary = session['summary']
+    if conversation_summary:
+        context_summary += f"\n🗂️ EARLIER IN THIS CONVERSATION:\n{conversation_summary}\n"
+
+    # Determine response approach based on question complexity and available content
+    is_complex_question = question_analysis['is_complex']
+    question_types = question_analysis['question_types']
+    
+    # Enhanced system prompt based on question complexity
+    if is_complex_question or question_analysis['requires_analysis']:
+        max_tokens = 2000  # Longer responses for complex questions
+        temperature = 0.8  # Higher creativity for analysis
+    else:
+        max_tokens = 800   # Standard responses for simple questions
+        temperature = 0.6  # Moderate creativity
+    route = route_for_question(question_analysis)
+
+    # Enhanced system message that adapts based on available content
+    content_context = ""
+    if has_loaded_content and relevant_content:
+        content_context = f"\n\n📈 SPECIFIC BUSINESS DATA AVAILABLE:\n{relevant_content}\n{insights_summary}"
+    else:
+        content_context = "\n\n📋 MODE: General Business Intelligence (No specific product data loaded)\n- Draw from extensive business knowledge and industry best practices\n- Provide strategic insights and analytical frameworks\n- Offer actionable business recommendations"
+
+    # Significantly reduced system prompt to fit within Groq token limits
+    system_message = {
+        "role": "system",
+        "content": f"""You are Wolf AI, an expert business consultant with MBA-level expertise.
+
+🎯 EXPERTISE: Strategic analysis, financial modeling, market intelligence, sales strategy, and operational excellence.
+
+📊 SESSION CONTEXT:
+- Question Complexity: {question_analysis['complexity_score']}/20
+- Categories: {', '.join(question_types) if question_types else 'General business'}
+- Analysis Level: {'Deep' if question_analysis['requires_analysis'] else 'Standard'}
+- Data: {'Specific business data available' if has_loaded_content else 'General business knowledge'}
+{context_summary}
+{content_context}
+
+🧠 FRAMEWORKS: Apply SWOT, Porter's Five Forces, ROI analysis, market segmentation, competitive analysis, and strategic planning as appropriate.
+
+💼 RESPONSE APPROACH:
+- Strategic questions: Multi-framework analysis with implementation roadmap
+- Financial questions: Detailed calculations with assumptions and scenarios
+- Market questions: Competitive analysis with positioning recommendations
+- Operational questions: Process optimization with efficiency metrics
+
+📋 STANDARDS:
+- Use clear structure with headings and bullet points
+- Provide actionable recommendations with next steps
+- Include quantitative analysis when possible
+- Maintain professional consultant-level quality
+- Focus on business value and ROI
+
+🔥 MANDATE: Always provide valuable business insights using proven frameworks and best practices. Never refuse to answer due to lack of specific data - leverage extensive business knowledge instead."""
+    }
+
+    history = select_history(key)
+    PROMPT_HISTORY_TOKENS.observe(
+        estimate_tokens(conversation_summary) + sum(estimate_tokens(m["content"]) for m in history)
+    )
+
+    recent_messages = [system_message]
+    recent_messages.extend(history)  # Token-budgeted history; older turns live in the summary
+    recent_messages.append({"role": "user", "content": user_message})
+    record_stage("prompt_assembly", time.perf_counter() - assembly_start)
+
+    prompt_tokens = sum(estimate_tokens(m["content"]) for m in recent_messages)
+    prompt_tokens = {
+        "before_compression": prompt_tokens + context_tokens["retrieved"] - context_tokens["sent"],
+        "after_compression": prompt_tokens
+    }
+    for stage, tokens in prompt_tokens.items():
+        PROMPT_TOKENS.observe(tokens, stage=stage)
+
+    return {
+        "messages": recent_messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "route": route,
+        "models": models_for_route(route),
+        "source_type": source_type,
+        "loaded_sources": loaded_sources,
+        "prompt_tokens": prompt_tokens
+    }
+
+def is_retryable_chat_error(error: str) -> bool:
+    return any(k in error.lower() for k in ["rate", "limit", "timeout", "temporarily", "overloaded"])
+
+async def generate_chat_response(turn: dict) -> str:
+    """Ask Groq for a completion along the route's model cascade, and fall back to a friendly message"""
+    route, models = turn["route"], turn["models"]
+    max_retries = max(3, len(models))
+    retry_delay = 2
+    last_error = None
+    generation_start = time.perf_counter()
+
+    filtered_response = None
+    for attempt in range(max_retries):
+        model = models[min(attempt, len(models) - 1)]
+        try:
+            check_deadline("llm")
+        except DeadlineExceeded:
+            record_stage("llm", time.perf_counter() - generation_start)
+            raise
+        try:
+            chat_log.debug("Chat attempt %d: sending request to Groq API (%s)", attempt + 1, model)
+            
+            # Queue for an LLM slot behind other users' work (not counted as LLM latency)
+            async with llm_slot():
+                # Adaptive parameters based on question complexity - using only supported Groq parameters
+                llm_start = time.perf_counter()
+                chat_completion = await llm_pool.request(
+                    "chat.completions",
+                    model,
+                    messages=turn["messages"],
+                    temperature=turn["temperature"],  # Use the dynamic temperature
+                    max_tokens=turn["max_tokens"],    # Use the dynamic max_tokens
+                    top_p=0.9,
+                    stream=False,  # Ensure we get complete responses
+                    timeout=llm_timeout()
+                )
+
+            assistant_response = chat_completion.choices[0].message.content
+            llm_seconds = time.perf_counter() - llm_start
+            LLM_LATENCY.observe(llm_seconds, phase="total")
+            LLM_ROUTE_LATENCY.observe(llm_seconds, route=route, model=model)
+            LLM_REQUESTS.inc(outcome="success")
+            record_token_usage(route, model, chat_completion.usage)
+            chat_log.info("Groq response received", extra={
+                "attempt": attempt + 1,
+                "route": route,
+                "model": model,
+                "chars": len(assistant_response),
+                "duration_ms": round(llm_seconds * 1000, 1)
+            })
+            
+            # Remove restrictive filtering - let the AI provide full business intelligence
+            filtered_response = assistant_response
+            turn["model"] = model
+            last_error = None
+            break
+
+        except Exception as api_error:
+            last_error = str(api_error)
+            chat_log.warning("Groq API error (attempt %d, %s): %s", attempt + 1, model, last_error)
+            LLM_REQUESTS.inc(outcome="error")
+
+            reason = classify_error(api_error)
+            if reason == "timeout" and deadline_remaining() is not None and deadline_remaining() <= 0.1:
+                # The call was cut short by the request's deadline, not by a slow model
+                record_stage("llm", time.perf_counter() - generation_start)
+                raise DeadlineExceeded("Deadline exceeded during llm") from api_error
+            if reason == "timeout":
+                cool_down_model(model)
+
+            # Cascade straight to the next model in the route, without waiting
+            next_model = models[min(attempt + 1, len(models) - 1)]
+            if attempt + 1 < max_retries and next_model != model:
+                LLM_FALLBACKS.inc(route=route, model=model, reason=reason)
+                chat_log.info("Falling back from %s to %s (%s)", model, next_model, reason)
+                continue
+
+            # Check for specific error types that warrant retry
+            if reason in ("rate_limit", "timeout", "unavailable") or is_retryable_chat_error(last_error):
+                LLM_RETRIES.inc()
+                delay = retry_delay * (attempt + 1)
+                remaining = deadline_remaining()
+                if remaining is not None and remaining <= delay:
+                    # The answer would arrive after the caller has given up
+                    record_stage("llm", time.perf_counter() - generation_start)
+                    raise DeadlineExceeded("Deadline would pass during retry backoff") from api_error
+                chat_log.info("Retrying in %d seconds", delay)
+                await asyncio.sleep(delay)
+                continue
+            else:
+                # For other errors, provide a helpful response
+                chat_log.error("Non-retryable Groq error: %s", last_error)
+                break
+
+    # The llm stage includes retries and backoff, which is what the caller waited for
+    record_stage("llm", time.perf_counter() - generation_start)
+    return filtered_response or chat_fallback_response(last_error)
+
+async def stream_chat_response(turn: dict):
+    """Yield answer deltas from Groq as they arrive; retries and fallbacks happen only before the first token"""
+    route, models = turn["route"], turn["models"]
+    max_retries = max(3, len(models))
+    retry_delay = 2
+    last_error = None
+
+    for attempt in range(max_retries):
+        model = models[min(attempt, len(models) - 1)]
+        emitted = False
+        check_deadline("llm")
+        try:
+            # The slot is held until the whole answer has streamed
+            async with llm_slot():
+                llm_start = time.perf_counter()
+                stream = await llm_pool.request(
+                    "chat.completions",
+                    model,
+                    messages=turn["messages"],
+                    temperature=turn["temperature"],
+                    max_tokens=turn["max_tokens"],
+                    top_p=0.9,
+                    stream=True,
+                    timeout=llm_timeout()
+                )
+                try:
+                    async for chunk in stream:
+                        # Stop generating once nobody will read the rest of the answer
+                        check_deadline("llm")
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            if not emitted:
+                                LLM_LATENCY.observe(time.perf_counter() - llm_start, phase="first_token")
+                                turn["model"] = model
+                            emitted = True
+                            yield delta
+                        # Groq reports usage on the final chunk
+                        record_token_usage(route, model, getattr(getattr(chunk, "x_groq", None), "usage", None))
+                finally:
+                    await stream.aclose()
+            llm_seconds = time.perf_counter() - llm_start
+            LLM_LATENCY.observe(llm_seconds, phase="total")
+            LLM_ROUTE_LATENCY.observe(llm_seconds, route=route, model=model)
+            LLM_REQUESTS.inc(outcome="success")
+            return
+
+        except DeadlineExceeded:
+            LLM_REQUESTS.inc(outcome="abandoned")
+            raise
+        except Exception as api_error:
+            last_error = str(api_error)
+            chat_log.warning("Groq streaming error (attempt %d, %s): %s", attempt + 1, model, last_error)
+            LLM_REQUESTS.inc(outcome="error")
+            if emitted:
+                # Part of the answer is already on the wire - end it there
+                return
+
+            reason = classify_error(api_error)
+            if reason == "timeout" and deadline_remaining() is not None and deadline_remaining() <= 0.1:
+                # The call was cut short by the request's deadline, not by a slow model
+                raise DeadlineExceeded("Deadline exceeded during llm") from api_error
+            if reason == "timeout":
+                cool_down_model(model)
+            next_model = models[min(attempt + 1, len(models) - 1)]
+            if attempt + 1 < max_retries and next_model != model:
+                LLM_FALLBACKS.inc(route=route, model=model, reason=reason)
+                continue
+            if reason not in ("rate_limit", "timeout", "unavailable") and not is_retryable_chat_error(last_error):
+                break
+            delay = retry_delay * (attempt + 1)
+            remaining = deadline_remaining()
+            if remaining is not None and remaining <= delay:
+                raise DeadlineExceeded("Deadline would pass during retry backoff") from api_error
+            LLM_RETRIES.inc()
+            await asyncio.sleep(delay)
+
+    yield chat_fallback_response(last_error)
+
+def chat_fallback_response(last_error: Optional[str]) -> str:
+    """Explain why no answer could be produced"""
+    if last_error:
+        # Provide a more helpful error message based on the actual error
+        if "api key" in last_error.lower():
+            filtered_response = "I'm having trouble with my API configuration. Please check that the Groq API key is valid and properly configured."
+        elif "model" in last_error.lower():
+            filtered_response = "I'm having trouble with the AI model configuration. Please check that the model name is correct."
+        elif "rate" in last_error.lower() or "limit" in last_error.lower():
+            filtered_response = "I'm experiencing high demand right now. Please try again in a moment."
+        else:
+            filtered_response = f"I encountered an issue: {last_error}. I'm still learning to handle complex business questions better."
+    else:
+        filtered_response = "I'm having technical difficulties. Please try asking your question again."
+    
+    chat_log.warning("Using fallback response: %.100s", filtered_response)
+    return filtered_response
+
+def record_chat_turn(session_id: str, user_message: str, response: str) -> None:
+    key = conversation_key(session_id)
+    session = conversation_store.session(key)
+    history = session["messages"]
+    history.append({"role": "user", "content": user_message})
+    history.append({"role": "assistant", "content": response})
+
+    if CONVERSATION_SUMMARY_TRIGGER_TOKENS <= 0:
+        session["messages"] = history[-10:]
+        conversation_store.save(key)
+        return
+
+    if (key not in summary_tasks
+            and len(history) > CONVERSATION_KEEP_MESSAGES
+            and sum(estimate_tokens(m["content"]) for m in history) > CONVERSATION_SUMMARY_TRIGGER_TOKENS):
+        # Summarize off the request path; the next turns use whatever summary exists by then
+        summary_tasks[key] = asyncio.get_running_loop().create_task(summarize_conversation(key))
+    session["messages"] = history[-CONVERSATION_MAX_MESSAGES:]
+    conversation_store.save(key)
+
+@app.on_event("startup")
+async def start_user_store():
+    try:
+        await connect_user_store()
+    except Exception as e:
+        db_log.warning("MongoDB not reachable at startup: %s", e)
+
+@app.on_event("shutdown")
+async def stop_user_store():
+    client_mongo.close()
+    password_executor.shutdown(wait=False)
+
+@app.on_event("shutdown")
+async def flush_knowledge_bases():
+    # Keep every tenant's knowledge base across restarts, not just the evicted ones
+    await asyncio.to_thread(knowledge_bases.flush)
+
+@app.on_event("shutdown")
+async def stop_log_listener():
+    log_listener.stop()
+
+@app.on_event("startup")
+async def start_background_tasks():
+    scheduler.bind(asyncio.get_running_loop())
+    asyncio.create_task(llm_pool.probe_loop(LLM_PROBE_INTERVAL_SECONDS))
+    if WEBSITE_REFRESH_INTERVAL_MINUTES > 0:
+        asyncio.create_task(website_refresh_loop())
+        ingest_log.info("Scheduled website refresh every %d minutes", WEBSITE_REFRESH_INTERVAL_MINUTES)
+
 # Health check endpoint (defined early)
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE_LATEST)
+
 # API Routes
 @app.post("/api/login")
 async def login(credentials: LoginRequest):
@@ -589,9 +2137,9 @@ async def login(credentials: LoginRequest):
         if not email or not password:
             raise HTTPException(status_code=400, detail="Email and password are required")
         
-        user = users_collection.find_one({"email": email})
+        user = await find_user_by_email(email)
         
-        if user and check_password_hash(user['password'], password):
+        if user and await verify_password(user['password'], password):
             user_data = {
                 "user_id": str(user['_id']),
                 "email": user['email'],
@@ -629,23 +2177,22 @@ async def signup(user_data: SignupRequest):
         if len(password) < 6:
             raise HTTPException(status_code=400, detail="Password must be at least 6 characters")
         
-        # Check if user already exists
-        if users_collection.find_one({"email": email}):
-            raise HTTPException(status_code=400, detail="Email already registered")
-        
-        # Create new user
+        # Create new user - the unique email index rejects duplicates atomically
         new_user_data = {
             "name": name,
             "email": email,
-            "password": generate_password_hash(password),
+            "password": await hash_password(password),
             "created_at": datetime.now()
         }
         
-        result = users_collection.insert_one(new_user_data)
+        try:
+            user_id = await insert_user(new_user_data)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=400, detail="Email already registered")
         
         # Create JWT token for auto login
         user_token_data = {
-            "user_id": str(result.inserted_id),
+            "user_id": user_id,
             "email": email,
             "name": name
         }
@@ -673,9 +2220,11 @@ async def logout(current_user: dict = Depends(get_current_user)):
 @app.post("/api/load_pdf")
 async def load_pdf(
     current_user: dict = Depends(get_current_user),
+    kb: KnowledgeBase = Depends(tenant_knowledge_base),
     pdf: UploadFile = File(...)
 ):
     try:
+        schedule_as(current_user, "ingestion")
         if not pdf.filename:
             raise HTTPException(status_code=400, detail="No file selected")
 
@@ -685,11 +2234,13 @@ async def load_pdf(
         # Save temporary file
         temp_path = f"temp_{int(datetime.now().timestamp())}_{pdf.filename}"
         with open(temp_path, "wb") as f:
-            content = await pdf.read()
+            with time_stage("upload_read"):
+                content = await pdf.read()
             f.write(content)
 
         # Extract PDF content
-        pdf_content = load_pdf_from_file(temp_path)
+        with time_stage("pdf_extract"):
+            pdf_content = load_pdf_from_file(temp_path)
         
         # Clean up temp file
         try:
@@ -700,17 +2251,24 @@ async def load_pdf(
         if pdf_content.startswith("Error reading PDF"):
             raise HTTPException(status_code=500, detail=pdf_content)
 
-        knowledge_sources['pdf'] = {
-            'content': pdf_content,
-            'filename': pdf.filename,
-            'loaded': True
-        }
-        
-        # Create RAG vector store for enhanced retrieval
-        rag_success = create_pdf_vector_store(pdf_content, pdf.filename)
+        def index_pdf() -> bool:
+            with kb.lock:
+                # Create RAG vector store for enhanced retrieval (off the event loop; embedding
+                # batches queue behind interactive work). Chats keep using the previous catalog
+                # until the new index is swapped in
+                rag_success = create_pdf_vector_store(pdf_content, pdf.filename)
+                kb.sources['pdf'] = {
+                    'content': pdf_content,
+                    'filename': pdf.filename,
+                    'loaded': True
+                }
+                kb.mark_changed()
+                return rag_success
+
+        rag_success = await asyncio.to_thread(index_pdf)
         rag_status = "✅ RAG enabled" if rag_success else "⚠️ RAG unavailable (fallback to keyword search)"
 
-        return {
+        return with_timing_debug({
             "success": True,
             "message": f"Product catalog PDF loaded successfully - {rag_status}",
             "filename": pdf.filename,
@@ -718,7 +2276,7 @@ async def load_pdf(
             "word_count": len(pdf_content.split()),
             "source_type": "pdf",
             "rag_enabled": rag_success
-        }
+        })
 
     except HTTPException:
         raise
@@ -728,9 +2286,11 @@ async def load_pdf(
 @app.post("/api/load_website")
 async def load_website(
     website_data: WebsiteRequest,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    kb: KnowledgeBase = Depends(tenant_knowledge_base)
 ):
     try:
+        schedule_as(current_user, "ingestion")
         url = website_data.url.strip()
         if not url:
             raise HTTPException(status_code=400, detail="URL is required")
@@ -738,29 +2298,86 @@ async def load_website(
         if not url.startswith(('http://', 'https://')):
             url = 'https://' + url
 
-        content = scrape_website_content(url)
-
-        if content.startswith("Error scraping website"):
-            raise HTTPException(status_code=500, detail=content)
-
-        knowledge_sources['website'] = {
-            'content': content,
-            'url': url,
-            'loaded': True
-        }
-        
-        # Create RAG vector store for enhanced website retrieval
-        rag_success = create_website_vector_store(content, url)
+        links: List[str] = []
+        try:
+            with time_stage("fetch"):
+                page = scrape_website_page(url, links=links)
+            if page['content'] is None:
+                raise ValueError(f"HTTP {page['status']}")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error scraping website: {str(e)}")
+
+        # Track the same-site pages the loaded page links to, so refreshes cover the site
+        pages = {url: page}
+        linked_urls = site_links(url, links, WEBSITE_MAX_PAGES - 1)
+        with time_stage("fetch"):
+            linked_pages = await asyncio.gather(*(asyncio.to_thread(scrape_linked_page, u) for u in linked_urls))
+        pages.update((u, p) for u, p in zip(linked_urls, linked_pages) if p is not None)
+        content = "\n\n".join(p['content'] for p in pages.values())
+
+        def index_website() -> bool:
+            with kb.lock:
+                # Create RAG vector store for enhanced website retrieval; chats keep using the
+                # previous website until it is swapped in
+                rag_success = create_website_vector_store({u: p['content'] for u, p in pages.items()})
+                kb.sources['website'] = {
+                    'content': content,
+                    'url': url,
+                    'loaded': True
+                }
+                kb.website_pages.clear()
+                for page_url, website_page in pages.items():
+                    record_website_page(page_url, website_page)
+                kb.mark_changed()
+                return rag_success
+
+        rag_success = await asyncio.to_thread(index_website)
         rag_status = "✅ RAG enabled" if rag_success else "⚠️ RAG unavailable (fallback to keyword search)"
 
-        return {
+        return with_timing_debug({
             "success": True,
-            "message": f"Brand website content loaded successfully - {rag_status}",
+            "message": f"Brand website content loaded successfully ({len(pages)} page(s)) - {rag_status}",
             "url": url,
+            "pages": list(pages),
             "text_length": len(content),
             "word_count": len(content.split()),
             "source_type": "website",
             "rag_enabled": rag_success
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/refresh_website")
+async def refresh_website(
+    refresh_data: WebsiteRefreshRequest,
+    current_user: dict = Depends(get_current_user),
+    kb: KnowledgeBase = Depends(tenant_knowledge_base)
+):
+    try:
+        schedule_as(current_user, "ingestion")
+        if not kb.website_pages:
+            raise HTTPException(status_code=400, detail="No website loaded to refresh")
+
+        urls = refresh_data.urls
+        if urls:
+            unknown = [u for u in urls if u not in kb.website_pages]
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown website pages: {', '.join(unknown)}")
+
+        summary = await asyncio.to_thread(refresh_website_pages, urls)
+
+        return {
+            "success": True,
+            "message": (f"Website refreshed - {len(summary['updated'])} updated, "
+                        f"{len(summary['unchanged'])} unchanged, {len(summary['removed'])} removed"),
+            "updated": summary['updated'],
+            "unchanged": summary['unchanged'],
+            "removed": summary['removed'],
+            "failed": summary['failed'],
+            "source_type": "website"
         }
 
     except HTTPException:
@@ -774,63 +2391,44 @@ async def speech_to_text(
     audio: UploadFile = File(...)
 ):
     try:
+        schedule_as(current_user, "interactive")
         if not audio or not audio.filename:
             raise HTTPException(status_code=400, detail="No audio file provided")
 
         # Get original filename and determine extension
         original_filename = audio.filename
-        file_extension = ".webm" if "webm" in audio.content_type else ".wav"
-        temp_path = f"temp_audio_{int(datetime.now().timestamp())}{file_extension}"
+        file_extension = ".webm" if "webm" in (audio.content_type or "") else ".wav"
         
-        print(f"Processing audio file: {original_filename}, Content-Type: {audio.content_type}")
+        speech_log.debug("Processing audio file %s", original_filename, extra={"content_type": audio.content_type})
         
-        # Save audio file
-        content = await audio.read()
+        # Keep the upload in memory - Whisper receives the bytes directly
+        with time_stage("upload_read"):
+            content = await audio.read()
         if len(content) == 0:
             raise HTTPException(status_code=400, detail="Audio file is empty")
-            
-        with open(temp_path, "wb") as f:
-            f.write(content)
-        
-        print(f"Audio file saved: {temp_path}, Size: {len(content)} bytes")
 
-        try:
-            # Open file for Groq API
-            with open(temp_path, "rb") as audio_file:
-                transcription = client.audio.transcriptions.create(
-                    file=audio_file,
-                    model=GROQ_WHISPER_MODEL,
-                    prompt="This is a customer service conversation about products and sales.",
-                    response_format="json",
-                    language="en"
-                )
-                text_out = getattr(transcription, "text", "") or ""
-                
-            print(f"Transcription result: {text_out}")
-            
-        finally:
-            try:
-                os.remove(temp_path)
-            except Exception as cleanup_error:
-                print(f"Failed to cleanup temp file: {cleanup_error}")
+        text_out = await transcribe_audio(content, f"audio{file_extension}")
+        # Transcripts are user content - only their size is logged at INFO
+        speech_log.info("Transcription complete", extra={"audio_bytes": len(content), "transcript_chars": len(text_out)})
+        speech_log.debug("Transcription result: %s", text_out)
 
         if not text_out.strip():
-            return {
+            return with_timing_debug({
                 "success": False,
                 "text": "",
                 "error": "No speech detected in audio"
-            }
+            })
 
-        return {
+        return with_timing_debug({
             "success": True,
             "text": text_out.strip(),
             "confidence": 0.95
-        }
+        })
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Speech-to-text error: {str(e)}")
+        speech_log.exception("Speech-to-text error")
         raise HTTPException(status_code=500, detail=f"Speech recognition failed: {str(e)}")
 
 @app.post("/api/text-to-speech")
@@ -857,246 +2455,274 @@ async def text_to_speech(
 @app.post("/api/chat")
 async def chat(
     chat_data: ChatRequest,
-    current_user: dict = Depends(get_current_user)
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    kb: KnowledgeBase = Depends(tenant_knowledge_base)
 ):
     try:
+        schedule_as(current_user, "interactive")
         user_message = chat_data.message.strip()
         if not user_message:
             raise HTTPException(status_code=400, detail="Message is required")
-        
-        # Check if we have loaded content, but don't require it
-        has_loaded_content = any(source['loaded'] for source in knowledge_sources.values())
 
         session_id = chat_data.session_id
-        relevant_content, source_type, loaded_sources, business_insights = find_relevant_content(user_message)
-        
-        # Analyze question complexity
-        question_analysis = analyze_question_complexity(user_message)
 
-        if session_id not in conversations:
-            conversations[session_id] = []
-            conversation_analytics[session_id] = {'questions': [], 'complexity_scores': []}
-        
-        # Store question analytics
-        conversation_analytics[session_id]['questions'].append({
-            'message': user_message,
-            'analysis': question_analysis,
-            'timestamp': datetime.now().isoformat()
-        })
-        conversation_analytics[session_id]['complexity_scores'].append(question_analysis['complexity_score'])
-
-        # Enhanced system message with business intelligence capabilities
-        insights_summary = ""
-        if business_insights:
-            insights_summary = "\n\nBUSINESS INSIGHTS EXTRACTED:\n"
-            for source, insights in business_insights.items():
-                for category, items in insights.items():
-                    if items:
-                        insights_summary += f"- {category.title()}: {', '.join(items[:3])}\n"
-        
-        # Simplified conversation context to save tokens
-        context_summary = ""
-        if len(conversation_analytics[session_id]['questions']) > 1:
-            recent_types = []
-            for q in conversation_analytics[session_id]['questions'][-2:]:
-                recent_types.extend(q['analysis']['question_types'])
-            if recent_types:
-                unique_types = list(set(recent_types))[:3]  # Convert set to list before slicing
-                context_summary = f"\nPrevious topics: {', '.join(unique_types)}\n"
-
-        # Determine response approach based on question complexity and available content
-        is_complex_question = question_analysis['is_complex']
-        question_types = question_analysis['question_types']
-        
-        # Enhanced system prompt based on question complexity
-        if is_complex_question or question_analysis['requires_analysis']:
-            max_tokens = 2000  # Longer responses for complex questions
-            temperature = 0.8  # Higher creativity for analysis
-        else:
-            max_tokens = 800   # Standard responses for simple questions
-            temperature = 0.6  # Moderate creativity
+        async def answer():
+            # Retrieval runs in a worker thread so the deadline watchdog keeps running;
+            # nothing is recorded for a client that has gone away
+            turn = await asyncio.to_thread(prepare_chat_turn, user_message, session_id)
+            filtered_response = await generate_chat_response(turn)
+            record_chat_turn(session_id, user_message, filtered_response)
+            return turn, filtered_response
 
-        # Enhanced system message that adapts based on available content
-        content_context = ""
-        if has_loaded_content and relevant_content:
-            content_context = f"\n\n📈 SPECIFIC BUSINESS DATA AVAILABLE:\n{relevant_content}\n{insights_summary}"
-        else:
-            content_context = "\n\n📋 MODE: General Business Intelligence (No specific product data loaded)\n- Draw from extensive business knowledge and industry best practices\n- Provide strategic insights and analytical frameworks\n- Offer actionable business recommendations"
+        turn, filtered_response = await run_until_deadline(request, answer())
 
-        # Significantly reduced system prompt to fit within Groq token limits
-        system_message = {
-            "role": "system",
-            "content": f"""You are Wolf AI, an expert business consultant with MBA-level expertise.
-
-🎯 EXPERTISE: Strategic analysis, financial modeling, market intelligence, sales strategy, and operational excellence.
-
-📊 SESSION CONTEXT:
-- Question Complexity: {question_analysis['complexity_score']}/20
-- Categories: {', '.join(question_types) if question_types else 'General business'}
-- Analysis Level: {'Deep' if question_analysis['requires_analysis'] else 'Standard'}
-- Data: {'Specific business data available' if has_loaded_content else 'General business knowledge'}
-{context_summary}
-{content_context}
-
-🧠 FRAMEWORKS: Apply SWOT, Porter's Five Forces, ROI analysis, market segmentation, competitive analysis, and strategic planning as appropriate.
+        return with_timing_debug({
+            "success": True,
+            "response": filtered_response,
+            "session_id": session_id,
+            "source_type": turn["source_type"],
+            "loaded_sources": turn["loaded_sources"],
+            "route": turn["route"],
+            "model": turn.get("model"),
+            "prompt_tokens": turn["prompt_tokens"],
+            "timestamp": datetime.now().isoformat()
+        })
 
-💼 RESPONSE APPROACH:
-- Strategic questions: Multi-framework analysis with implementation roadmap
-- Financial questions: Detailed calculations with assumptions and scenarios
-- Market questions: Competitive analysis with positioning recommendations
-- Operational questions: Process optimization with efficiency metrics
+    except HTTPException:
+        raise
+    except DeadlineExceeded:
+        raise HTTPException(status_code=504, detail="Chat request deadline exceeded")
+    except ClientDisconnected:
+        return Response(status_code=499)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
 
-📋 STANDARDS:
-- Use clear structure with headings and bullet points
-- Provide actionable recommendations with next steps
-- Include quantitative analysis when possible
-- Maintain professional consultant-level quality
-- Focus on business value and ROI
+@app.post("/api/chat/batch")
+async def chat_batch(
+    batch: BatchChatRequest,
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    kb: KnowledgeBase = Depends(tenant_knowledge_base)
+):
+    """Answer many questions through the chat pipeline, streaming NDJSON results as each one finishes"""
+    schedule_as(current_user, "batch")
+    questions = [q.strip() for q in batch.questions]
+    if not questions or not all(questions):
+        raise HTTPException(status_code=400, detail="Questions must be a non-empty list of non-empty strings")
+    if len(questions) > BATCH_CHAT_MAX_QUESTIONS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_CHAT_MAX_QUESTIONS} questions per batch")
+    if batch.session_ids is not None and len(batch.session_ids) != len(questions):
+        raise HTTPException(status_code=400, detail="session_ids must match questions one to one")
+
+    batch_id = uuid.uuid4().hex[:8]
+    ephemeral = batch.session_ids is None
+    session_ids = [f"batch-{batch_id}-{i}" for i in range(len(questions))] if ephemeral else batch.session_ids
+    concurrency = max(1, min(batch.concurrency or BATCH_CHAT_CONCURRENCY, BATCH_CHAT_MAX_CONCURRENCY))
+    # A batch runs far longer than one chat, so X-Request-Timeout (the interactive deadline)
+    # does not apply; clients may shorten or extend the batch's own with X-Batch-Timeout
+    rounds = -(-len(questions) // concurrency)
+    try:
+        batch_seconds = float(request.headers.get("X-Batch-Timeout", BATCH_CHAT_ITEM_SECONDS * rounds))
+    except ValueError:
+        batch_seconds = BATCH_CHAT_ITEM_SECONDS * rounds
+    deadline = time.monotonic() + min(max(batch_seconds, 0.1), BATCH_CHAT_MAX_SECONDS)
+
+    async def event_stream():
+        batch_start = time.perf_counter()
+        embedding_start = time.perf_counter()
+        embeddings = await asyncio.to_thread(embed_queries, questions)
+        embedding_ms = round((time.perf_counter() - embedding_start) * 1000, 1)
+
+        semaphore = asyncio.Semaphore(concurrency)
+        # Questions that share a session run in order, so each sees the previous answers
+        session_locks = {session_id: asyncio.Lock() for session_id in session_ids}
+
+        async def answer(index: int, question: str, session_id: str) -> dict:
+            async with session_locks[session_id], semaphore:
+                request_deadline_var.set(min(deadline, time.monotonic() + BATCH_CHAT_ITEM_SECONDS))
+                precomputed_query_embeddings_var.set(embeddings)
+                timings = RequestTimings()
+                request_timings_var.set(timings)
+                item_start = time.perf_counter()
+                result = {"type": "result", "index": index, "question": question, "session_id": session_id}
+                try:
+                    turn = await asyncio.to_thread(prepare_chat_turn, question, session_id)
+                    response = await generate_chat_response(turn)
+                    if not ephemeral:
+                        record_chat_turn(session_id, question, response)
+                    result.update({
+                        "success": True,
+                        "response": response,
+                        "route": turn["route"],
+                        "model": turn.get("model"),
+                        "source_type": turn["source_type"],
+                        "prompt_tokens": turn["prompt_tokens"],
+                    })
+                    BATCH_CHAT_ITEMS.inc(outcome="success")
+                except Exception as e:
+                    result.update({"success": False, "error": str(e)})
+                    BATCH_CHAT_ITEMS.inc(outcome="error")
+                finally:
+                    if ephemeral:
+                        conversation_store.pop(conversation_key(session_id))
+                result["timings_ms"] = {**timings.as_dict(), "total": round((time.perf_counter() - item_start) * 1000, 1)}
+                return result
+
+        tasks = [asyncio.create_task(answer(i, q, sid)) for i, (q, sid) in enumerate(zip(questions, session_ids))]
+        succeeded = 0
+        try:
+            # A client disconnect cancels this generator, and with it every unfinished question
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                succeeded += result["success"]
+                yield json_dumps(result) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        chat_log.info("Batch chat finished", extra={
+            "batch_id": batch_id,
+            "questions": len(questions),
+            "failed": len(questions) - succeeded,
+            "duration_ms": round((time.perf_counter() - batch_start) * 1000, 1)
+        })
+        yield json_dumps({
+            "type": "done",
+            "count": len(questions),
+            "succeeded": succeeded,
+            "failed": len(questions) - succeeded,
+            "concurrency": concurrency,
+            "embedding_ms": embedding_ms,
+            "total_ms": round((time.perf_counter() - batch_start) * 1000, 1)
+        }) + "\n"
+
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+@app.post("/api/voice-chat")
+async def voice_chat(
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    kb: KnowledgeBase = Depends(tenant_knowledge_base),
+    audio: UploadFile = File(...),
+    session_id: str = Form("default"),
+    stream: bool = Form(False)
+):
+    """Transcribe a voice message and answer it in a single round trip"""
+    try:
+        schedule_as(current_user, "interactive")
+        if not audio or not audio.filename:
+            raise HTTPException(status_code=400, detail="No audio file provided")
 
-🔥 MANDATE: Always provide valuable business insights using proven frameworks and best practices. Never refuse to answer due to lack of specific data - leverage extensive business knowledge instead."""
-        }
+        content = await audio.read()
+        if len(content) == 0:
+            raise HTTPException(status_code=400, detail="Audio file is empty")
 
-        recent_messages = [system_message]
-        recent_messages.extend(conversations[session_id][-4:])  # Reduced conversation history
-        recent_messages.append({"role": "user", "content": user_message})
+        file_extension = ".webm" if "webm" in (audio.content_type or "") else ".wav"
+        transcript = (await run_until_deadline(request, transcribe_audio(content, f"audio{file_extension}"))).strip()
 
-        max_retries = 3
-        retry_delay = 2
-        last_error = None
+        if not transcript:
+            return {
+                "success": False,
+                "transcript": "",
+                "error": "No speech detected in audio"
+            }
 
-        filtered_response = None
-        for attempt in range(max_retries):
-            try:
-                print(f"Chat attempt {attempt + 1}: Sending request to Groq API...")
-                
-                # Adaptive parameters based on question complexity - using only supported Groq parameters
-                chat_completion = client.chat.completions.create(
-                    messages=recent_messages,
-                    model=GROQ_CHAT_MODEL,
-                    temperature=temperature,  # Use the dynamic temperature
-                    max_tokens=max_tokens,    # Use the dynamic max_tokens
-                    top_p=0.9,
-                    stream=False  # Ensure we get complete responses
-                )
+        if not stream:
+            async def answer():
+                # Retrieval starts as soon as the transcript is available
+                turn = await asyncio.to_thread(prepare_chat_turn, transcript, session_id)
+                filtered_response = await generate_chat_response(turn)
+                record_chat_turn(session_id, transcript, filtered_response)
+                return turn, filtered_response
 
-                assistant_response = chat_completion.choices[0].message.content
-                print(f"✅ Got response from Groq API: {len(assistant_response)} characters")
-                
-                # Remove restrictive filtering - let the AI provide full business intelligence
-                filtered_response = assistant_response
-                last_error = None
-                break
+            turn, filtered_response = await run_until_deadline(request, answer())
 
-            except Exception as api_error:
-                last_error = str(api_error)
-                print(f"⚠️  API Error (attempt {attempt + 1}): {last_error}")
-                
-                # Check for specific error types that warrant retry
-                if any(k in last_error.lower() for k in ["rate", "limit", "timeout", "temporarily", "overloaded"]):
-                    print(f"🔄 Retrying in {retry_delay * (attempt + 1)} seconds...")
-                    time.sleep(retry_delay * (attempt + 1))
-                    continue
-                else:
-                    # For other errors, provide a helpful response
-                    print(f"❌ Non-retryable error: {last_error}")
-                    break
-
-        # Handle case where we couldn't get a response
-        if not filtered_response:
-            if last_error:
-                # Provide a more helpful error message based on the actual error
-                if "api key" in last_error.lower():
-                    filtered_response = "I'm having trouble with my API configuration. Please check that the Groq API key is valid and properly configured."
-                elif "model" in last_error.lower():
-                    filtered_response = "I'm having trouble with the AI model configuration. Please check that the model name is correct."
-                elif "rate" in last_error.lower() or "limit" in last_error.lower():
-                    filtered_response = "I'm experiencing high demand right now. Please try again in a moment."
-                else:
-                    filtered_response = f"I encountered an issue: {last_error}. I'm still learning to handle complex business questions better."
-            else:
-                filtered_response = "I'm having technical difficulties. Please try asking your question again."
-            
-            print(f"🚨 Using fallback response: {filtered_response[:100]}...")
+            return {
+                "success": True,
+                "transcript": transcript,
+                "response": filtered_response,
+                "session_id": session_id,
+                "source_type": turn["source_type"],
+                "loaded_sources": turn["loaded_sources"],
+                "timestamp": datetime.now().isoformat()
+            }
 
-        conversations[session_id].append({"role": "user", "content": user_message})
-        conversations[session_id].append({"role": "assistant", "content": filtered_response})
-        conversations[session_id] = conversations[session_id][-10:]
+        async def event_stream():
+            # Send the transcript first so the client can render it while retrieval runs
+            yield json_dumps({"type": "transcript", "text": transcript}) + "\n"
 
-        return {
-            "success": True,
-            "response": filtered_response,
-            "session_id": session_id,
-            "source_type": source_type,
-            "loaded_sources": loaded_sources,
-            "timestamp": datetime.now().isoformat()
-        }
+            # A disconnect cancels this generator; the deadline is enforced between chunks
+            parts = []
+            try:
+                turn = await asyncio.to_thread(prepare_chat_turn, transcript, session_id)
+                async for delta in stream_chat_response(turn):
+                    parts.append(delta)
+                    yield json_dumps({"type": "delta", "content": delta}) + "\n"
+            except DeadlineExceeded:
+                REQUESTS_ABANDONED.inc(reason="deadline")
+                yield json_dumps({"type": "error", "error": "Request deadline exceeded"}) + "\n"
+                return
+
+            record_chat_turn(session_id, transcript, "".join(parts))
+            yield json_dumps({
+                "type": "done",
+                "session_id": session_id,
+                "source_type": turn["source_type"],
+                "loaded_sources": turn["loaded_sources"],
+                "timestamp": datetime.now().isoformat()
+            }) + "\n"
+
+        return StreamingResponse(event_stream(), media_type="application/x-ndjson")
 
     except HTTPException:
         raise
+    except DeadlineExceeded:
+        raise HTTPException(status_code=504, detail="Voice chat deadline exceeded")
+    except ClientDisconnected:
+        return Response(status_code=499)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Voice chat error: {str(e)}")
 
 @app.post("/api/clear_source")
 async def clear_source(
     clear_data: ClearSourceRequest,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    kb: KnowledgeBase = Depends(tenant_knowledge_base)
 ):
     try:
-        global pdf_collection, website_collection
         source_type = clear_data.source_type
 
         if source_type == 'all':
-            for source in knowledge_sources.values():
-                source['content'] = ''
-                source['loaded'] = False
-            conversations.clear()
-            
-            # Clear all RAG vector stores
-            if rag_initialized:
-                try:
-                    if pdf_collection:
-                        chroma_client.delete_collection(name="pdf_documents")
-                        pdf_collection = None
-                    if website_collection:
-                        chroma_client.delete_collection(name="website_documents")
-                        website_collection = None
-                    print("✅ All RAG vector stores cleared")
-                except Exception as e:
-                    print(f"⚠️ Could not clear RAG vector stores: {e}")
+            with kb.lock:
+                for source in kb.sources.values():
+                    source['content'] = ''
+                    source['loaded'] = False
+                kb.website_pages.clear()
+                
+                # Clear all RAG vector stores
+                if rag_initialized:
+                    kb.drop_collections()
+                    rag_log.info("All RAG vector stores cleared")
+                kb.mark_changed()
+            conversation_store.clear_tenant(kb.tenant)
             
             return {"success": True, "message": "All sources and RAG data cleared"}
-        elif source_type == 'pdf':
-            knowledge_sources['pdf']['content'] = ''
-            knowledge_sources['pdf']['loaded'] = False
-            
-            # Clear PDF RAG vector store
-            if rag_initialized and pdf_collection:
-                try:
-                    chroma_client.delete_collection(name="pdf_documents")
-                    pdf_collection = None
-                    print("✅ PDF RAG vector store cleared")
-                except Exception as e:
-                    print(f"⚠️ Could not clear PDF RAG vector store: {e}")
-            
-            return {"success": True, "message": "PDF source and RAG data cleared"}
-        elif source_type == 'website':
-            knowledge_sources['website']['content'] = ''
-            knowledge_sources['website']['loaded'] = False
-            
-            # Clear website RAG vector store
-            if rag_initialized and website_collection:
-                try:
-                    chroma_client.delete_collection(name="website_documents")
-                    website_collection = None
-                    print("✅ Website RAG vector store cleared")
-                except Exception as e:
-                    print(f"⚠️ Could not clear website RAG vector store: {e}")
+        elif source_type in ('pdf', 'website'):
+            label = "PDF" if source_type == 'pdf' else "Website"
+            with kb.lock:
+                kb.sources[source_type]['content'] = ''
+                kb.sources[source_type]['loaded'] = False
+                if source_type == 'website':
+                    kb.website_pages.clear()
+                
+                # Clear the source's RAG vector store (dropped once in-flight queries finish)
+                if rag_initialized and kb.collections[source_type] is not None:
+                    kb.swap_collection(source_type, None)
+                    rag_log.info("%s RAG vector store cleared", label)
+                kb.mark_changed()
             
-            return {"success": True, "message": "Website source and RAG data cleared"}
-        elif source_type in knowledge_sources:
-            knowledge_sources[source_type]['content'] = ''
-            knowledge_sources[source_type]['loaded'] = False
-            return {"success": True, "message": f"{source_type.title()} source cleared"}
+            return {"success": True, "message": f"{label} source and RAG data cleared"}
         else:
             raise HTTPException(status_code=400, detail="Invalid source type")
 
@@ -1106,63 +2732,90 @@ async def clear_source(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/status")
-async def status(current_user: dict = Depends(get_current_user)):
+async def status(
+    current_user: dict = Depends(get_current_user),
+    kb: KnowledgeBase = Depends(tenant_knowledge_base)
+):
     uptime = datetime.now() - server_start_time
-    loaded_sources = {k: v['loaded'] for k, v in knowledge_sources.items()}
+    loaded_sources = {k: v['loaded'] for k, v in kb.sources.items()}
 
     return {
         "status": "running",
         "uptime": str(uptime).split('.')[0],
         "sources": loaded_sources,
-        "conversations": len(conversations),
-        "total_sources_loaded": sum(1 for v in loaded_sources.values() if v)
+        "conversations": conversation_store.count(kb.tenant),
+        "total_sources_loaded": sum(1 for v in loaded_sources.values() if v),
+        "database": mongo_metrics.snapshot(),
+        "llm_endpoints": llm_pool.snapshot(),
+        "scheduler": scheduler.snapshot(),
+        "knowledge_base": kb.describe()
     }
 
 # Static file serving setup
+# The built frontend is small, so it is held in memory with gzip/brotli variants,
+# ETags and long-lived caching for fingerprinted bundles (see static_assets.py)
 static_dir = Path("static/dist")
-if static_dir.exists():
-    # Mount static assets first
-    app.mount("/assets", StaticFiles(directory="static/dist/assets"), name="assets")
-    app.mount("/static", StaticFiles(directory="static/dist"), name="static")
+static_cache = StaticAssetCache(static_dir) if static_dir.exists() else None
+
+def serve_index(request: Request):
+    response = static_cache.response("index.html", request) if static_cache else None
+    if response is None:
+        raise HTTPException(status_code=404, detail="Frontend not built")
+    return response
+
+@app.get("/assets/{path:path}")
+async def serve_asset(path: str, request: Request):
+    response = static_cache.response(f"assets/{path}", request) if static_cache else None
+    if response is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return response
+
+@app.get("/static/{path:path}")
+async def serve_static(path: str, request: Request):
+    response = static_cache.response(path, request) if static_cache else None
+    if response is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return response
 
 # Frontend routes (only if static directory exists)
 @app.get("/")
-async def serve_home():
-    if static_dir.exists():
-        return FileResponse("static/dist/index.html")
+async def serve_home(request: Request):
+    if static_cache:
+        return serve_index(request)
     else:
         return {"message": "Wolf AI Backend is running. Please build the React frontend first."}
 
 @app.get("/home")
-async def serve_home_alt():
-    return FileResponse("static/dist/index.html")
+async def serve_home_alt(request: Request):
+    return serve_index(request)
 
 @app.get("/login")
-async def serve_login():
-    return FileResponse("static/dist/index.html")
+async def serve_login(request: Request):
+    return serve_index(request)
 
 @app.get("/signup")
-async def serve_signup():
-    return FileResponse("static/dist/index.html")
+async def serve_signup(request: Request):
+    return serve_index(request)
 
 @app.get("/dashboard")
-async def serve_dashboard():
-    return FileResponse("static/dist/index.html")
+async def serve_dashboard(request: Request):
+    return serve_index(request)
 
 # Catch-all route for React Router (MUST BE LAST!)
 @app.get("/{path:path}")
-async def serve_react_app(path: str):
+async def serve_react_app(path: str, request: Request):
     # Skip API routes
     if path.startswith("api/"):
         raise HTTPException(status_code=404, detail="API endpoint not found")
     
     # Skip already handled endpoints
-    if path in ["health"]:
+    if path in ["health", "metrics"]:
         raise HTTPException(status_code=404, detail="Endpoint not found")
     
     # Serve React index.html for all other routes
-    if static_dir.exists():
-        return FileResponse("static/dist/index.html")
+    if static_cache:
+        # Top-level files from public/ (favicon, manifest, ...) are served as themselves
+        return static_cache.response(path, request) or serve_index(request)
     else:
         raise HTTPException(status_code=404, detail="Frontend not built")
 
@@ -1171,13 +2824,15 @@ async def serve_react_app(path: str):
 async def shutdown_server():
     """Endpoint to manually shutdown the server"""
     import os
-    print("[SHUTDOWN] Manual shutdown requested")
+    app_log.warning("Manual shutdown requested")
+    log_listener.stop()  # Flush queued log records before the hard exit
     os._exit(0)  # Force exit
 
 if __name__ == "__main__":
     import uvicorn
     import sys
     import platform
+    from cluster import server_settings, uvicorn_config
     
     # Windows-specific signal handling
     if platform.system() == "Windows":
@@ -1187,9 +2842,9 @@ if __name__ == "__main__":
                 print("\n[SHUTDOWN] Graceful shutdown initiated...")
                 try:
                     # Clean up resources
-                    if rag_initialized and pdf_collection:
-                        print("[CLEANUP] Clearing RAG resources...")
-                        chroma_client.delete_collection(name="pdf_documents")
+                    if rag_initialized:
+                        print("[CLEANUP] Saving knowledge bases...")
+                        knowledge_bases.flush()
                 except Exception:
                     pass
                 print("[SHUTDOWN] Server stopped gracefully.")
@@ -1205,25 +2860,15 @@ if __name__ == "__main__":
     
     print("Wolf AI - Sales Assistant Chatbot (FastAPI)")
     print("Supports: PDF Catalogs, Brand Websites, Speech-to-Text, Text-to-Speech")
-    print("FastAPI Backend: http://localhost:8000")
+    print(f"FastAPI Backend: http://localhost:{os.getenv('SERVER_PORT', '8000')}")
     print("React Frontend: http://localhost:3001")
     print("\nStarting server...")
     print("[INFO] Press Ctrl+C to stop, or POST to /api/shutdown")
     print("[INFO] Server will run until manually stopped\n")
     
     try:
-        # Use uvicorn.Config and Server for better control
-        config = uvicorn.Config(
-            "fastapi_app_fixed:app",
-            host="127.0.0.1",
-            port=8000,
-            reload=False,
-            access_log=True,
-            log_level="info",
-            timeout_keep_alive=30,
-            timeout_graceful_shutdown=5,
-            lifespan="on"  # Enable lifespan events
-        )
+        # Single process; use cluster.py (or server_manager.py) for several workers
+        config = uvicorn_config(server_settings(), timeout_graceful_shutdown=5)
         
         server = uvicorn.Server(config)
         server.run()
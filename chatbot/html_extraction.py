@@ -0,0 +1,307 @@
+"""
+Wolf AI - HTML text extraction engines
+
+Turns fetched web pages into plain text for the knowledge base. Engines:
+
+- "lxml":   libxml2's C tokenizer driving a streaming collector (no tree is built)
+- "stream": the same collector driven by the stdlib HTMLParser (pure Python fallback)
+- "bs4":    the original BeautifulSoup tree + get_text implementation
+
+"auto" picks lxml when it is installed and falls back to the stdlib tokenizer.
+Streaming engines drop boilerplate elements as they go, keep block structure as
+blank-line separated paragraphs, and stop reading once max_chars is collected.
+Without a charset from the caller, byte input is decoded by the page's byte order
+mark or <meta charset>, else as UTF-8. Callers that pass a links list also get the
+href of every <a> read, including those in dropped boilerplate such as <nav>.
+"""
+
+import codecs
+import itertools
+import logging
+import re
+from html.parser import HTMLParser
+from typing import Iterable, List, Optional, Union
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+DEFAULT_MAX_CHARS = 15000
+
+# Bytes searched for a <meta charset> before parsing starts
+PRESCAN_BYTES = 4096
+META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_:.-]+)', re.IGNORECASE)
+
+# Elements whose whole subtree is dropped. <form> itself is kept: ASP.NET WebForms
+# pages wrap the whole body in one, so only the form controls are dropped
+SKIP_TAGS = {
+    'script', 'style', 'noscript', 'template', 'svg', 'iframe', 'canvas',
+    'nav', 'footer', 'aside', 'select', 'button', 'textarea'
+}
+
+# Elements that start a new paragraph in the output
+BLOCK_TAGS = {
+    'p', 'div', 'section', 'article', 'main', 'header', 'ul', 'ol', 'li', 'dl', 'dt', 'dd',
+    'table', 'thead', 'tbody', 'tr', 'td', 'th', 'blockquote', 'pre', 'figure', 'figcaption',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'br', 'hr', 'address', 'details', 'summary', 'form'
+}
+
+# Void elements never get an end tag, so they must not change the skip depth
+VOID_TAGS = {'br', 'hr', 'img', 'input', 'meta', 'link', 'source', 'wbr', 'area', 'base', 'col', 'embed'}
+
+logger = logging.getLogger("wolfai.web")
+
+HtmlSource = Union[bytes, str, Iterable[bytes]]
+
+
+class TextCollector:
+    """Streaming sink that keeps visible text and paragraph boundaries within a budget"""
+
+    def __init__(self, max_chars: int = DEFAULT_MAX_CHARS, links: Optional[List[str]] = None):
+        self.max_chars = max_chars
+        self.links = links
+        self.blocks: List[str] = []
+        self.size = 0
+        self.done = False
+        self._current: List[str] = []
+        self._current_len = 0
+        self._skip_depth = 0
+        # Open elements; an end tag closes everything opened inside it, so an unclosed
+        # <select> or <nav> stops suppressing text when its parent (or </body>) closes
+        self._open: List[str] = []
+
+    # lxml parser-target interface
+    def start(self, tag, attrib=None, nsmap=None):
+        tag = _local_name(tag)
+        if tag == 'a' and self.links is not None and attrib and attrib.get('href'):
+            self.links.append(attrib['href'])
+        if tag in VOID_TAGS:
+            if tag in BLOCK_TAGS:
+                self._flush()
+            return
+        self._open.append(tag)
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._flush()
+
+    def end(self, tag):
+        tag = _local_name(tag)
+        if tag in BLOCK_TAGS:
+            self._flush()
+        if tag not in self._open:
+            return
+        while self._open:
+            name = self._open.pop()
+            if name in SKIP_TAGS:
+                self._skip_depth -= 1
+            if name == tag:
+                break
+
+    def data(self, data: str):
+        if self._skip_depth or self.done:
+            return
+        self._current.append(data)
+        self._current_len += len(data)
+        if self._current_len > self.max_chars:
+            self._flush()
+
+    def comment(self, text):
+        pass
+
+    def close(self) -> str:
+        self._flush()
+        return "\n\n".join(self.blocks)
+
+    def _flush(self):
+        if not self._current:
+            return
+        text = ' '.join(''.join(self._current).split())
+        self._current = []
+        self._current_len = 0
+        if not text or self.done:
+            return
+
+        remaining = self.max_chars - self.size
+        text = text[:remaining]
+        self.blocks.append(text)
+        self.size += len(text) + 2
+        if self.size >= self.max_chars:
+            self.done = True
+
+
+class _StdlibTokenizer(HTMLParser):
+    """Adapts the stdlib HTMLParser callbacks onto a TextCollector"""
+
+    def __init__(self, collector: TextCollector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self.collector.start(tag)
+
+    def handle_endtag(self, tag):
+        if tag not in VOID_TAGS:
+            self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+
+def _local_name(tag) -> str:
+    if not isinstance(tag, str):
+        return ''
+    if '}' in tag:
+        tag = tag.rsplit('}', 1)[1]
+    return tag.lower()
+
+
+def _iter_chunks(source: HtmlSource) -> Iterable[Union[bytes, str]]:
+    if isinstance(source, (bytes, str)):
+        yield source
+    else:
+        for chunk in source:
+            if chunk:
+                yield chunk
+
+
+def sniff_encoding(head: bytes) -> Optional[str]:
+    """Encoding named by a byte order mark or <meta charset> at the start of a page"""
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8'
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    match = META_CHARSET.search(head[:PRESCAN_BYTES])
+    if not match:
+        return None
+    try:
+        name = codecs.lookup(match.group(1).decode('ascii')).name
+    except LookupError:
+        return None
+    # As browsers do: a meta tag can't really mean UTF-16, and Latin-1 labels mean windows-1252
+    if name.startswith('utf-16'):
+        return 'utf-8'
+    if name in ('latin-1', 'iso8859-1', 'ascii'):
+        return 'cp1252'
+    return name
+
+
+def _with_encoding(source: HtmlSource, encoding: Optional[str]):
+    """The source's chunks and their encoding: the given one, else sniffed, else UTF-8 (None for text)"""
+    chunks = iter(_iter_chunks(source))
+    if encoding:
+        return chunks, encoding
+    head = []
+    size = 0
+    for chunk in chunks:
+        head.append(chunk)
+        if isinstance(chunk, str):
+            return itertools.chain(head, chunks), None
+        size += len(chunk)
+        if size >= PRESCAN_BYTES:
+            break
+    return itertools.chain(head, chunks), sniff_encoding(b''.join(head)) or 'utf-8'
+
+
+def extract_stream(source: HtmlSource, max_chars: int = DEFAULT_MAX_CHARS,
+                   encoding: Optional[str] = None, links: Optional[List[str]] = None) -> str:
+    """Extract text with the pure Python streaming tokenizer"""
+    collector = TextCollector(max_chars, links)
+    tokenizer = _StdlibTokenizer(collector)
+    chunks, encoding = _with_encoding(source, encoding)
+    # utf-8-sig also drops a leading byte order mark
+    decoder = codecs.getincrementaldecoder(
+        'utf-8-sig' if codecs.lookup(encoding or 'utf-8').name == 'utf-8' else encoding
+    )(errors='replace')
+
+    for chunk in chunks:
+        tokenizer.feed(chunk if isinstance(chunk, str) else decoder.decode(chunk))
+        if collector.done:
+            break
+    else:
+        tokenizer.feed(decoder.decode(b'', final=True))
+        tokenizer.close()
+
+    return collector.close()
+
+
+def extract_lxml(source: HtmlSource, max_chars: int = DEFAULT_MAX_CHARS,
+                 encoding: Optional[str] = None, links: Optional[List[str]] = None) -> str:
+    """Extract text with libxml2's tokenizer feeding the streaming collector"""
+    collector = TextCollector(max_chars, links)
+    # Without an encoding libxml2 would read undeclared bytes as Latin-1
+    chunks, encoding = _with_encoding(source, encoding)
+    parser = lxml_etree.HTMLParser(target=collector, encoding=encoding, remove_comments=True)
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        if collector.done:
+            return collector.close()
+
+    try:
+        return parser.close()
+    except lxml_etree.XMLSyntaxError:
+        return collector.close()
+
+
+def extract_bs4(source: HtmlSource, max_chars: int = DEFAULT_MAX_CHARS,
+                encoding: Optional[str] = None, links: Optional[List[str]] = None) -> str:
+    """Original implementation: full BeautifulSoup tree, then get_text"""
+    html = source if isinstance(source, (bytes, str)) else b''.join(_iter_chunks(source))
+    soup = BeautifulSoup(html, 'html.parser', from_encoding=encoding if isinstance(html, bytes) else None)
+    if links is not None:
+        links.extend(a['href'] for a in soup.find_all('a', href=True))
+
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+
+    text = soup.get_text(separator=" ")
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text[:max_chars]
+
+
+ENGINES = {
+    'lxml': extract_lxml,
+    'stream': extract_stream,
+    'bs4': extract_bs4,
+}
+
+
+def available_engines() -> List[str]:
+    """Engines usable with the packages installed in this environment"""
+    engines = []
+    if lxml_etree is not None:
+        engines.append('lxml')
+    engines.append('stream')
+    if BeautifulSoup is not None:
+        engines.append('bs4')
+    return engines
+
+
+def resolve_engine(name: str = 'auto') -> str:
+    """Map a configured engine name onto one that can actually run"""
+    name = (name or 'auto').strip().lower()
+    if name == 'auto':
+        return 'lxml' if lxml_etree is not None else 'stream'
+    if name not in ENGINES:
+        raise ValueError(f"Unknown HTML extractor '{name}' (expected one of: auto, {', '.join(ENGINES)})")
+    if name not in available_engines():
+        logger.warning("HTML extractor '%s' is not installed, using the streaming tokenizer", name)
+        return 'stream'
+    return name
+
+
+def extract_text(source: HtmlSource, engine: str = 'auto', max_chars: int = DEFAULT_MAX_CHARS,
+                 encoding: Optional[str] = None, links: Optional[List[str]] = None) -> str:
+    """Extract visible, paragraph-structured text from HTML bytes or a chunk iterator"""
+    return ENGINES[resolve_engine(engine)](source, max_chars=max_chars, encoding=encoding, links=links)
@@ -0,0 +1,142 @@
+"""
+Wolf AI - response encoding: fast JSON and negotiated compression
+
+- json_dumps / FastJSONResponse use orjson when it is installed and fall back to
+  the stdlib json module otherwise
+- CompressionMiddleware gzip- or brotli-compresses complete API responses above a
+  size threshold, picking the coding from Accept-Encoding. Streamed responses
+  (no Content-Length, e.g. NDJSON) pass through untouched so each line still
+  reaches the client as soon as it is written
+"""
+
+import gzip
+import json
+import re
+from typing import Dict, Optional
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse
+    orjson_available = True
+except ImportError:
+    orjson_available = False
+
+try:
+    import brotli
+    brotli_available = True
+except ImportError:
+    brotli_available = False
+
+COMPRESSIBLE = re.compile(r"^(text/|application/(javascript|json|xml|manifest\+json)|image/svg\+xml)")
+
+FastJSONResponse = ORJSONResponse if orjson_available else JSONResponse
+
+
+def json_dumps(value) -> str:
+    """Compact JSON text, via orjson when available"""
+    if orjson_available:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """Accept-Encoding as {coding: q}"""
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                pass
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def choose_encoding(header: str, available) -> str:
+    """Best available content-coding the client accepts, preferring br over gzip"""
+    accepted = accepted_encodings(header or "")
+    for encoding in ("br", "gzip"):
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if encoding in available and q > 0:
+            return encoding
+    return "identity"
+
+
+def gzip_compress(body: bytes, level: int = 9) -> bytes:
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def brotli_compress(body: bytes, quality: int = 11) -> Optional[bytes]:
+    return brotli.compress(body, quality=quality) if brotli_available else None
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing complete responses under path_prefix by Accept-Encoding"""
+
+    def __init__(self, app, path_prefix: str = "/api/", minimum_size: int = 1024,
+                 gzip_level: int = 6, brotli_quality: int = 5):
+        self.app = app
+        self.path_prefix = path_prefix
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        # Dynamic responses are compressed per request, so use cheaper levels than for static files
+        self.codings = {"gzip": lambda body: gzip_compress(body, self.gzip_level)}
+        if brotli_available:
+            self.codings["br"] = lambda body: brotli_compress(body, self.brotli_quality)
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] == "HEAD"
+                or not scope["path"].startswith(self.path_prefix)):
+            return await self.app(scope, receive, send)
+
+        request_headers = dict(scope["headers"])
+        encoding = choose_encoding(request_headers.get(b"accept-encoding", b"").decode("latin-1"), self.codings)
+        if encoding == "identity":
+            return await self.app(scope, receive, send)
+
+        start_message = None
+        body = []
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if start_message is False:
+                return await send(message)
+
+            if message["type"] == "http.response.start":
+                headers = {k.lower(): v for k, v in message.get("headers", [])}
+                length = headers.get(b"content-length")
+                media_type = headers.get(b"content-type", b"").decode("latin-1")
+                if (length is None or int(length) < self.minimum_size or b"content-encoding" in headers
+                        or not COMPRESSIBLE.match(media_type)):
+                    # Streamed, small, already encoded or binary: send as-is
+                    start_message = False
+                    return await send(message)
+                start_message = message
+                return
+
+            body.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            data = b"".join(body)
+            compressed = self.codings[encoding](data)
+            headers = [(k, v) for k, v in start_message.get("headers", [])
+                       if k.lower() not in (b"content-length", b"vary")]
+            vary = [v for k, v in start_message.get("headers", []) if k.lower() == b"vary"]
+            if compressed is not None and len(compressed) < len(data):
+                data = compressed
+                headers.append((b"content-encoding", encoding.encode()))
+            headers.append((b"content-length", str(len(data)).encode()))
+            headers.append((b"vary", b", ".join(vary + [b"Accept-Encoding"])))
+            await send({**start_message, "headers": headers})
+            await send({"type": "http.response.body", "body": data})
+
+        await self.app(scope, receive, send_compressed)
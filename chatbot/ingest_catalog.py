@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Wolf AI - offline catalog ingestion
+
+Builds a catalog snapshot (see catalog_snapshot.py) from PDFs, text files and
+website URLs without going through the API: documents are extracted and their
+chunks embedded in parallel worker processes, each with its own copy of the
+embedding model, and the business insights are computed up front. Files become
+the "pdf" source, URLs the "website" source, chunked exactly as the server does.
+
+Point the server at the output with KNOWLEDGE_BASE_SNAPSHOT; it maps the newest
+version at startup, so a new node serves the catalog without embedding anything.
+
+Usage:
+    python ingest_catalog.py wolf_ai_catalog.txt wolf_ai_product_catalog.pdf
+    python ingest_catalog.py catalogs/ https://example.com/pricing --out snapshots --workers 8
+    python ingest_catalog.py catalogs/ --urls-file urls.txt --backend onnx --keep 5
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import requests
+
+from catalog_processing import chunk_text, extract_business_insights, load_pdf_from_file
+from catalog_snapshot import write_snapshot
+from embedding_backends import load_embedding_model, resolve_backend
+from html_extraction import extract_text, resolve_engine
+
+APP_DIR = Path(__file__).resolve().parent
+FILE_TYPES = (".pdf", ".txt", ".md")
+REQUEST_HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+                   'AppleWebKit/537.36 (KHTML, like Gecko) '
+                   'Chrome/124.0.0.0 Safari/537.36')
+}
+
+# Worker processes: the embedding model, loaded once per process
+_model = None
+
+
+def _init_worker(model_name: str, backend: str, quantize: bool, threads: int) -> None:
+    global _model
+    _model = load_embedding_model(model_name, backend, quantize, threads)
+
+
+def _embed_batch(chunks: List[str]) -> np.ndarray:
+    return np.asarray(_model.encode(chunks, batch_size=len(chunks)), dtype=np.float32)
+
+
+def _extract_file(path: str) -> str:
+    if path.lower().endswith(".pdf"):
+        return load_pdf_from_file(path)
+    return Path(path).read_text(encoding="utf-8", errors="replace").strip()
+
+
+def fetch_page(url: str, engine: str) -> str:
+    with requests.get(url, headers=REQUEST_HEADERS, timeout=15, stream=True) as response:
+        response.raise_for_status()
+        charset = response.encoding if 'charset' in response.headers.get('Content-Type', '').lower() else None
+        return extract_text(response.iter_content(chunk_size=65536), engine=engine, max_chars=15000, encoding=charset)
+
+
+def collect_inputs(inputs: List[str]) -> Tuple[List[Tuple[str, Path]], List[str]]:
+    """(name, path) of every catalog file, and the URLs, in a stable order"""
+    files, urls = [], []
+    for item in inputs:
+        if item.startswith(("http://", "https://")):
+            urls.append(item)
+            continue
+        path = Path(item)
+        if path.is_dir():
+            for child in sorted(path.rglob("*")):
+                if child.is_file() and child.suffix.lower() in FILE_TYPES:
+                    files.append((child.relative_to(path).as_posix(), child))
+        elif path.is_file():
+            files.append((path.name, path))
+        else:
+            raise FileNotFoundError(f"{item} is neither a file, a directory nor a URL")
+    return files, urls
+
+
+def chunk_documents(source: str, documents: List[Tuple[str, str]]) -> dict:
+    """Chunk each document separately, with the ids and metadata the server gives them"""
+    index = {"ids": [], "documents": [], "metadatas": []}
+    for name, content in documents:
+        for i, chunk in enumerate(chunk_text(content, chunk_size=400, overlap=50)):
+            if source == "pdf":
+                index["ids"].append(f"chunk_{i}_{name}")
+                metadata = {"source": "pdf", "filename": name}
+            else:
+                index["ids"].append(f"chunk_{i}_{name.replace('/', '_').replace(':', '')}")
+                metadata = {"source": "website", "url": name}
+            metadata.update({
+                "chunk_index": i,
+                "content_preview": chunk[:100] + "..." if len(chunk) > 100 else chunk
+            })
+            index["documents"].append(chunk)
+            index["metadatas"].append(metadata)
+    return index
+
+
+def ingest(args) -> Path:
+    files, urls = collect_inputs(args.inputs)
+    if args.urls_file:
+        urls += [line.strip() for line in Path(args.urls_file).read_text(encoding="utf-8").splitlines()
+                 if line.strip() and not line.startswith("#")]
+    if not files and not urls:
+        raise ValueError("Nothing to ingest")
+
+    workers = args.workers or os.cpu_count() or 1
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    backend = resolve_backend(args.backend)
+    print(f"📦 {len(files)} file(s), {len(urls)} URL(s) → {args.out}")
+    print(f"🧩 {workers} worker(s) × {threads} thread(s), {args.model} on {backend}"
+          f"{' (int8)' if args.quantize else ''}")
+
+    with ProcessPoolExecutor(workers, mp_context=get_context("spawn"), initializer=_init_worker,
+                             initargs=(args.model, backend, args.quantize, threads)) as pool, \
+            ThreadPoolExecutor(8) as fetchers:
+        # Extract files on the worker processes while the URLs are fetched
+        start = time.perf_counter()
+        engine = resolve_engine(args.html_extractor)
+        file_jobs = [pool.submit(_extract_file, str(path)) for _, path in files]
+        url_jobs = [fetchers.submit(fetch_page, url, engine) for url in urls]
+
+        documents: Dict[str, List[Tuple[str, str]]] = {"pdf": [], "website": []}
+        for (name, _), job in zip(files, file_jobs):
+            content = job.result()
+            if not content or content.startswith("Error reading PDF"):
+                print(f"   ⚠️ Skipped {name}: {content[:100] or 'no text'}")
+                continue
+            documents["pdf"].append((name, content))
+        for url, job in zip(urls, url_jobs):
+            try:
+                content = job.result()
+            except Exception as e:
+                print(f"   ⚠️ Skipped {url}: {e}")
+                continue
+            if content:
+                documents["website"].append((url, content))
+        print(f"📄 Extracted {sum(len(d) for d in documents.values())} document(s) "
+              f"in {time.perf_counter() - start:.1f}s (including worker start-up)")
+
+        sources, insight_jobs, indexes = {}, {}, {}
+        for source, docs in documents.items():
+            if not docs:
+                continue
+            content = "\n\n".join(text for _, text in docs)
+            names = ", ".join(name for name, _ in docs)
+            sources[source] = ({'content': content, 'filename': names, 'loaded': True} if source == "pdf"
+                               else {'content': content, 'url': names, 'loaded': True})
+            insight_jobs[source] = pool.submit(extract_business_insights, content)
+            indexes[source] = chunk_documents(source, docs)
+
+        texts = [chunk for index in indexes.values() for chunk in index["documents"]]
+        if not texts:
+            raise ValueError("No text to index in the given inputs")
+
+        # Embed all chunks in batches spread over the workers
+        start = time.perf_counter()
+        batches = [texts[i:i + args.batch_size] for i in range(0, len(texts), args.batch_size)]
+        embeddings = np.vstack(list(pool.map(_embed_batch, batches)))
+        elapsed = time.perf_counter() - start
+        print(f"🧠 Embedded {len(texts)} chunks in {elapsed:.1f}s ({len(texts) / elapsed:.0f} chunks/s)")
+
+        row = 0
+        for source, index in indexes.items():
+            index["embeddings"] = embeddings[row:row + len(index["ids"])]
+            row += len(index["ids"])
+        insights = {source: job.result() for source, job in insight_jobs.items()}
+
+    manifest_documents = {
+        source: [{"name": name, "chars": len(text), "sha256": hashlib.sha256(text.encode("utf-8")).hexdigest()}
+                 for name, text in docs]
+        for source, docs in documents.items() if docs
+    }
+    embedding = {"model": args.model, "backend": backend, "quantize": args.quantize,
+                 "dimension": int(embeddings.shape[1])}
+    return write_snapshot(args.out, sources, insights, indexes, manifest_documents, embedding, keep=args.keep)
+
+
+def main():
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(APP_DIR / ".env")
+    except ImportError:
+        pass
+
+    parser = argparse.ArgumentParser(description="Build a catalog snapshot from PDFs, text files and URLs")
+    parser.add_argument("inputs", nargs="*", help="Files, directories (searched for .pdf/.txt/.md) and http(s) URLs")
+    parser.add_argument("--urls-file", help="File with one URL per line")
+    parser.add_argument("--out", default=os.getenv("KNOWLEDGE_BASE_SNAPSHOT") or "snapshots",
+                        help="Snapshot root (KNOWLEDGE_BASE_SNAPSHOT)")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Chunks per embedding task")
+    parser.add_argument("--keep", type=int, default=3, help="Snapshot versions to keep")
+    parser.add_argument("--model", default=os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2"), help="EMBEDDING_MODEL")
+    parser.add_argument("--backend", default=os.getenv("EMBEDDING_BACKEND", "torch"), help="EMBEDDING_BACKEND")
+    parser.add_argument("--quantize", action="store_true",
+                        default=os.getenv("EMBEDDING_QUANTIZE", "none").lower() == "int8", help="EMBEDDING_QUANTIZE=int8")
+    parser.add_argument("--html-extractor", default=os.getenv("HTML_EXTRACTOR", "auto"), help="HTML_EXTRACTOR")
+    args = parser.parse_args()
+    if not args.inputs and not args.urls_file:
+        parser.error("give at least one file, directory or URL")
+
+    try:
+        path = ingest(args)
+    except Exception as e:
+        print(f"❌ Ingestion failed: {e}")
+        sys.exit(1)
+    print(f"✅ Snapshot {path.name} written to {path}")
+    print(f"   Start the server with KNOWLEDGE_BASE_SNAPSHOT={args.out} to serve it")
+
+
+if __name__ == "__main__":
+    main()
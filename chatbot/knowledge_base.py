@@ -0,0 +1,452 @@
+"""
+Wolf AI - per-tenant knowledge bases with a memory budget
+
+- Every tenant (the JWT's tenant_id, falling back to user_id) gets its own
+  catalog/website content, page validators and Chroma collections
+- Knowledge bases stay resident while in use; when the estimated total passes
+  the memory budget, the least recently used idle ones are written to disk
+  (content as JSON, vectors as .npy so nothing is re-embedded) and dropped
+- A tenant that comes back is reloaded from disk on its next request
+- With several server processes (cluster mode), changes are written through to
+  disk when a request finishes, and a resident copy that another process has
+  since rewritten on disk is reloaded on its next use
+- Re-ingestion builds a shadow collection and swaps it in once complete; queries
+  hold a lease on the collection they search, so a replaced index is only
+  dropped after the last in-flight query on it finishes
+- With a catalog snapshot (catalog_snapshot.py), knowledge bases start from its
+  shared read-only indexes, and only what a tenant loads itself is theirs
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+log = logging.getLogger("wolfai.kb")
+
+SOURCES = ("pdf", "website")
+
+
+def empty_sources() -> dict:
+    return {
+        'pdf': {'content': '', 'filename': '', 'loaded': False},
+        'website': {'content': '', 'url': '', 'loaded': False}
+    }
+
+
+def disk_stamp(directory: Path) -> Optional[int]:
+    try:
+        return (directory / "state.json").stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+class KnowledgeBase:
+    """One tenant's sources, website page validators and vector collections"""
+
+    def __init__(self, tenant: str, chroma_client=None, embedding_dim: int = 384, catalog_snapshot=None):
+        self.tenant = tenant
+        self.key = hashlib.sha1(tenant.encode("utf-8")).hexdigest()[:16]
+        self.chroma_client = chroma_client
+        self.embedding_dim = embedding_dim
+        self.sources = empty_sources()
+        self.collections: Dict[str, object] = {source: None for source in SOURCES}
+        # url -> {'etag', 'last_modified', 'content_hash', 'content', 'fetched_at'}
+        self.website_pages: Dict[str, dict] = {}
+        self.insights: Dict[str, tuple] = {}  # source -> (content, business insights)
+        self.catalog_snapshot = catalog_snapshot
+        self.lock = threading.RLock()  # serializes website loads and refreshes
+        self._index_lock = threading.Lock()
+        self._readers: Dict[str, int] = {}  # collection name -> queries in flight
+        self._retired = set()  # replaced collections waiting for their readers to finish
+        self.ready = threading.Event()
+        self.active = 0  # requests currently using this knowledge base
+        self.version = 0
+        self.dirty = False  # changed since it was last written to disk
+        self.disk_stamp: Optional[int] = None  # mtime of the on-disk copy this one matches
+        self.size_bytes = 0
+        self.last_used = time.monotonic()
+        self.seed()
+
+    def seed(self, sources=SOURCES) -> None:
+        """Start sources from the catalog snapshot's content, insights and read-only indexes"""
+        if self.catalog_snapshot is None:
+            return
+        for source, data in self.catalog_snapshot.sources.items():
+            if source not in sources:
+                continue
+            self.sources[source] = dict(data)
+            self.insights[source] = (data['content'], self.catalog_snapshot.insights.get(source))
+            if source in self.catalog_snapshot.indexes:
+                self.swap_collection(source, self.catalog_snapshot.indexes[source])
+        self.size_bytes = self.estimate_bytes()
+
+    def is_seeded(self, source: str) -> bool:
+        """Whether source is still the snapshot's (shared, not counted against the budget)"""
+        return (self.catalog_snapshot is not None and source in self.catalog_snapshot.sources
+                and self.sources[source]['content'] is self.catalog_snapshot.sources[source]['content'])
+
+    def business_insights(self, source: str, extract: Callable[[str], dict]) -> dict:
+        """Insights for the source's current content, extracted once per content"""
+        content = self.sources[source]['content']
+        cached = self.insights.get(source)
+        if cached is not None and cached[1] is not None and cached[0] == content:
+            return cached[1]
+        insights = extract(content)
+        self.insights[source] = (content, insights)
+        return insights
+
+    def collection_name(self, source: str) -> str:
+        return f"{source}_documents_{self.key}"
+
+    def shadow_collection(self, source: str, metadata: Optional[dict] = None):
+        """New empty collection to build an index in without touching the live one"""
+        name = f"{self.collection_name(source)}_{uuid.uuid4().hex[:8]}"
+        return self.chroma_client.create_collection(name=name, metadata=metadata)
+
+    def swap_collection(self, source: str, collection) -> None:
+        """Make collection (or None) the live index; the old one is dropped once no query uses it"""
+        with self._index_lock:
+            old = self.collections[source]
+            self.collections[source] = collection
+            if old is None or old is collection or getattr(old, "read_only", False):
+                return
+            if self._readers.get(old.name):
+                self._retired.add(old.name)
+                return
+        self._drop(old.name)
+
+    def discard_collection(self, collection) -> None:
+        """Drop a shadow collection that was never swapped in (e.g. a failed rebuild)"""
+        if (collection is not None and not getattr(collection, "read_only", False)
+                and all(collection is not live for live in self.collections.values())):
+            self._drop(collection.name)
+
+    def has_index(self, source: str) -> bool:
+        """Whether source has a live collection right now (searches still take their own lease)"""
+        with self._index_lock:
+            return self.collections[source] is not None
+
+    @contextmanager
+    def reading(self, source: str):
+        """Lease the live collection for source (None if there is none) for the duration of a query"""
+        with self._index_lock:
+            collection = self.collections[source]
+            if collection is not None:
+                self._readers[collection.name] = self._readers.get(collection.name, 0) + 1
+        try:
+            yield collection
+        finally:
+            if collection is not None:
+                name = collection.name
+                drop = False
+                with self._index_lock:
+                    self._readers[name] -= 1
+                    if not self._readers[name]:
+                        del self._readers[name]
+                        drop = name in self._retired
+                        self._retired.discard(name)
+                if drop:
+                    self._drop(name)
+
+    def _drop(self, name: str) -> None:
+        try:
+            self.chroma_client.delete_collection(name=name)
+        except Exception as e:
+            log.warning("Could not drop collection %s: %s", name, e)
+
+    def mark_changed(self) -> None:
+        """Call after changing sources, pages or collections"""
+        self.version += 1
+        self.dirty = True
+        self.size_bytes = self.estimate_bytes()
+
+    def estimate_bytes(self) -> int:
+        text = sum(len(s['content']) for source, s in self.sources.items() if not self.is_seeded(source))
+        text += sum(len(p.get('content') or '') for p in self.website_pages.values())
+        chunks = 0
+        for collection in self.collections.values():
+            if collection is not None and not getattr(collection, "read_only", False):
+                try:
+                    chunks += collection.count()
+                except Exception:
+                    pass
+        # Raw text plus its chunked copy in the index, and per chunk a float32 vector
+        # stored alongside its HNSW graph entry
+        return int(text * 2.2) + chunks * self.embedding_dim * 8
+
+    def is_empty(self) -> bool:
+        """Nothing of its own: no sources, or exactly the snapshot's"""
+        if self.website_pages:
+            return False
+        for source, data in self.sources.items():
+            if self.catalog_snapshot is not None and source in self.catalog_snapshot.sources:
+                if not self.is_seeded(source):  # replaced or cleared
+                    return False
+            elif data['loaded']:
+                return False
+        return True
+
+    def describe(self) -> dict:
+        """This knowledge base's footprint, as its own tenant may see it"""
+        return {
+            "size_mb": round(self.size_bytes / 1024 ** 2, 2),
+            "seeded": [source for source in SOURCES if self.is_seeded(source)],
+            "catalog_snapshot": self.catalog_snapshot.version if self.catalog_snapshot is not None else None,
+        }
+
+    def drop_collections(self) -> None:
+        for source in SOURCES:
+            self.swap_collection(source, None)
+
+    def save(self, directory: Path) -> None:
+        """Write this knowledge base to directory, replacing any previous copy atomically"""
+        staging = directory.with_name(directory.name + ".tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+
+        # Sources still from the snapshot are stored as a reference to it, not copied
+        seeded = [source for source in SOURCES if self.is_seeded(source)]
+        indexed = []
+        for source in SOURCES:
+            if source in seeded:
+                continue
+            with self.reading(source) as collection:
+                if collection is None:
+                    continue
+                data = collection.get(include=["embeddings", "documents", "metadatas"])
+            if not data["ids"]:
+                continue
+            np.save(staging / f"{source}_embeddings.npy", np.asarray(data["embeddings"], dtype=np.float32))
+            (staging / f"{source}_index.json").write_text(json.dumps({
+                "ids": data["ids"], "documents": data["documents"], "metadatas": data["metadatas"]
+            }), encoding="utf-8")
+            indexed.append(source)
+
+        (staging / "state.json").write_text(json.dumps({
+            "tenant": self.tenant,
+            "sources": {source: empty_sources()[source] if source in seeded else data
+                        for source, data in self.sources.items()},
+            "website_pages": self.website_pages,
+            "indexed": indexed,
+            "seeded": seeded,
+            "saved_at": time.time(),
+        }), encoding="utf-8")
+
+        previous = directory.with_name(directory.name + ".old")
+        shutil.rmtree(previous, ignore_errors=True)
+        if directory.exists():
+            os.replace(directory, previous)
+        os.replace(staging, directory)
+        shutil.rmtree(previous, ignore_errors=True)
+        self.dirty = False
+        self.disk_stamp = disk_stamp(directory)
+
+    def load(self, directory: Path) -> None:
+        state = json.loads((directory / "state.json").read_text(encoding="utf-8"))
+        self.sources = state["sources"]
+        self.website_pages = state["website_pages"]
+        self.insights = {}
+        for source in SOURCES:
+            if source not in state.get("indexed", []) or self.chroma_client is None:
+                self.swap_collection(source, None)
+                continue
+            index = json.loads((directory / f"{source}_index.json").read_text(encoding="utf-8"))
+            embeddings = np.load(directory / f"{source}_embeddings.npy")
+            collection = self.shadow_collection(source)
+            collection.add(ids=index["ids"], documents=index["documents"],
+                           metadatas=index["metadatas"], embeddings=embeddings.tolist())
+            self.swap_collection(source, collection)
+        self.seed(state.get("seeded", []))
+        self.dirty = False
+        self.disk_stamp = disk_stamp(directory)
+        self.size_bytes = self.estimate_bytes()
+
+    def reset(self) -> None:
+        """Back to an empty knowledge base"""
+        self.drop_collections()
+        self.sources = empty_sources()
+        self.website_pages = {}
+        self.insights = {}
+        self.disk_stamp = None
+        self.size_bytes = self.estimate_bytes()
+        self.seed()
+
+
+class KnowledgeBaseStore:
+    """LRU cache of tenant knowledge bases under a memory budget, spilling idle ones to disk"""
+
+    def __init__(self, directory: Path, budget_bytes: int, chroma_client=None, embedding_dim: int = 384,
+                 on_access: Optional[Callable[[str, float], None]] = None,
+                 on_evict: Optional[Callable[[], None]] = None, write_through: bool = False,
+                 catalog_snapshot=None):
+        self.directory = Path(directory)
+        self.budget_bytes = budget_bytes
+        self.chroma_client = chroma_client
+        self.embedding_dim = embedding_dim
+        self.on_access = on_access
+        self.on_evict = on_evict
+        # Other processes share the directory: save on release, reload what they rewrote
+        self.write_through = write_through
+        self.catalog_snapshot = catalog_snapshot  # catalog every knowledge base starts from
+        self._resident: "OrderedDict[str, KnowledgeBase]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, kb: KnowledgeBase) -> Path:
+        return self.directory / kb.key
+
+    def acquire(self, tenant: str) -> KnowledgeBase:
+        """Pin a tenant's knowledge base in memory, loading it from disk if it was evicted"""
+        start = time.perf_counter()
+        with self._lock:
+            kb = self._resident.get(tenant)
+            if kb is not None:
+                kb.active += 1
+                kb.last_used = time.monotonic()
+                self._resident.move_to_end(tenant)
+                outcome = "hit"
+            else:
+                kb = KnowledgeBase(tenant, self.chroma_client, self.embedding_dim, self.catalog_snapshot)
+                kb.active = 1
+                self._resident[tenant] = kb
+                outcome = "load" if (self.directory / kb.key / "state.json").exists() else "new"
+
+        if outcome == "hit":
+            kb.ready.wait()
+            if self.write_through and self._revalidate(kb):
+                outcome = "reload"
+        else:
+            try:
+                if outcome == "load":
+                    kb.load(self._path(kb))
+                    log.info("Loaded knowledge base for tenant %s from disk", kb.key,
+                             extra={"size_kb": kb.size_bytes // 1024})
+            except Exception:
+                log.exception("Could not load knowledge base for tenant %s; starting empty", kb.key)
+                kb.reset()
+                outcome = "error"
+            finally:
+                kb.ready.set()
+
+        if self.on_access:
+            self.on_access(outcome, time.perf_counter() - start)
+        return kb
+
+    def _revalidate(self, kb: KnowledgeBase) -> bool:
+        """Reload kb if another process has rewritten (or removed) its copy on disk"""
+        path = self._path(kb)
+        if kb.dirty or disk_stamp(path) == kb.disk_stamp:
+            return False
+        with kb.lock:
+            stamp = disk_stamp(path)
+            if kb.dirty or stamp == kb.disk_stamp:
+                return False
+            try:
+                if stamp is None:
+                    kb.reset()
+                else:
+                    kb.load(path)
+            except Exception:
+                log.exception("Could not reload knowledge base for tenant %s", kb.key)
+                return False
+        log.info("Reloaded knowledge base for tenant %s changed by another process", kb.key)
+        return True
+
+    def _write_through(self, kb: KnowledgeBase) -> None:
+        with kb.lock:
+            if not kb.dirty:
+                return
+            try:
+                if kb.is_empty():
+                    shutil.rmtree(self._path(kb), ignore_errors=True)
+                    kb.dirty = False
+                    kb.disk_stamp = None
+                else:
+                    kb.save(self._path(kb))
+            except Exception:
+                log.exception("Could not write knowledge base for tenant %s to disk", kb.key)
+
+    def release(self, kb: KnowledgeBase) -> None:
+        with self._lock:
+            kb.active -= 1
+            kb.last_used = time.monotonic()
+            # Nothing worth keeping: forget it rather than hold an entry per user ever seen
+            forget = kb.active == 0 and kb.is_empty() and self._resident.get(kb.tenant) is kb
+            if forget:
+                del self._resident[kb.tenant]
+        if forget:
+            kb.drop_collections()
+            if kb.dirty:
+                shutil.rmtree(self._path(kb), ignore_errors=True)
+        elif self.write_through and kb.dirty:
+            self._write_through(kb)
+        self.enforce_budget()
+
+    def flush(self) -> None:
+        """Write every changed knowledge base to disk (on shutdown)"""
+        for kb in self.resident():
+            if kb.dirty and not kb.is_empty():
+                try:
+                    kb.save(self._path(kb))
+                except Exception:
+                    log.exception("Could not write knowledge base for tenant %s to disk", kb.key)
+
+    def resident(self) -> List[KnowledgeBase]:
+        with self._lock:
+            return list(self._resident.values())
+
+    def resident_bytes(self) -> int:
+        return sum(kb.size_bytes for kb in self.resident())
+
+    def enforce_budget(self) -> None:
+        """Evict idle knowledge bases, least recently used first, until under budget"""
+        skipped = set()
+        while True:
+            with self._lock:
+                if sum(kb.size_bytes for kb in self._resident.values()) <= self.budget_bytes:
+                    return
+                victim = next((kb for kb in self._resident.values()
+                               if kb.active == 0 and kb.ready.is_set() and kb.tenant not in skipped), None)
+                if victim is None:
+                    return
+                version = victim.version
+            skipped.add(victim.tenant)
+
+            try:
+                if victim.dirty and not victim.is_empty():
+                    victim.save(self._path(victim))
+                elif victim.is_empty():
+                    shutil.rmtree(self._path(victim), ignore_errors=True)
+            except Exception:
+                log.exception("Could not write knowledge base for tenant %s to disk", victim.key)
+                continue
+
+            with self._lock:
+                # Someone picked it up (or changed it) while it was being written: keep it
+                if victim.active or victim.version != version or self._resident.get(victim.tenant) is not victim:
+                    continue
+                del self._resident[victim.tenant]
+            victim.drop_collections()
+            log.info("Evicted knowledge base for tenant %s", victim.key, extra={"size_kb": victim.size_bytes // 1024})
+            if self.on_evict:
+                self.on_evict()
+
+    def snapshot(self) -> dict:
+        resident = self.resident()
+        return {
+            "resident": len(resident),
+            "resident_mb": round(sum(kb.size_bytes for kb in resident) / 1024 ** 2, 2),
+            "budget_mb": round(self.budget_bytes / 1024 ** 2, 2),
+            "in_use": sum(1 for kb in resident if kb.active),
+            "catalog_snapshot": self.catalog_snapshot.describe() if self.catalog_snapshot is not None else None,
+        }
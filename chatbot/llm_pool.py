@@ -0,0 +1,296 @@
+"""
+Wolf AI - pooled LLM clients with load balancing and circuit breaking
+
+- Several Groq keys and/or OpenAI-compatible endpoints (e.g. a local stand-in)
+  behind one request() call
+- Each call goes to the endpoint with the best mix of remaining quota (from the
+  x-ratelimit-* response headers), smoothed latency and requests in flight
+- 429s park that endpoint for the model until its quota resets; timeouts, 5xx and
+  connection errors count towards a circuit breaker that takes the endpoint out
+  of rotation until a background probe succeeds
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Callable, Dict, List, Optional
+
+from groq import AsyncGroq
+
+try:
+    from openai import AsyncOpenAI
+    openai_available = True
+except ImportError:
+    openai_available = False
+
+log = logging.getLogger("wolfai.llm")
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """Seconds from a rate-limit reset header such as "2m59.56s", "7.66s" or "120ms" """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        parts = _DURATION_PART.findall(value)
+        return sum(float(n) * _UNIT_SECONDS[u] for n, u in parts) if parts else None
+
+
+def classify_error(error: Exception) -> str:
+    """rate_limit | timeout | unavailable | error"""
+    if isinstance(error, LLMPoolExhausted):
+        return error.reason
+    if getattr(error, "status_code", None) == 429:
+        return "rate_limit"
+    if "Timeout" in type(error).__name__:
+        return "timeout"
+    return "error"
+
+
+class LLMPoolExhausted(Exception):
+    """No endpoint can take the request right now"""
+
+    def __init__(self, model: str, reason: str, retry_after: Optional[float] = None):
+        super().__init__(f"No LLM endpoint available for {model} ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Endpoint:
+    """One API key at one base URL, with its quota, latency and circuit state"""
+
+    def __init__(self, name: str, client, failure_threshold: int, open_seconds: float):
+        self.name = name
+        self.client = client
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.latency = None  # EWMA of seconds to response
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0  # circuit is open while > 0; probes start once it has passed
+        self.quota: Dict[str, dict] = {}  # model -> {'fraction', 'reset_at', 'limited_until'}
+
+    @property
+    def circuit_open(self) -> bool:
+        return self.open_until > 0
+
+    def limited_until(self, model: str) -> float:
+        return self.quota.get(model, {}).get("limited_until", 0.0)
+
+    def quota_fraction(self, model: str, now: float) -> float:
+        quota = self.quota.get(model)
+        if not quota or now >= quota["reset_at"]:
+            return 1.0
+        return quota["fraction"]
+
+    def score(self, model: str, now: float) -> float:
+        """Lower is better: slow, busy or nearly exhausted endpoints are avoided"""
+        # Unmeasured endpoints go first so every endpoint gets a latency sample
+        latency = self.latency if self.latency is not None else 0.0
+        return latency * (1 + self.in_flight) / max(self.quota_fraction(model, now), 0.05)
+
+    def update_quota(self, model: str, headers) -> None:
+        fractions = []
+        resets = []
+        for kind in ("requests", "tokens"):
+            limit = headers.get(f"x-ratelimit-limit-{kind}")
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if limit and remaining:
+                try:
+                    fractions.append(float(remaining) / max(float(limit), 1.0))
+                except ValueError:
+                    continue
+                resets.append(parse_reset(headers.get(f"x-ratelimit-reset-{kind}")) or 60.0)
+        if not fractions:
+            return
+        now = time.monotonic()
+        fraction = min(fractions)
+        self.quota[model] = {
+            "fraction": fraction,
+            "reset_at": now + max(resets),
+            # Out of quota: don't bother sending anything until it resets
+            "limited_until": now + min(resets) if fraction <= 0 else 0.0,
+        }
+
+    def mark_rate_limited(self, model: str, seconds: float) -> None:
+        now = time.monotonic()
+        self.quota[model] = {"fraction": 0.0, "reset_at": now + seconds, "limited_until": now + seconds}
+
+    def record_success(self, seconds: float) -> None:
+        self.latency = seconds if self.latency is None else 0.8 * self.latency + 0.2 * seconds
+        self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if not self.circuit_open and self.consecutive_failures >= self.failure_threshold:
+            self.open_until = time.monotonic() + self.open_seconds
+            log.warning("Circuit opened for LLM endpoint %s after %d failures",
+                        self.name, self.consecutive_failures)
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        return {
+            "circuit": "open" if self.circuit_open else "closed",
+            "in_flight": self.in_flight,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "consecutive_failures": self.consecutive_failures,
+            "quota": {model: round(self.quota_fraction(model, now), 3) for model in self.quota},
+        }
+
+
+class LLMClientPool:
+    def __init__(self, endpoints: List[Endpoint], rate_limit_seconds: float = 20.0,
+                 on_result: Optional[Callable[[str, str, float], None]] = None):
+        if not endpoints:
+            raise ValueError("LLM client pool needs at least one endpoint")
+        self.endpoints = endpoints
+        self.rate_limit_seconds = rate_limit_seconds
+        self.on_result = on_result
+
+    def _candidates(self, model: str) -> List[Endpoint]:
+        now = time.monotonic()
+        usable = [e for e in self.endpoints if not e.circuit_open and e.limited_until(model) <= now]
+        return sorted(usable, key=lambda e: e.score(model, now))
+
+    def _exhausted(self, model: str) -> LLMPoolExhausted:
+        now = time.monotonic()
+        closed = [e for e in self.endpoints if not e.circuit_open]
+        if closed:
+            return LLMPoolExhausted(model, "rate_limit", max(0.0, min(e.limited_until(model) for e in closed) - now))
+        return LLMPoolExhausted(model, "unavailable", max(0.0, min(e.open_until for e in self.endpoints) - now))
+
+    def available(self, model: str) -> bool:
+        return bool(self._candidates(model))
+
+    def _report(self, endpoint: Endpoint, outcome: str, seconds: float) -> None:
+        if self.on_result:
+            self.on_result(endpoint.name, outcome, seconds)
+
+    async def request(self, resource: str, model: str, **kwargs):
+        """Call e.g. resource="chat.completions" on the best endpoint, failing over to the others"""
+        last_error = None
+        for endpoint in self._candidates(model):
+            api = endpoint.client
+            for part in resource.split("."):
+                api = getattr(api, part)
+
+            start = time.perf_counter()
+            endpoint.in_flight += 1
+            streaming = False
+            try:
+                raw = await api.with_raw_response.create(model=model, **kwargs)
+                endpoint.update_quota(model, raw.headers)
+                result = await raw.parse()
+                seconds = time.perf_counter() - start
+                endpoint.record_success(seconds)
+                self._report(endpoint, "success", seconds)
+                if kwargs.get("stream"):
+                    streaming = True
+                    return self._track_stream(endpoint, result)
+                return result
+
+            except Exception as e:
+                last_error = e
+                seconds = time.perf_counter() - start
+                status = getattr(e, "status_code", None)
+                if status == 429:
+                    response = getattr(e, "response", None)
+                    retry_after = parse_reset(response.headers.get("retry-after")) if response is not None else None
+                    endpoint.mark_rate_limited(model, retry_after or self.rate_limit_seconds)
+                    self._report(endpoint, "rate_limited", seconds)
+                elif status in (400, 413, 422):
+                    # The request itself is bad; another endpoint won't accept it either
+                    self._report(endpoint, "rejected", seconds)
+                    raise
+                elif status == 404:
+                    # This endpoint doesn't serve the model
+                    self._report(endpoint, "rejected", seconds)
+                elif classify_error(e) == "timeout":
+                    # Slowness is usually the model's, so let the caller fall back to
+                    # another model rather than wait out the timeout on every endpoint
+                    endpoint.record_failure()
+                    self._report(endpoint, "timeout", seconds)
+                    raise
+                else:
+                    endpoint.record_failure()
+                    self._report(endpoint, "error", seconds)
+                log.warning("LLM endpoint %s failed for %s: %s", endpoint.name, model, e)
+            finally:
+                if not streaming:
+                    endpoint.in_flight -= 1
+
+        if last_error is not None:
+            raise last_error
+        raise self._exhausted(model)
+
+    async def _track_stream(self, endpoint: Endpoint, stream):
+        try:
+            async for chunk in stream:
+                yield chunk
+        except Exception:
+            endpoint.record_failure()
+            raise
+        finally:
+            endpoint.in_flight -= 1
+            # Closing the response stops the upstream generation when the reader stops early
+            await stream.close()
+
+    async def probe(self, endpoint: Endpoint) -> bool:
+        """Close an open circuit if the endpoint answers a cheap request"""
+        try:
+            await endpoint.client.models.list(timeout=5)
+        except Exception as e:
+            endpoint.open_until = time.monotonic() + endpoint.open_seconds
+            log.info("Probe of LLM endpoint %s failed: %s", endpoint.name, e)
+            return False
+        endpoint.open_until = 0.0
+        endpoint.consecutive_failures = 0
+        log.info("Circuit closed for LLM endpoint %s", endpoint.name)
+        return True
+
+    async def probe_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            due = [e for e in self.endpoints if e.circuit_open and e.open_until <= now]
+            if due:
+                await asyncio.gather(*(self.probe(e) for e in due))
+
+    def snapshot(self) -> dict:
+        return {e.name: e.snapshot() for e in self.endpoints}
+
+
+def build_endpoints(groq_keys: List[str], extra: str, failure_threshold: int,
+                    open_seconds: float) -> List[Endpoint]:
+    """Groq endpoints for each key, plus "kind|base_url|api_key" entries separated by ';'"""
+    endpoints = []
+
+    def add(kind: str, client, key: str):
+        suffix = f"…{key[-4:]}" if key and len(key) > 8 else ""
+        name = f"{kind}-{len(endpoints) + 1}{suffix}"
+        endpoints.append(Endpoint(name, client, failure_threshold, open_seconds))
+
+    for key in groq_keys:
+        add("groq", AsyncGroq(api_key=key, max_retries=0), key)
+
+    for item in extra.split(";"):
+        if not item.strip():
+            continue
+        kind, base_url, key = (item.split("|") + ["", ""])[:3]
+        kind, base_url, key = kind.strip().lower(), base_url.strip(), key.strip() or "none"
+        if kind == "groq":
+            add(kind, AsyncGroq(api_key=key, base_url=base_url, max_retries=0), key)
+        elif kind == "openai":
+            if not openai_available:
+                log.warning("Skipping OpenAI-compatible endpoint %s: the openai package is not installed", base_url)
+                continue
+            add(kind, AsyncOpenAI(api_key=key, base_url=base_url, max_retries=0), key)
+        else:
+            log.warning("Skipping LLM endpoint with unknown kind %r", kind)
+
+    return endpoints
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Replay mixed Wolf AI traffic at a fixed concurrency and report capacity numbers
+
+Each virtual user logs in as a seeded account, then loops over weighted
+operations (login, chat, upload, voice) until the run ends. Reports throughput,
+p50/p95/p99 latency and error rate per operation.
+
+Usage:
+    python loadtest/driver.py --concurrency 25 --duration 60 --mix chat=6,voice=2,login=1,upload=0.2
+    python loadtest/driver.py --requests 500 --json results.json
+
+Typical offline setup:
+    python loadtest/stub_groq.py &
+    python loadtest/seed_users.py --users 100
+    GROQ_BASE_URL=http://127.0.0.1:9100 GROQ_API_KEY=stub python fastapi_app_fixed.py
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import math
+import random
+import struct
+import sys
+import time
+import wave
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from seed_users import LOADTEST_PASSWORD, loadtest_email  # noqa: E402
+
+CATALOG_PDF = Path(__file__).resolve().parent.parent / "wolf_ai_product_catalog.pdf"
+
+QUESTIONS = [
+    "What does the Strategic Planning Assistant cost?",
+    "Compare Financial Analytics Pro with the Market Intelligence Dashboard.",
+    "Which product is best for a mid-market sales organization and why?",
+    "What ROI can a CFO expect from Financial Analytics Pro?",
+    "Give me a SWOT analysis of your product line for the retail sector.",
+    "How does pricing scale for larger teams?",
+    "What features help with competitor tracking?",
+    "Explain how the suite improves operational efficiency.",
+]
+
+
+def synth_voice_note(seconds: float = 3.0, rate: int = 16000) -> bytes:
+    """A short tone-and-pause WAV; the stub transcriber ignores the content"""
+    frames = bytearray()
+    for i in range(int(seconds * rate)):
+        t = i / rate
+        amplitude = 6000 if int(t * 2) % 2 == 0 else 0
+        frames += struct.pack('<h', int(amplitude * math.sin(2 * math.pi * 220 * t)))
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(rate)
+        out.writeframes(bytes(frames))
+    return buffer.getvalue()
+
+
+def parse_mix(spec: str) -> dict:
+    mix = {}
+    for item in spec.split(","):
+        name, weight = item.split("=")
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - {"login", "chat", "upload", "voice"}
+    if unknown:
+        raise SystemExit(f"Unknown operations in --mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.status_codes = defaultdict(lambda: defaultdict(int))
+
+    def record(self, op: str, seconds: float, status: int, ok: bool):
+        self.latencies[op].append(seconds)
+        self.status_codes[op][status] += 1
+        if not ok:
+            self.errors[op] += 1
+
+
+class VirtualUser:
+    def __init__(self, index: int, client: httpx.AsyncClient, recorder: Recorder, users: int,
+                 voice_note: bytes, pdf_bytes: bytes):
+        self.index = index
+        self.client = client
+        self.recorder = recorder
+        self.email = loadtest_email(index % users)
+        self.session_id = f"loadtest-{index}"
+        self.voice_note = voice_note
+        self.pdf_bytes = pdf_bytes
+        self.token = None
+
+    @property
+    def headers(self):
+        return {"Authorization": f"Bearer {self.token}"} if self.token else {}
+
+    async def timed(self, op: str, request):
+        start = time.perf_counter()
+        status = 0
+        try:
+            response = await request
+            status = response.status_code
+            ok = response.status_code < 400 and response.json().get("success", True) is not False
+            return response if ok else None
+        except (httpx.HTTPError, ValueError):
+            ok = False
+            return None
+        finally:
+            self.recorder.record(op, time.perf_counter() - start, status, ok)
+
+    async def login(self):
+        response = await self.timed("login", self.client.post(
+            "/api/login", json={"email": self.email, "password": LOADTEST_PASSWORD}))
+        if response is not None:
+            self.token = response.json()["token"]
+
+    async def chat(self):
+        await self.timed("chat", self.client.post(
+            "/api/chat", headers=self.headers,
+            json={"message": random.choice(QUESTIONS), "session_id": self.session_id}))
+
+    async def upload(self):
+        await self.timed("upload", self.client.post(
+            "/api/load_pdf", headers=self.headers,
+            files={"pdf": ("catalog.pdf", self.pdf_bytes, "application/pdf")}))
+
+    async def voice(self):
+        await self.timed("voice", self.client.post(
+            "/api/voice-chat", headers=self.headers,
+            data={"session_id": self.session_id},
+            files={"audio": ("voice.wav", self.voice_note, "audio/wav")}))
+
+
+async def run(args) -> dict:
+    mix = parse_mix(args.mix)
+    operations, weights = zip(*mix.items())
+    recorder = Recorder()
+    voice_note = synth_voice_note()
+    pdf_bytes = CATALOG_PDF.read_bytes() if CATALOG_PDF.exists() else b"%PDF-1.4\n"
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    timeout = httpx.Timeout(args.timeout)
+    deadline = time.perf_counter() + args.duration if args.duration else None
+    remaining = [args.requests] if args.requests else None
+
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout) as client:
+        async def worker(index: int):
+            user = VirtualUser(index, client, recorder, args.users, voice_note, pdf_bytes)
+            await user.login()
+            while True:
+                if deadline and time.perf_counter() >= deadline:
+                    return
+                if remaining is not None:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+                op = random.choices(operations, weights)[0]
+                if op != "login" and not user.token:
+                    op = "login"
+                await getattr(user, op)()
+                if args.think_ms:
+                    await asyncio.sleep(random.uniform(0, args.think_ms) / 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    summary = {"elapsed_s": round(elapsed, 2), "concurrency": args.concurrency, "operations": {}}
+    all_latencies, total_errors = [], 0
+    for op, latencies in sorted(recorder.latencies.items()):
+        all_latencies.extend(latencies)
+        total_errors += recorder.errors[op]
+        summary["operations"][op] = {
+            "requests": len(latencies),
+            "throughput_rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+            "error_rate": round(recorder.errors[op] / len(latencies), 4),
+            "status_codes": dict(recorder.status_codes[op]),
+        }
+    summary["total"] = {
+        "requests": len(all_latencies),
+        "throughput_rps": round(len(all_latencies) / elapsed, 2),
+        "p50_ms": round(percentile(all_latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(all_latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(all_latencies, 99) * 1000, 1),
+        "error_rate": round(total_errors / len(all_latencies), 4) if all_latencies else 0.0,
+    }
+    return summary
+
+
+def print_summary(summary: dict):
+    print(f"\n📊 {summary['total']['requests']} requests in {summary['elapsed_s']}s "
+          f"at concurrency {summary['concurrency']}")
+    print(f"   {'operation':<10} {'requests':>9} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>8}")
+    rows = list(summary["operations"].items()) + [("TOTAL", summary["total"])]
+    for op, r in rows:
+        print(f"   {op:<10} {r['requests']:>9} {r['throughput_rps']:>8.1f} {r['p50_ms']:>9.1f} "
+              f"{r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['error_rate'] * 100:>7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wolf AI load-test driver")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run (0 = use --requests)")
+    parser.add_argument("--requests", type=int, default=0, help="Total operations across all users")
+    parser.add_argument("--mix", default="chat=6,voice=2,login=1,upload=0.2")
+    parser.add_argument("--users", type=int, default=100, help="Number of seeded accounts to rotate through")
+    parser.add_argument("--think-ms", type=float, default=0, help="Max random pause between operations")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--json", help="Write the summary to this file")
+    args = parser.parse_args()
+
+    if args.requests:
+        args.duration = 0
+
+    summary = asyncio.run(run(args))
+    print_summary(summary)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(summary, indent=2))
+        print(f"\n✅ Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
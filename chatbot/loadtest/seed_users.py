@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Seed MongoDB with load-test accounts
+
+Creates (or refreshes) loadtest+<n>@example.com users that share one known
+password, so the driver can log in as many distinct users. Use a throwaway
+database via MONGO_URI - the accounts are real documents.
+
+Usage:
+    python loadtest/seed_users.py --users 200
+    python loadtest/seed_users.py --remove
+"""
+
+import argparse
+import os
+from datetime import datetime
+
+from dotenv import load_dotenv
+from pymongo import MongoClient, UpdateOne
+from werkzeug.security import generate_password_hash
+
+LOADTEST_PASSWORD = "loadtest-password"
+EMAIL_TEMPLATE = "loadtest+{}@example.com"
+
+
+def loadtest_email(index: int) -> str:
+    return EMAIL_TEMPLATE.format(index)
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Seed load-test users into MongoDB")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--mongo-uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017/"))
+    parser.add_argument("--remove", action="store_true", help="Delete all load-test users instead")
+    args = parser.parse_args()
+
+    users = MongoClient(args.mongo_uri).wolfai_chatbot.users
+
+    if args.remove:
+        result = users.delete_many({"email": {"$regex": r"^loadtest\+\d+@example\.com$"}})
+        print(f"🧹 Removed {result.deleted_count} load-test users")
+        return
+
+    # Every account shares the password, so hash it once
+    password_hash = generate_password_hash(LOADTEST_PASSWORD)
+    operations = [
+        UpdateOne(
+            {"email": loadtest_email(i)},
+            {"$set": {"name": f"Load Test {i}", "password": password_hash},
+             "$setOnInsert": {"created_at": datetime.now()}},
+            upsert=True
+        )
+        for i in range(args.users)
+    ]
+    result = users.bulk_write(operations, ordered=False)
+    print(f"✅ Seeded {args.users} load-test users "
+          f"({result.upserted_count} created, {result.modified_count} updated)")
+    print(f"   Password for all accounts: {LOADTEST_PASSWORD}")
+
+
+if __name__ == "__main__":
+    main()
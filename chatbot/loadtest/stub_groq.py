@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Groq API used by load tests
+
+Serves the OpenAI-compatible chat completion (plain and streamed) and audio
+transcription endpoints with configurable latency, streaming speed and 429
+injection, so capacity runs never touch real Groq quota.
+
+Usage:
+    python loadtest/stub_groq.py --port 9100 --ttft-ms 300 --tokens-per-sec 250 --rate-limit-ratio 0.05
+
+Point the app at it with:
+    GROQ_BASE_URL=http://127.0.0.1:9100 GROQ_API_KEY=stub python fastapi_app_fixed.py
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+SAMPLE_ANSWER = (
+    "## Recommendation\n\nBased on the catalog, the Strategic Planning Assistant at $299 per month "
+    "fits teams that need SWOT automation and competitive intelligence. For finance-heavy use cases, "
+    "Financial Analytics Pro at $499 adds ROI modelling and cash flow projections.\n\n"
+    "### Next steps\n- Start a 14-day trial\n- Map current planning workflow\n- Review ROI after 30 days"
+)
+
+config = argparse.Namespace(
+    ttft_ms=300, jitter_ms=100, tokens_per_sec=250.0, response_tokens=300,
+    rate_limit_ratio=0.0, transcribe_ms=600, rate_limit_models=""
+)
+stats = {"chat": 0, "chat_stream": 0, "transcriptions": 0, "rate_limited": 0}
+
+app = FastAPI(title="Groq stub")
+
+
+def _jittered(ms: float) -> float:
+    return max(0.0, ms + random.uniform(-config.jitter_ms, config.jitter_ms)) / 1000
+
+
+def _answer_tokens(max_tokens: int):
+    words = SAMPLE_ANSWER.split(" ")
+    count = min(config.response_tokens, max_tokens or config.response_tokens)
+    return [(words[i % len(words)] + " ") for i in range(count)]
+
+
+def _rate_limited(model: str = "") -> bool:
+    if model and model in config.rate_limit_models.split(","):
+        stats["rate_limited"] += 1
+        return True
+    if config.rate_limit_ratio and random.random() < config.rate_limit_ratio:
+        stats["rate_limited"] += 1
+        return True
+    return False
+
+
+def _rate_limit_response() -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        headers={"retry-after": "1"},
+        content={"error": {
+            "message": "Rate limit reached for model in organization on tokens per minute (stub)",
+            "type": "tokens",
+            "code": "rate_limit_exceeded"
+        }}
+    )
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "stub-model")
+    if _rate_limited(model):
+        return _rate_limit_response()
+
+    tokens = _answer_tokens(body.get("max_tokens", 0))
+    prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in body.get("messages", []))
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    created = int(time.time())
+
+    if not body.get("stream"):
+        stats["chat"] += 1
+        await asyncio.sleep(_jittered(config.ttft_ms) + len(tokens) / config.tokens_per_sec)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens).strip()},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(tokens),
+                "total_tokens": prompt_tokens + len(tokens)
+            }
+        }
+
+    stats["chat_stream"] += 1
+
+    async def events():
+        def chunk(delta: dict, finish_reason=None) -> str:
+            return "data: " + json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }) + "\n\n"
+
+        await asyncio.sleep(_jittered(config.ttft_ms))
+        yield chunk({"role": "assistant", "content": ""})
+        for token in tokens:
+            yield chunk({"content": token})
+            await asyncio.sleep(1 / config.tokens_per_sec)
+        yield chunk({}, finish_reason="stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/openai/v1/audio/transcriptions")
+async def transcriptions(request: Request):
+    form = await request.form()
+    upload = form.get("file")
+    size = len(await upload.read()) if upload is not None else 0
+    if _rate_limited():
+        return _rate_limit_response()
+
+    stats["transcriptions"] += 1
+    # Longer uploads take proportionally longer, like the real service
+    await asyncio.sleep(_jittered(config.transcribe_ms) + size / 2_000_000)
+    return {"text": "What is the price of the Strategic Planning Assistant and what ROI can we expect?"}
+
+
+@app.get("/openai/v1/models")
+async def models():
+    return {"object": "list", "data": [{"id": "stub-model", "object": "model", "owned_by": "stub"}]}
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Groq API stub for load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--ttft-ms", type=float, default=300, help="Time to first token")
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--tokens-per-sec", type=float, default=250)
+    parser.add_argument("--response-tokens", type=int, default=300)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="Fraction of calls answered with 429")
+    parser.add_argument("--transcribe-ms", type=float, default=600)
+    parser.add_argument("--rate-limit-models", default="", help="Comma-separated models that always get 429")
+    args = parser.parse_args()
+
+    for key in vars(config):
+        setattr(config, key, getattr(args, key))
+
+    print(f"🧪 Groq stub listening on http://{args.host}:{args.port} "
+          f"(ttft {args.ttft_ms}ms, {args.tokens_per_sec} tok/s, 429 ratio {args.rate_limit_ratio})")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -222,7 +222,7 @@ const ChatDashboard = () => {
             })
             
             if (audioBlob.size > 0) {
-              await handleSpeechToText(audioBlob)
+              await handleVoiceChat(audioBlob)
             } else {
               toast.error('No audio data recorded. Please try again.')
             }
@@ -256,17 +256,36 @@ const ChatDashboard = () => {
     }
   }
 
-  const handleSpeechToText = async (audioBlob) => {
+  const handleVoiceChat = async (audioBlob) => {
+    setIsLoading(true)
+
     try {
-      const response = await speechAPI.speechToText(audioBlob)
-      
-      if (response.data.success && response.data.text) {
-        setInputMessage(response.data.text)
-        toast.success('Speech converted to text!')
+      // Transcription and the answer come back in a single request
+      const response = await speechAPI.voiceChat(audioBlob, sessionId)
+
+      if (response.data.success && response.data.transcript) {
+        const userMessage = {
+          role: 'user',
+          content: response.data.transcript,
+          timestamp: new Date().toISOString()
+        }
+        const assistantMessage = {
+          role: 'assistant',
+          content: response.data.response,
+          timestamp: response.data.timestamp,
+          sources: response.data.loaded_sources
+        }
+
+        setMessages(prev => [...prev, userMessage, assistantMessage])
+        await loadStatus() // Refresh status
+      } else {
+        toast.error(response.data.error || 'No speech detected in audio')
       }
     } catch (error) {
-      const errorMessage = error.response?.data?.detail || 'Speech recognition failed'
+      const errorMessage = error.response?.data?.detail || 'Voice chat failed'
       toast.error(errorMessage)
+    } finally {
+      setIsLoading(false)
     }
   }
 
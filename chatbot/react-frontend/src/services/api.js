@@ -1,9 +1,11 @@
 import axios from 'axios'
 
+const REQUEST_TIMEOUT_MS = 30000
+
 // Create axios instance with base configuration
 export const api = axios.create({
   baseURL: 'http://localhost:8000',
-  timeout: 30000,
+  timeout: REQUEST_TIMEOUT_MS,
   headers: {
     'Content-Type': 'application/json',
   },
@@ -16,6 +18,11 @@ api.interceptors.request.use(
     if (token) {
       config.headers.Authorization = `Bearer ${token}`
     }
+    // Lets the backend give up on work we will no longer wait for; calls without a
+    // client timeout (batches) leave the deadline to the server
+    if (config.timeout) {
+      config.headers['X-Request-Timeout'] = String(config.timeout / 1000)
+    }
     return config
   },
   (error) => {
@@ -47,6 +54,9 @@ export const authAPI = {
 export const chatAPI = {
   sendMessage: (message, sessionId = 'default') => 
     api.post('/api/chat', { message, session_id: sessionId }),
+  // NDJSON results of the whole batch; the server bounds it with its batch deadline
+  askBatch: (questions, { sessionIds, concurrency } = {}) =>
+    api.post('/api/chat/batch', { questions, session_ids: sessionIds, concurrency }, { timeout: 0 }),
   getStatus: () => api.get('/api/status'),
   clearSource: (sourceType = 'all') => 
     api.post('/api/clear_source', { source_type: sourceType }),
@@ -72,6 +82,14 @@ export const speechAPI = {
     })
   },
   textToSpeech: (text) => api.post('/api/text-to-speech', { text }),
+  voiceChat: (audioFile, sessionId = 'default') => {
+    const formData = new FormData()
+    formData.append('audio', audioFile)
+    formData.append('session_id', sessionId)
+    return api.post('/api/voice-chat', formData, {
+      headers: { 'Content-Type': 'multipart/form-data' }
+    })
+  },
 }
 
 export default api
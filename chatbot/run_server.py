@@ -1,15 +1,18 @@
 #!/usr/bin/env python3
 """
 Server Management Script for Wolf AI FastAPI Backend
+
+Runs the backend in the foreground as a cluster of SERVER_WORKERS workers (see cluster.py)
 """
 import subprocess
 import sys
 import time
-import signal
 import psutil
 import os
 from pathlib import Path
 
+from cluster import cluster_state, request_control
+
 def find_python_processes_on_port(port=8000):
     """Find Python processes using the specified port"""
     processes = []
@@ -17,17 +20,32 @@ def find_python_processes_on_port(port=8000):
         try:
             if proc.info['name'] and 'python' in proc.info['name'].lower():
                 cmdline = ' '.join(proc.info['cmdline'] or [])
-                if f':{port}' in cmdline or 'fastapi' in cmdline.lower() or 'uvicorn' in cmdline.lower():
+                if (f':{port}' in cmdline or 'fastapi' in cmdline.lower() or 'uvicorn' in cmdline.lower()
+                        or 'cluster.py' in cmdline):
                     processes.append(proc)
         except (psutil.NoSuchProcess, psutil.AccessDenied):
             continue
     return processes
 
+def stop_existing_cluster():
+    """Ask a running cluster supervisor to drain its workers and exit"""
+    state = cluster_state()
+    if not state or not psutil.pid_exists(state['supervisor_pid']):
+        return
+    print(f"Found a running cluster (supervisor {state['supervisor_pid']}, {len(state['workers'])} workers). Draining...")
+    request_control("stop")
+    try:
+        psutil.Process(state['supervisor_pid']).wait(timeout=int(os.getenv("SERVER_DRAIN_SECONDS", "30")) + 15)
+    except (psutil.NoSuchProcess, psutil.TimeoutExpired):
+        pass
+
 def kill_existing_servers():
     """Kill any existing FastAPI/Python servers"""
     print("🔍 Checking for existing server processes...")
     
-    processes = find_python_processes_on_port(8000)
+    port = int(os.getenv("SERVER_PORT", "8000"))
+    stop_existing_cluster()
+    processes = find_python_processes_on_port(port)
     
     if processes:
         print(f"Found {len(processes)} existing server process(es). Terminating...")
@@ -50,13 +68,15 @@ def start_server():
     """Start the FastAPI server"""
     script_dir = Path(__file__).parent
     app_file = script_dir / "fastapi_app_fixed.py"
+    cluster_file = script_dir / "cluster.py"
     
     if not app_file.exists():
         print(f"❌ Error: {app_file} not found!")
         return False
     
     print("🚀 Starting Wolf AI FastAPI server...")
-    print("📍 URL: http://localhost:8000")
+    print(f"📍 URL: http://localhost:{os.getenv('SERVER_PORT', '8000')}")
+    print(f"🧩 Workers: {os.getenv('SERVER_WORKERS', '1')} (SERVER_WORKERS)")
     print("⚡ Press Ctrl+C to stop the server")
     print("-" * 50)
     
@@ -65,9 +85,9 @@ def start_server():
         os.chdir(script_dir)
         
         # Start the server
-        result = subprocess.run([
+        subprocess.run([
             sys.executable, 
-            str(app_file)
+            str(cluster_file)
         ], check=True)
         
         return True
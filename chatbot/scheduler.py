@@ -0,0 +1,189 @@
+"""
+Wolf AI - fair-share scheduling of the expensive pipeline stages
+
+- Each stage (embedding, vector_search, llm) has a fixed number of slots
+- Work waiting for a slot is queued per (user, priority) flow and granted in
+  start-time fair queueing order: a flow's virtual clock advances by
+  cost / weight for every grant, so one user's burst of work can't delay other
+  users, and higher-weight priorities (interactive chat) get proportionally more
+  of the stage than ingestion or batch jobs without starving them
+- Async code uses `async with scheduler.slot(...)`; worker threads (embedding,
+  vector search) use `with scheduler.slot_blocking(...)`, which waits on the
+  event loop the scheduler was bound to
+"""
+
+import asyncio
+import concurrent.futures
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+log = logging.getLogger("wolfai.scheduler")
+
+PRIORITIES = ("interactive", "ingestion", "batch")
+
+
+class SlotTimeout(TimeoutError):
+    """No slot was granted before the caller's timeout"""
+
+
+class _Stage:
+    def __init__(self, name: str, capacity: int):
+        self.name = name
+        self.capacity = capacity
+        self.in_use = 0
+        self.vtime = 0.0
+        self.finish: Dict[Tuple[str, str], float] = {}  # flow -> virtual finish time of its last grant
+        self.waiting = []  # heap of [start_tag, seq, future, flow]
+        self.queued: Dict[str, int] = {p: 0 for p in PRIORITIES}
+
+    def tag(self, flow: Tuple[str, str], cost: float, weight: float) -> float:
+        start = max(self.vtime, self.finish.get(flow, 0.0))
+        self.finish[flow] = start + cost / weight
+        if len(self.finish) > 10000:
+            # Flows that are not ahead of the clock carry no credit; forget them
+            self.finish = {f: t for f, t in self.finish.items() if t > self.vtime}
+        return start
+
+
+class FairScheduler:
+    def __init__(self, slots: Dict[str, int], weights: Dict[str, float],
+                 on_wait: Optional[Callable[[str, str, float], None]] = None):
+        self.stages = {name: _Stage(name, capacity) for name, capacity in slots.items() if capacity > 0}
+        self.weights = weights
+        self.on_wait = on_wait
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._seq = itertools.count()
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Event loop that owns the queues; worker threads wait on it"""
+        self.loop = loop
+
+    async def acquire(self, stage_name: str, user: str, priority: str, cost: float = 1.0) -> bool:
+        """Wait for a slot; False when the stage isn't scheduled (nothing to release)"""
+        stage = self.stages.get(stage_name)
+        if stage is None:
+            return False
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+
+        flow = (user, priority)
+        start = stage.tag(flow, cost, self.weights.get(priority, 1.0))
+        if stage.in_use < stage.capacity and not any(stage.queued.values()):
+            stage.in_use += 1
+            stage.vtime = start
+            self._report(stage_name, priority, 0.0)
+            return True
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [start, next(self._seq), future, flow]
+        heapq.heappush(stage.waiting, entry)
+        stage.queued[priority] = stage.queued.get(priority, 0) + 1
+        queued_at = time.perf_counter()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we were cancelled: pass it on
+                self.release(stage_name)
+            else:
+                entry[2] = None
+                stage.queued[priority] -= 1
+            raise
+        self._report(stage_name, priority, time.perf_counter() - queued_at)
+        return True
+
+    def release(self, stage_name: str) -> None:
+        stage = self.stages[stage_name]
+        while stage.waiting:
+            start, _, future, flow = heapq.heappop(stage.waiting)
+            if future is None or future.done():
+                continue
+            # Hand the slot straight to the flow with the earliest virtual start
+            stage.queued[flow[1]] -= 1
+            stage.vtime = start
+            future.set_result(None)
+            return
+        stage.in_use -= 1
+
+    def _report(self, stage: str, priority: str, seconds: float) -> None:
+        if self.on_wait:
+            self.on_wait(stage, priority, seconds)
+
+    @asynccontextmanager
+    async def slot(self, stage: str, user: str, priority: str, cost: float = 1.0):
+        held = await self.acquire(stage, user, priority, cost)
+        try:
+            yield
+        finally:
+            if held:
+                self.release(stage)
+
+    @contextmanager
+    def slot_blocking(self, stage: str, user: str, priority: str, cost: float = 1.0,
+                      timeout: Optional[float] = None):
+        """slot() for worker threads; raises SlotTimeout if no slot is granted within timeout"""
+        loop = self.loop
+        on_loop = False
+        if loop is not None:
+            try:
+                on_loop = asyncio.get_running_loop() is loop
+            except RuntimeError:
+                pass
+        if loop is None or on_loop or stage not in self.stages or not loop.is_running():
+            # No loop to queue on (scripts, benchmarks), or called on the loop itself where
+            # blocking would deadlock: run unscheduled
+            yield
+            return
+
+        pending = asyncio.run_coroutine_threadsafe(self.acquire(stage, user, priority, cost), loop)
+        try:
+            held = pending.result(timeout=None if timeout is None else max(timeout, 0.0))
+        except BaseException as e:
+            # Withdraw from the queue, giving the slot back if it was granted meanwhile
+            pending.cancel()
+            if pending.done() and not pending.cancelled() and pending.exception() is None and pending.result():
+                loop.call_soon_threadsafe(self.release, stage)
+            if isinstance(e, concurrent.futures.TimeoutError):
+                raise SlotTimeout(f"No {stage} slot within {timeout:.1f}s") from None
+            raise
+        try:
+            yield
+        finally:
+            if held:
+                loop.call_soon_threadsafe(self.release, stage)
+
+    def queue_depths(self) -> Dict[Tuple[str, str], int]:
+        return {(name, priority): count for name, stage in self.stages.items()
+                for priority, count in stage.queued.items()}
+
+    def slots_in_use(self) -> Dict[str, int]:
+        return {name: stage.in_use for name, stage in self.stages.items()}
+
+    def snapshot(self) -> dict:
+        return {
+            name: {
+                "slots": stage.capacity,
+                "in_use": stage.in_use,
+                "queued": {p: c for p, c in stage.queued.items() if c},
+                "queued_users": len({e[3][0] for e in stage.waiting if e[2] is not None}),
+            }
+            for name, stage in self.stages.items()
+        }
+
+
+def parse_weights(spec: str, defaults: Dict[str, float]) -> Dict[str, float]:
+    """ "interactive=8,ingestion=2,batch=1" -> {name: value}, keeping defaults for missing names"""
+    values = dict(defaults)
+    for item in spec.split(","):
+        name, _, value = item.partition("=")
+        if not name.strip() or not value.strip():
+            continue
+        try:
+            values[name.strip()] = float(value)
+        except ValueError:
+            log.warning("Ignoring invalid scheduler setting %r", item)
+    return values
@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 """
 Wolf AI Server Manager - Easy start, stop, and monitoring
+
+The server runs as a cluster (see cluster.py): a supervisor process with
+SERVER_WORKERS uvicorn workers. Restarts are rolling, one worker at a time.
 """
 
 import requests
@@ -11,14 +14,36 @@ import sys
 import os
 from pathlib import Path
 
-SERVER_URL = "http://localhost:8000"
+from cluster import CONTROL_FILE, WORKER_STARTUP_TIMEOUT_SECONDS, cluster_state, request_control
+
+APP_DIR = Path(__file__).resolve().parent
+SERVER_URL = f"http://localhost:{os.getenv('SERVER_PORT', '8000')}"
 SERVER_SCRIPT = "fastapi_app_fixed.py"
+CLUSTER_SCRIPT = "cluster.py"
+DRAIN_SECONDS = int(os.getenv("SERVER_DRAIN_SECONDS", "30"))
+
+def running_cluster():
+    """State of the running cluster supervisor, or None"""
+    state = cluster_state()
+    if not state:
+        return None
+    try:
+        cmdline = psutil.Process(state['supervisor_pid']).cmdline()
+        if any(CLUSTER_SCRIPT in cmd for cmd in cmdline):
+            return state
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        pass
+    return None
 
 def find_server_process():
-    """Find the server process if it's running"""
+    """Find the server process (cluster supervisor, or a directly started app) if it's running"""
+    state = running_cluster()
+    if state:
+        return state['supervisor_pid']
     for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
         try:
-            if proc.info['cmdline'] and any(SERVER_SCRIPT in cmd for cmd in proc.info['cmdline']):
+            if proc.info['cmdline'] and any(SERVER_SCRIPT in cmd or CLUSTER_SCRIPT in cmd
+                                            for cmd in proc.info['cmdline']):
                 return proc.info['pid']
         except (psutil.NoSuchProcess, psutil.AccessDenied):
             continue
@@ -53,27 +78,30 @@ def start_server():
         except:
             pass
     
-    # Start new server process
+    # Start the cluster supervisor, which starts the workers
     try:
         if os.name == 'nt':  # Windows
             subprocess.Popen([
-                sys.executable, SERVER_SCRIPT
-            ], creationflags=subprocess.CREATE_NEW_CONSOLE)
+                sys.executable, CLUSTER_SCRIPT
+            ], cwd=APP_DIR, creationflags=subprocess.CREATE_NEW_CONSOLE)
         else:  # Unix/Linux/Mac
-            subprocess.Popen([sys.executable, SERVER_SCRIPT])
+            subprocess.Popen([sys.executable, CLUSTER_SCRIPT], cwd=APP_DIR)
         
         # Wait for server to start
         print("⏳ Waiting for server to start...")
-        for i in range(15):  # Wait up to 15 seconds
+        for i in range(60):  # Wait up to 60 seconds
             time.sleep(1)
             if is_server_running():
                 print("✅ Server started successfully!")
                 print(f"🌐 Server running at: {SERVER_URL}")
                 print(f"📊 Health check: {SERVER_URL}/health")
+                state = running_cluster()
+                if state:
+                    print(f"🧩 Workers: {len(state['workers'])} ({state['server']})")
                 return True
-            print(f"   Waiting... ({i+1}/15)")
+            print(f"   Waiting... ({i+1}/60)")
         
-        print("❌ Server failed to start within 15 seconds")
+        print("❌ Server failed to start within 60 seconds")
         return False
         
     except Exception as e:
@@ -84,7 +112,27 @@ def stop_server():
     """Stop the FastAPI server"""
     print("🛑 Stopping Wolf AI Server...")
     
-    # Try graceful shutdown via API first
+    # A cluster drains its workers when asked through its control file
+    state = running_cluster()
+    if state:
+        request_control("stop")
+        try:
+            psutil.Process(state['supervisor_pid']).wait(timeout=DRAIN_SECONDS + 15)
+            print(f"✅ Cluster stopped ({len(state['workers'])} workers drained)")
+            return True
+        except psutil.NoSuchProcess:
+            return True
+        except psutil.TimeoutExpired:
+            print("⚠️ Cluster did not stop in time, terminating its processes")
+            for pid in [state['supervisor_pid']] + [w['pid'] for w in state['workers']]:
+                try:
+                    psutil.Process(pid).kill()
+                except psutil.NoSuchProcess:
+                    pass
+            CONTROL_FILE.unlink(missing_ok=True)
+            return True
+    
+    # Try graceful shutdown via API (a directly started single process)
     try:
         response = requests.post(f"{SERVER_URL}/api/shutdown", timeout=3)
         if response.status_code == 200:
@@ -115,8 +163,29 @@ def stop_server():
         return True
 
 def restart_server():
-    """Restart the server"""
+    """Restart the server; a cluster is restarted one worker at a time without downtime"""
     print("🔄 Restarting Wolf AI Server...")
+    state = running_cluster()
+    if state:
+        workers = len(state['workers'])
+        target = state['generation'] + 1
+        print(f"🔁 Rolling restart of {workers} workers...")
+        request_control("restart")
+        deadline = time.time() + workers * (WORKER_STARTUP_TIMEOUT_SECONDS + DRAIN_SECONDS + 10)
+        while time.time() < deadline:
+            time.sleep(1)
+            state = running_cluster()
+            if not state:
+                print("❌ Cluster stopped during the restart")
+                return False
+            replaced = sum(1 for w in state['workers'] if w['generation'] >= target)
+            if state['generation'] >= target and replaced == len(state['workers']):
+                print(f"✅ All {replaced} workers replaced")
+                return True
+            print(f"   Replaced {replaced}/{workers}...")
+        print("❌ Rolling restart did not finish in time (check the server console)")
+        return False
+
     stop_server()
     time.sleep(2)
     return start_server()
@@ -127,8 +196,12 @@ def server_status():
     print("=" * 40)
     
     # Check if process is running
+    state = running_cluster()
     pid = find_server_process()
-    if pid:
+    if state:
+        print(f"🟢 Cluster: Running (supervisor PID: {pid}, {state['server']}, generation {state['generation']})")
+        show_worker_usage(state['workers'])
+    elif pid:
         print(f"🟢 Process: Running (PID: {pid})")
     else:
         print("🔴 Process: Not found")
@@ -147,6 +220,31 @@ def server_status():
     
     print(f"🌐 URL: {SERVER_URL}")
 
+def show_worker_usage(workers):
+    """CPU (sampled over half a second) and resident memory of each worker"""
+    procs = []
+    for worker in workers:
+        try:
+            proc = psutil.Process(worker['pid'])
+            proc.cpu_percent(None)
+            procs.append((worker, proc))
+        except psutil.NoSuchProcess:
+            print(f"   🔴 Worker {worker['pid']}: gone")
+    time.sleep(0.5)
+    total_cpu = total_rss = 0
+    for worker, proc in procs:
+        try:
+            cpu = proc.cpu_percent(None)
+            rss = proc.memory_info().rss / 1024 ** 2
+        except psutil.NoSuchProcess:
+            print(f"   🔴 Worker {worker['pid']}: gone")
+            continue
+        total_cpu += cpu
+        total_rss += rss
+        print(f"   🧩 Worker {worker['pid']} (gen {worker['generation']}, since {worker['started_at'][11:19]}): "
+              f"CPU {cpu:5.1f}% | RSS {rss:7.1f} MB")
+    print(f"   Σ  {len(procs)} workers: CPU {total_cpu:.1f}% | RSS {total_rss:.1f} MB")
+
 def interactive_menu():
     """Interactive server management menu"""
     while True:
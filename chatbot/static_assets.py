@@ -0,0 +1,129 @@
+"""
+Wolf AI - in-memory, precompressed serving of the built React frontend
+
+- Every file under static/dist is read once at startup and kept in memory with a
+  content-hash ETag, plus gzip and brotli variants for compressible types
+  (pre-built .gz/.br files next to the originals are used when present)
+- Variants are chosen by Accept-Encoding, and If-None-Match answers 304
+- Fingerprinted bundles (index-acc575a4.js) are cached for a year as immutable;
+  index.html is revalidated on every load so new deploys are picked up
+
+Run `python static_assets.py static/dist` after `npm run build` to write the
+.gz/.br files to disk so startup doesn't have to compress.
+"""
+
+import hashlib
+import logging
+import mimetypes
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from http_encoding import COMPRESSIBLE, brotli_available, brotli_compress, choose_encoding, gzip_compress
+
+log = logging.getLogger("wolfai.static")
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+SHORT_LIVED = "public, max-age=3600"
+
+# Vite emits name-<8 hex/base64url chars>.ext for everything it fingerprints
+FINGERPRINTED = re.compile(r"[-.][0-9A-Za-z_]{8,}\.[0-9A-Za-z]+$")
+MIN_COMPRESS_BYTES = 1024
+
+
+class StaticAsset:
+    """One file's bytes, encodings and validators"""
+
+    __slots__ = ("media_type", "etag", "cache_control", "variants")
+
+    def __init__(self, path: Path, relative: str):
+        body = path.read_bytes()
+        # Starlette adds "; charset=utf-8" to text/* types itself
+        self.media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+        if relative == "index.html":
+            self.cache_control = REVALIDATE
+        elif FINGERPRINTED.search(path.name):
+            self.cache_control = IMMUTABLE
+        else:
+            self.cache_control = SHORT_LIVED
+
+        self.variants: Dict[str, bytes] = {"identity": body}
+        if len(body) >= MIN_COMPRESS_BYTES and COMPRESSIBLE.match(self.media_type):
+            for encoding, suffix, compress in (("br", ".br", brotli_compress), ("gzip", ".gz", gzip_compress)):
+                prebuilt = path.with_name(path.name + suffix)
+                data = prebuilt.read_bytes() if prebuilt.exists() else compress(body)
+                # Keep a variant only when it actually saves bytes
+                if data is not None and len(data) < len(body):
+                    self.variants[encoding] = data
+
+    def etag_for(self, encoding: str) -> str:
+        # Each representation needs its own strong validator
+        return f'"{self.etag}"' if encoding == "identity" else f'"{self.etag}-{encoding}"'
+
+    def matches(self, if_none_match: str) -> bool:
+        if if_none_match.strip() == "*":
+            return True
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return any(self.etag_for(encoding) in tags for encoding in self.variants)
+
+
+class StaticAssetCache:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.assets: Dict[str, StaticAsset] = {}
+        for path in sorted(self.root.rglob("*")):
+            if path.is_file() and path.suffix not in (".gz", ".br"):
+                relative = path.relative_to(self.root).as_posix()
+                self.assets[relative] = StaticAsset(path, relative)
+
+        total = sum(len(a.variants["identity"]) for a in self.assets.values())
+        log.info("Loaded %d static files (%d KB) into memory%s", len(self.assets), total // 1024,
+                 "" if brotli_available else "; brotli not installed, serving gzip only")
+
+    def get(self, relative: str) -> Optional[StaticAsset]:
+        return self.assets.get(relative)
+
+    def response(self, relative: str, request: Request) -> Optional[Response]:
+        asset = self.assets.get(relative)
+        if asset is None:
+            return None
+
+        headers = {"Cache-Control": asset.cache_control}
+        if len(asset.variants) > 1:
+            headers["Vary"] = "Accept-Encoding"
+
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""), asset.variants)
+        headers["ETag"] = asset.etag_for(encoding)
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and asset.matches(if_none_match):
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(asset.variants[encoding], media_type=asset.media_type, headers=headers)
+
+
+def precompress(root: Path) -> None:
+    """Write .gz (and .br when available) files next to every compressible file"""
+    for relative, asset in StaticAssetCache(root).assets.items():
+        path = root / relative
+        for encoding, suffix in (("gzip", ".gz"), ("br", ".br")):
+            if encoding in asset.variants:
+                path.with_name(path.name + suffix).write_bytes(asset.variants[encoding])
+                ratio = len(asset.variants[encoding]) / len(asset.variants["identity"])
+                print(f"   {relative + suffix:<40} {len(asset.variants[encoding]):>9,} bytes ({ratio:.0%})")
+
+
+if __name__ == "__main__":
+    target = Path(sys.argv[1] if len(sys.argv) > 1 else "static/dist")
+    print(f"🗜️  Precompressing {target}")
+    precompress(target)
+    if not brotli_available:
+        print("⚠️  brotli not installed - only .gz files were written")